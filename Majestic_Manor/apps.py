@@ -0,0 +1,19 @@
+from django.contrib.staticfiles.apps import StaticFilesConfig
+
+
+class PrunedStaticFilesConfig(StaticFilesConfig):
+    # collectstatic skips assets that no page or admin screen loads. The
+    # collected files are only served with DEBUG=False, where the admin
+    # always picks the .min builds; runserver serves straight from the apps.
+    ignore_patterns = StaticFilesConfig.ignore_patterns + [
+        # cloudinary's jQuery direct-upload widget ({% cloudinary_includes %}, unused)
+        "cloudinary",
+        # unminified twins of the admin vendor builds
+        "admin/js/vendor/jquery/jquery.js",
+        "admin/js/vendor/select2/select2.full.js",
+        "admin/js/vendor/xregexp/xregexp.js",
+        "admin/css/vendor/select2/select2.css",
+        # select2 locales other than English (LANGUAGE_CODE is en-us)
+        "admin/js/vendor/select2/i18n/[!e]*.js",
+        "admin/js/vendor/select2/i18n/e[!n]*.js",
+    ]
@@ -0,0 +1,211 @@
+import hashlib
+import threading
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.http import JsonResponse
+
+from .metrics import record_cache
+from .replicas import primary
+
+# -----------------------------------------------------------
+# Cache Groups
+#
+# Every cached value belongs to a group with a version number stored in
+# the cache itself. Invalidating a group bumps its version, so all keys
+# built from the old version stop being read and simply expire.
+#
+# Values themselves expire after CACHES' TIMEOUT (CACHE_TIMEOUT) unless a
+# caller passes its own: a process whose cache never sees an invalidation
+# (locmem is per process) serves a stale value for at most that long.
+# -----------------------------------------------------------
+_MISSING = object()
+_listeners = []
+
+
+def _version_key(group):
+    return f"v:{group}"
+
+
+def group_version(group):
+    version = cache.get(_version_key(group))
+    if version is None:
+        version = 1
+        cache.add(_version_key(group), version, timeout=None)
+    return version
+
+
+def invalidate(*groups):
+    for group in groups:
+        try:
+            cache.incr(_version_key(group))
+        except ValueError:
+            cache.set(_version_key(group), 2, timeout=None)
+    for listener in _listeners:
+        listener(groups)
+
+
+def on_invalidate(listener):
+    """Call listener(groups) after every invalidate(), e.g. to record the change elsewhere."""
+    _listeners.append(listener)
+    return listener
+
+
+def invalidate_on_commit(*groups):
+    """
+    invalidate() once the current transaction commits (at once outside one):
+    bumped earlier, a concurrent request could cache uncommitted data under
+    the new version.
+    """
+    transaction.on_commit(lambda: invalidate(*groups))
+
+
+def make_key(prefix, groups, *parts):
+    versions = ".".join(str(group_version(group)) for group in groups)
+    return ":".join([prefix, versions, *map(str, parts)])
+
+
+# -----------------------------------------------------------
+# Hit / Miss Counters (per process)
+# -----------------------------------------------------------
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def record(layer, hit, count=1):
+    with _stats_lock:
+        counters = _stats.setdefault(layer, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += count
+    record_cache(hit, count)
+
+
+def stats():
+    with _stats_lock:
+        return {layer: dict(counters) for layer, counters in _stats.items()}
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse(stats())
+
+
+# -----------------------------------------------------------
+# Object Cache
+#
+# Values stored under a group version are computed from the primary: a
+# lagging replica read just after an invalidation would otherwise be
+# cached under the new version and served until the next change.
+# -----------------------------------------------------------
+def cached(name, groups, loader, timeout=DEFAULT_TIMEOUT):
+    """Return the cached result of loader() (None is cached too)."""
+    key = make_key("obj", groups, name)
+    value = cache.get(key, _MISSING)
+    record("object", value is not _MISSING)
+    if value is _MISSING:
+        with primary():
+            value = loader()
+        cache.set(key, value, timeout)
+    return value
+
+
+async def acached(name, groups, loader, timeout=DEFAULT_TIMEOUT):
+    """cached() for async views; loader is a coroutine function (e.g. Model.objects.afirst)."""
+    key = make_key("obj", groups, name)
+    value = await cache.aget(key, _MISSING)
+    record("object", value is not _MISSING)
+    if value is _MISSING:
+        with primary():
+            value = await loader()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+def cached_many(name, groups, items, key_of, render, timeout=DEFAULT_TIMEOUT):
+    """Render a list of fragments with one get_many/set_many round trip."""
+    keys = {make_key("frag", groups, name, key_of(item)): item for item in items}
+    found = cache.get_many(list(keys))
+    record("fragment", True, len(found))
+    record("fragment", False, len(keys) - len(found))
+
+    with primary():
+        missing = {key: render(item) for key, item in keys.items() if key not in found}
+    if missing:
+        cache.set_many(missing, timeout)
+    found.update(missing)
+    return [found[key] for key in keys]
+
+
+# -----------------------------------------------------------
+# Anonymous Page Cache
+# -----------------------------------------------------------
+def cache_anonymous_page(*groups, timeout=DEFAULT_TIMEOUT, key_func=None):
+    """
+    Cache whole GET responses for anonymous visitors, keyed by full path.
+    `groups` may contain callables taking the view kwargs, e.g. per-room groups.
+    Works on sync and async views.
+    """
+    def decorator(view):
+        def page_key(request, kwargs):
+            # None: not cacheable (unsafe method or a logged-in user)
+            if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+                return None
+            names = [group(**kwargs) if callable(group) else group for group in groups]
+            parts = [hashlib.md5(request.get_full_path().encode()).hexdigest()]
+            if key_func:
+                parts.append(key_func(request))
+            return make_key(f"page:{view.__module__}.{view.__name__}", names, *parts)
+
+        def hit(response):
+            record("page", response is not None)
+            if response is not None:
+                response["X-Cache"] = "HIT"
+            return response
+
+        def cacheable(response):
+            # Only plain 200s without cookies are shared; returns the rendered response
+            if response.status_code != 200 or response.cookies:
+                return None
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            return response
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # request.user reads the session from the database
+                key = await sync_to_async(page_key)(request, kwargs)
+                if key is None:
+                    return await view(request, *args, **kwargs)
+                response = hit(await cache.aget(key))
+                if response is not None:
+                    return response
+                with primary():
+                    response = await view(request, *args, **kwargs)
+                if (rendered := cacheable(response)) is not None:
+                    await cache.aset(key, rendered, timeout)
+                    response = rendered
+                response["X-Cache"] = "MISS"
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = page_key(request, kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+            response = hit(cache.get(key))
+            if response is not None:
+                return response
+            with primary():
+                response = view(request, *args, **kwargs)
+            if (rendered := cacheable(response)) is not None:
+                cache.set(key, rendered, timeout)
+                response = rendered
+            response["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
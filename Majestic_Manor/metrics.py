@@ -0,0 +1,354 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------------------------
+# Histograms
+#
+# HdrHistogram-style log-linear buckets: every power-of-two range is
+# split into 2**SUB_BITS buckets, so a recorded value is kept to within
+# 1/2**(SUB_BITS - 1) (~3%) at any magnitude, in a few hundred counters.
+# -----------------------------------------------------------
+SUB_BITS = 6
+
+
+class Histogram:
+    def __init__(self, unit):
+        # Values are counted in integer multiples of `unit` (1e-6: microseconds)
+        self.unit = unit
+        self.counts = {}
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        n = int(value / self.unit)
+        shift = max(n.bit_length() - SUB_BITS, 0)
+        index = (shift, n >> shift)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.sum += value
+
+    def percentiles(self, quantiles):
+        """{q: value}: the highest value equivalent to the q-th one (HdrHistogram's convention)."""
+        with self._lock:
+            buckets = sorted(self.counts.items())
+            count = self.count
+        result, seen = {}, 0
+        pending = sorted(quantiles)
+        for (shift, sub), bucket_count in buckets:
+            seen += bucket_count
+            while pending and seen >= pending[0] * count:
+                result[pending.pop(0)] = (((sub + 1) << shift) - 1) * self.unit
+        for q in pending:
+            result[q] = 0.0
+        return result
+
+
+# (family, view) -> Histogram; families are declared in FAMILIES below
+_histograms = {}
+_responses = {}
+_registry_lock = threading.Lock()
+
+FAMILIES = {
+    "request_duration_seconds": ("Wall time per request.", 1e-6),
+    "db_queries_per_request": ("Database queries per request.", 1),
+    "db_duration_seconds": ("Time spent in database queries per request.", 1e-6),
+    "template_render_seconds": ("Time spent rendering templates per request.", 1e-6),
+}
+
+
+def observe(family, view, value):
+    key = (family, view)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.setdefault(key, Histogram(FAMILIES[family][1]))
+    histogram.record(value)
+
+
+def count_response(view, status):
+    key = (view, status)
+    with _registry_lock:
+        _responses[key] = _responses.get(key, 0) + 1
+
+
+# Functions (prefix) -> [exposition lines] for metrics kept elsewhere,
+# e.g. the task queue (tasks.queue.metric_lines)
+_collectors = []
+
+
+def register_collector(collector):
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+        _responses.clear()
+
+
+# -----------------------------------------------------------
+# Per-request collection
+#
+# A context variable, so the numbers follow the request into
+# sync_to_async threads under ASGI.
+# -----------------------------------------------------------
+class RequestStats:
+    def __init__(self):
+        self.view = "unresolved"
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.repeats = {}
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+        # Same SQL over and over in one request is the N+1 signature
+        stats.repeats[sql] = stats.repeats.get(sql, 0) + 1
+
+
+def install_query_hook(sender, connection, **kwargs):
+    # execute_wrappers outlives reconnects, so add the hook only once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_hook)
+
+
+def record_cache(hit, count=1):
+    """Called by Majestic_Manor.cache for every lookup."""
+    stats = _current.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += count
+        else:
+            stats.cache_misses += count
+
+
+# -----------------------------------------------------------
+# Templates
+#
+# TEMPLATES uses this backend so every top-level render (views and
+# render_to_string) is timed; includes are part of their parent.
+# -----------------------------------------------------------
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# -----------------------------------------------------------
+# Sampling profiler
+#
+# A sampled request runs under cProfile; the profile is kept only if the
+# request turned out slow. One at a time per process: cProfile cannot
+# nest, and the overhead stays bounded.
+# -----------------------------------------------------------
+_profile_lock = threading.Lock()
+
+
+def start_profile():
+    rate = settings.METRICS_PROFILE_SAMPLE_RATE
+    if rate <= 0 or random.random() >= rate or not _profile_lock.acquire(blocking=False):
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # another profiler is active
+        _profile_lock.release()
+        return None
+    return profile
+
+
+def finish_profile(profile, view, elapsed):
+    try:
+        profile.disable()
+        if elapsed >= settings.METRICS_SLOW_REQUEST_SECONDS:
+            os.makedirs(settings.METRICS_PROFILE_DIR, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{view}-{elapsed * 1000:.0f}ms-{os.getpid()}.prof"
+            profile.dump_stats(os.path.join(settings.METRICS_PROFILE_DIR, name))
+    finally:
+        _profile_lock.release()
+
+
+# -----------------------------------------------------------
+# Middleware
+# -----------------------------------------------------------
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, start = self.begin()
+        # Only sync requests are profiled: under ASGI the loop thread
+        # interleaves every other request into the profile
+        profile = start_profile()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                finish_profile(profile, stats.view, elapsed)
+        return self.finish(stats, response, elapsed)
+
+    async def __acall__(self, request):
+        stats, token, start = self.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(stats, response, time.perf_counter() - start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current.get()
+        if stats is not None:
+            view = getattr(view_func, "view_class", view_func)
+            stats.view = f"{view.__module__}.{view.__qualname__}"
+
+    def begin(self):
+        stats = RequestStats()
+        return stats, _current.set(stats), time.perf_counter()
+
+    def finish(self, stats, response, elapsed):
+        view = stats.view
+        observe("request_duration_seconds", view, elapsed)
+        observe("db_queries_per_request", view, stats.queries)
+        observe("db_duration_seconds", view, stats.db_time)
+        observe("template_render_seconds", view, stats.template_time)
+        count_response(view, response.status_code)
+
+        if stats.repeats:
+            sql, repeats = max(stats.repeats.items(), key=lambda item: item[1])
+            if repeats >= settings.METRICS_REPEATED_QUERY_THRESHOLD:
+                logger.warning("%s ran the same query %d times (N+1?): %s", view, repeats, sql)
+
+        if settings.METRICS_SERVER_TIMING:
+            lookups = stats.cache_hits + stats.cache_misses
+            timings = [
+                f"app;dur={elapsed * 1000:.1f}",
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+                f"tpl;dur={stats.template_time * 1000:.1f}",
+            ]
+            if lookups:
+                timings.append(f'cache;desc="{stats.cache_hits}/{lookups} hits"')
+            response["Server-Timing"] = ", ".join(timings)
+        return response
+
+
+# -----------------------------------------------------------
+# Prometheus endpoint
+# -----------------------------------------------------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exposition():
+    from .cache import stats as cache_stats
+
+    prefix = settings.METRICS_PREFIX
+    quantiles = settings.METRICS_QUANTILES
+    lines = []
+    with _registry_lock:
+        histograms = sorted(_histograms.items())
+        responses = sorted(_responses.items())
+
+    for family, (help_text, _) in FAMILIES.items():
+        name = f"{prefix}_{family}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+        for (hist_family, view), histogram in histograms:
+            if hist_family != family:
+                continue
+            view = _label(view)
+            for q, value in histogram.percentiles(quantiles).items():
+                lines.append(f'{name}{{view="{view}",quantile="{q}"}} {value:.6g}')
+            lines.append(f'{name}_sum{{view="{view}"}} {histogram.sum:.6g}')
+            lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+
+    name = f"{prefix}_responses_total"
+    lines += [f"# HELP {name} Responses by view and status code.", f"# TYPE {name} counter"]
+    for (view, status), count in responses:
+        lines.append(f'{name}{{view="{_label(view)}",code="{status}"}} {count}')
+
+    name = f"{prefix}_cache_requests_total"
+    lines += [f"# HELP {name} Cache lookups by layer and result.", f"# TYPE {name} counter"]
+    for layer, counters in sorted(cache_stats().items()):
+        for result, key in (("hit", "hits"), ("miss", "misses")):
+            lines.append(f'{name}{{layer="{_label(layer)}",result="{result}"}} {counters[key]}')
+
+    for collector in _collectors:
+        lines += collector(prefix)
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    # Scrapers send METRICS_TOKEN as a bearer token; staff can look in a browser
+    token = settings.METRICS_TOKEN
+    authorized = (
+        (token and request.headers.get("Authorization") == f"Bearer {token}")
+        or (not token and settings.DEBUG)
+        or request.user.is_staff
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(exposition(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,270 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .metrics import register_collector
+
+# Set after a write: the replication position this browser must see next
+PIN_COOKIE = "db_pin"
+# Requests that may read from a replica
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# -----------------------------------------------------------
+# Replication Positions
+#
+# PostgreSQL: WAL LSNs. After a write the primary's current LSN goes
+# into the pin cookie, and a replica serves that browser again once it
+# has replayed past it. Other backends have no position to compare, so
+# a pinned browser reads the primary until the cookie expires.
+# -----------------------------------------------------------
+POSITION_SQL = {
+    "postgresql": (
+        "SELECT pg_current_wal_lsn()::text",
+        # Not in recovery (a replica URL pointing at a primary): its own LSN
+        "SELECT COALESCE(pg_last_wal_replay_lsn(), pg_current_wal_lsn())::text",
+    ),
+}
+
+LAG_SQL = {
+    # Nothing left to replay means caught up, however old the last replayed commit is
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery()"
+        " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+        " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+
+def parse_lsn(text):
+    high, low = text.split("/")
+    return int(high, 16) << 32 | int(low, 16)
+
+
+def _scalar(alias, sql):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone()[0]
+
+
+def primary_position():
+    """The primary's replication position, None if the backend has none."""
+    sql = POSITION_SQL.get(connections[DEFAULT_DB_ALIAS].vendor)
+    return parse_lsn(_scalar(DEFAULT_DB_ALIAS, sql[0])) if sql else None
+
+
+def replica_position(alias):
+    sql = POSITION_SQL.get(connections[alias].vendor)
+    return parse_lsn(_scalar(alias, sql[1])) if sql else None
+
+
+def parse_pin(value):
+    # None: not pinned; True: pinned outright; int: the position to wait for
+    if not value:
+        return None
+    return int(value) if value.isdigit() else True
+
+
+# -----------------------------------------------------------
+# Health Checks (per process)
+#
+# Each replica's lag is measured at most every DB_REPLICA_CHECK_SECONDS.
+# One that cannot be reached, or is more than DB_REPLICA_MAX_LAG seconds
+# behind, gets no reads until a later check passes.
+# -----------------------------------------------------------
+_health = {}  # alias -> (checked at, lag in seconds or None if unreachable)
+_health_lock = threading.Lock()
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the primary, None if it cannot be reached."""
+    try:
+        return float(_scalar(alias, LAG_SQL.get(connections[alias].vendor, "SELECT 0")))
+    except DatabaseError:
+        connections[alias].close()
+        return None
+
+
+def check(alias, now=None):
+    now = now or time.monotonic()
+    with _health_lock:
+        entry = _health.get(alias)
+    if entry is None or now - entry[0] >= settings.DB_REPLICA_CHECK_SECONDS:
+        entry = (now, replica_lag(alias))
+        with _health_lock:
+            _health[alias] = entry
+    return entry[1]
+
+
+def healthy_replicas():
+    limit = settings.DB_REPLICA_MAX_LAG
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if (lag := check(alias)) is not None and lag <= limit
+    ]
+
+
+def choose(pin=None):
+    """A healthy replica that has caught up with `pin`, else the primary."""
+    if pin is True:
+        return DEFAULT_DB_ALIAS
+    candidates = healthy_replicas()
+    random.shuffle(candidates)
+    for alias in candidates:
+        if pin is None:
+            return alias
+        try:
+            position = replica_position(alias)
+        except DatabaseError:
+            continue
+        if position is not None and position >= pin:
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+# -----------------------------------------------------------
+# Routing
+#
+# Reads go to a replica only inside a safe-method request (see the
+# middleware below) and only until the request writes; the replica is
+# picked on the first read and kept for the rest of the request. All
+# writes, and reads inside a transaction, stay on the primary. Outside
+# a request (tasks, commands, signals) everything uses the primary.
+# -----------------------------------------------------------
+class RouteState:
+    def __init__(self, replica=False, pin=None):
+        self.replica = replica
+        self.pin = pin
+        self.alias = None
+        self.wrote = False
+        self.primary = 0
+
+
+_current = ContextVar("db_route", default=None)
+
+
+def read_alias():
+    """Where a read would go right now (for querysets evaluated after the view returns)."""
+    state = _current.get()
+    if state is None or not state.replica or state.wrote or state.primary:
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    if state.alias is None:
+        state.alias = choose(state.pin)
+    return state.alias
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, e.g. while filling a shared cache."""
+    state = _current.get()
+    if state is None:
+        yield
+        return
+    state.primary += 1
+    try:
+        yield
+    finally:
+        state.primary -= 1
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        # Explicitly: Django would otherwise write an instance back where it was read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+# -----------------------------------------------------------
+# Middleware
+# -----------------------------------------------------------
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return await sync_to_async(self.finish)(state, response)
+
+    def begin(self, request):
+        state = RouteState(
+            replica=bool(settings.DATABASE_REPLICAS) and request.method in SAFE_METHODS,
+            pin=parse_pin(request.COOKIES.get(PIN_COOKIE)),
+        )
+        return state, _current.set(state)
+
+    def finish(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            # Read your writes: this browser's next reads wait for this position
+            position = primary_position()
+            response.set_cookie(
+                PIN_COOKIE, "-" if position is None else str(position),
+                max_age=settings.DB_REPLICA_PIN_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
+
+
+# -----------------------------------------------------------
+# Metrics (collected by /metrics)
+# -----------------------------------------------------------
+def metric_lines(prefix):
+    if not settings.DATABASE_REPLICAS:
+        return []
+    lags = {alias: check(alias) for alias in settings.DATABASE_REPLICAS}
+    limit = settings.DB_REPLICA_MAX_LAG
+    lines = [
+        f"# HELP {prefix}_db_replica_lag_seconds Replication lag per replica (-1: unreachable).",
+        f"# TYPE {prefix}_db_replica_lag_seconds gauge",
+    ]
+    lines += [f'{prefix}_db_replica_lag_seconds{{alias="{alias}"}} {-1 if lag is None else lag:.6g}' for alias, lag in lags.items()]
+    lines += [
+        f"# HELP {prefix}_db_replica_healthy Whether the replica is serving reads.",
+        f"# TYPE {prefix}_db_replica_healthy gauge",
+    ]
+    lines += [
+        f'{prefix}_db_replica_healthy{{alias="{alias}"}} {int(lag is not None and lag <= limit)}'
+        for alias, lag in lags.items()
+    ]
+    return lines
+
+
+register_collector(metric_lines)
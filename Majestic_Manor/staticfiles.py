@@ -0,0 +1,139 @@
+import os
+from wsgiref.headers import Headers
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from whitenoise.compress import Compressor
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError, StaticFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    import zstandard
+except ImportError:  # optional: without it only .br/.gz variants are written
+    zstandard = None
+
+
+# -----------------------------------------------------------
+# collectstatic: Brotli + gzip (WhiteNoise) and zstd variants
+# -----------------------------------------------------------
+class ZstdCompressor(Compressor):
+    def __init__(self, *args, use_zstd=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_zstd = use_zstd and zstandard is not None
+
+    def compress(self, path):
+        filenames = super().compress(path)
+        if self.use_zstd:
+            with open(path, "rb") as f:
+                stat_result = os.fstat(f.fileno())
+                data = f.read()
+            compressed = zstandard.ZstdCompressor(level=19).compress(data)
+            if self.is_compressed_effectively("Zstandard", path, len(data), compressed):
+                filenames.append(self.write_data(path, compressed, ".zst", stat_result))
+        return filenames
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed, precompressed static files whose URLs are resolved once per
+    process (warm() at worker boot) instead of on every {% static %}.
+    """
+    # Templates reference a few images that were never added; serve those
+    # unhashed (404) rather than failing the whole page
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._urls = {}
+
+    def create_compressor(self, **kwargs):
+        return ZstdCompressor(**kwargs)
+
+    def url(self, name, force=False):
+        if settings.DEBUG and not force:
+            return super().url(name, force)
+        url = self._urls.get(name)
+        if url is None:
+            try:
+                url = super().url(name, force)
+            except ValueError:
+                url = FileSystemStorage.url(self, name)
+            self._urls[name] = url
+        return url
+
+    def warm(self):
+        """Resolve the URL of every manifest entry; returns how many."""
+        self._urls.clear()
+        for name in list(self.hashed_files):
+            self.url(name)
+        return len(self._urls)
+
+
+def warm():
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    if hasattr(staticfiles_storage, "warm"):
+        staticfiles_storage.warm()
+
+
+# -----------------------------------------------------------
+# Serving: WhiteNoise plus the .zst variants
+#
+# Hashed names get "max-age=<10 years>, immutable" from WhiteNoise;
+# every variant is offered and the smallest one the client accepts wins.
+# -----------------------------------------------------------
+ENCODINGS = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    # Both modes, so under ASGI the rest of the stack is not forced onto a thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+    @staticmethod
+    def is_compressed_variant(path, stat_cache=None):
+        for suffix in ENCODINGS.values():
+            if path.endswith(suffix):
+                uncompressed_path = path[:-len(suffix)]
+                if stat_cache is None:
+                    return os.path.isfile(uncompressed_path)
+                return uncompressed_path in stat_cache
+        return False
+
+    def get_static_file(self, path, url, stat_cache=None):
+        if stat_cache is None and not os.path.exists(path):
+            raise MissingFileError(path)
+        headers = Headers([])
+        self.add_mime_headers(headers, path, url)
+        self.add_cache_headers(headers, path, url)
+        if self.allow_all_origins:
+            headers["Access-Control-Allow-Origin"] = "*"
+        if self.add_headers_function is not None:
+            self.add_headers_function(headers, path, url)
+        return StaticFile(
+            path,
+            headers.items(),
+            stat_cache=stat_cache,
+            encodings={encoding: path + suffix for encoding, suffix in ENCODINGS.items()},
+        )
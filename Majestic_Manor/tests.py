@@ -0,0 +1,216 @@
+import gzip
+import re
+import shutil
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from book import payments
+from book.models import Booking, Customer, Room
+from . import metrics, replicas
+from .staticfiles import zstandard
+
+
+# -----------------------------------------------------------
+# Request metrics: Server-Timing header and per-view histograms
+# -----------------------------------------------------------
+@override_settings(METRICS_TOKEN="scrape")
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in ("101", "102", "103"):
+            Room.objects.create(number=number, room_type="single", price_per_night="1000.00")
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        cache.clear()
+
+    def test_server_timing_counts_the_queries_run(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("book:search"), {"q": "single"})
+        self.assertGreater(len(queries), 0)
+
+        timing = dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timing), {"app", "db", "tpl"})
+        self.assertIn(f'desc="{len(queries)} queries"', timing["db"])
+        self.assertRegex(timing["tpl"], r"^dur=\d+\.\d$")
+
+    def test_requests_are_recorded_per_view(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("book:search"), {"q": "single"})
+            self.client.get(reverse("book:search"), {"q": "double"})
+
+        histogram = metrics._histograms[("db_queries_per_request", "book.views.search")]
+        self.assertEqual((histogram.count, histogram.sum), (2, len(queries)))
+        self.assertEqual(metrics._histograms[("request_duration_seconds", "book.views.search")].count, 2)
+
+        exposition = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape").content.decode()
+        self.assertIn('majestic_request_duration_seconds_count{view="book.views.search"} 2', exposition)
+        self.assertIn('majestic_responses_total{view="book.views.search",code="200"} 2', exposition)
+        self.assertTrue(re.search(r'majestic_db_queries_per_request\{view="book.views.search",quantile="0.5"\} \d', exposition))
+
+    def test_metrics_need_a_token_or_staff(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+
+# -----------------------------------------------------------
+# Static files: collectstatic writes hashed, precompressed variants and
+# the middleware serves the best one the client accepts
+# -----------------------------------------------------------
+@skipUnless(zstandard, "zstandard is not installed")
+class StaticFilesTests(SimpleTestCase):
+    css = "body { color: #333; }\n" + "".join(f".room-{i} {{ margin: {i}px; }}\n" for i in range(200))
+
+    def setUp(self):
+        source, root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, root)
+        Path(source, "site.css").write_text(self.css)
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[source], STATIC_ROOT=root,
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+        ))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.root = Path(root)
+
+    def get(self, url, accept):
+        # A new client loads the middleware, which scans STATIC_ROOT once
+        response = Client().get(url, HTTP_ACCEPT_ENCODING=accept)
+        body = b"".join(response.streaming_content)
+        response.close()
+        return response, body
+
+    def test_variants_are_written_for_hashed_names(self):
+        hashed = staticfiles_storage.stored_name("site.css")
+        self.assertRegex(hashed, r"^site\.[0-9a-f]{12}\.css$")
+        for suffix in ("", ".br", ".gz", ".zst"):
+            self.assertTrue((self.root / f"{hashed}{suffix}").is_file(), suffix)
+
+    def test_best_accepted_encoding_is_served(self):
+        url = staticfiles_storage.url("site.css")
+        response, body = self.get(url, "gzip, zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertEqual(zstandard.ZstdDecompressor().decompress(body).decode(), self.css)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+        response, body = self.get(url, "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body).decode(), self.css)
+
+        response, body = self.get(url, "identity")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(body.decode(), self.css)
+
+    def test_urls_are_resolved_once(self):
+        self.assertEqual(staticfiles_storage.warm(), 1)
+        url = staticfiles_storage._urls["site.css"]
+        with mock.patch.object(CompressedManifestStaticFilesStorage, "url") as resolve:
+            self.assertEqual(staticfiles_storage.url("site.css"), url)
+        resolve.assert_not_called()
+
+
+# -----------------------------------------------------------
+# Read replicas: a second SQLite database, refreshed by copying the
+# primary, stands in for a streaming replica that is behind
+# -----------------------------------------------------------
+@skipUnless(connection.vendor == "sqlite", "the test replica is a copy of the SQLite test database")
+@override_settings(DATABASE_REPLICAS=["replica"], DB_REPLICA_CHECK_SECONDS=0, BILLING_SUMMARY_MAX_AGE=0)
+class ReplicaRoutingTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings["replica"] = {
+            **connections["default"].settings_dict, "NAME": str(Path(cls.replica_dir) / "replica.sqlite3"),
+        }
+        # Added here, not as a class attribute: the runner sets up (and
+        # checks) the class's databases before the alias exists
+        cls.databases = {"default", "replica"}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        self.room = Room.objects.create(number="401", room_type="double", price_per_night="4000.00")
+        # Logged in before replicating, so the replica knows the session too
+        self.staff_client = Client()
+        self.staff_client.force_login(User.objects.create_user("accounts", password="x", is_staff=True))
+        self.replicate()
+
+    def replicate(self):
+        connections["replica"].close()
+        connections["default"].ensure_connection()
+        target = sqlite3.connect(connections["replica"].settings_dict["NAME"])
+        try:
+            connections["default"].connection.backup(target)
+        finally:
+            target.close()
+
+    def hold(self):
+        customer = Customer.objects.create(first_name="Ravi", email="ravi@example.com")
+        check_in = date.today() + timedelta(days=7)
+        return Booking.objects.create(
+            room=self.room, customer=customer, check_in=check_in,
+            check_out=check_in + timedelta(days=2), total_amount="8000.00",
+        )
+
+    def dashboard_orders(self):
+        return self.staff_client.get(reverse("billing:dashboard")).context["total_orders"]
+
+    def test_safe_requests_read_the_replica(self):
+        self.hold()
+        self.assertEqual(self.dashboard_orders(), 0)  # not replicated yet
+        self.replicate()
+        self.assertEqual(self.dashboard_orders(), 1)
+
+    def test_checkout_after_booking_reads_the_primary(self):
+        stay = date.today() + timedelta(days=3)
+        with mock.patch.object(payments, "acreate_order", mock.AsyncMock(return_value={"id": "order_1"})):
+            response = self.client.post(reverse("book:book_room", args=[self.room.pk]), {
+                "first_name": "Ravi", "email": "ravi@example.com",
+                "check_in": stay.isoformat(), "check_out": (stay + timedelta(days=1)).isoformat(),
+            })
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        booking = Booking.objects.get(razorpay_order_id="order_1")
+
+        # The browser that booked sees its hold; anyone else reads the lagging replica
+        checkout = reverse("book:checkout", args=[booking.pk])
+        self.assertEqual(self.client.get(checkout).status_code, 200)
+        self.assertEqual(Client().get(checkout).status_code, 404)
+
+    def test_lagging_or_unreachable_replica_gets_no_reads(self):
+        self.hold()
+        with mock.patch.object(replicas, "replica_lag", return_value=settings.DB_REPLICA_MAX_LAG + 1):
+            self.assertEqual(self.dashboard_orders(), 1)
+            self.assertIn('db_replica_healthy{alias="replica"} 0', "\n".join(replicas.metric_lines("mm")))
+
+        replica = connections["replica"]
+        name = replica.settings_dict["NAME"]
+        replica.close()
+        replica.settings_dict["NAME"] = str(Path(self.replica_dir) / "missing" / "replica.sqlite3")
+        try:
+            self.assertEqual(self.dashboard_orders(), 1)
+        finally:
+            replica.settings_dict["NAME"] = name
+        self.assertEqual(self.dashboard_orders(), 0)
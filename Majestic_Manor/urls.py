@@ -15,11 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
 from .views import signup_view
+from .cache import cache_stats
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,7 +30,10 @@ urlpatterns = [
     path('reporting/', include('reporting.urls')),
     path('contact/', include('contact.urls')),
     path('about/', include('about.urls')),
+    re_path(r'^api/(?P<version>v1)/', include('api.urls')),
     path('signup/', signup_view, name='signup'),
+    path('cache-stats/', cache_stats, name='cache_stats'),
+    path('metrics', metrics_view, name='metrics'),
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
     path('', include('book.urls')),
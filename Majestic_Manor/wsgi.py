@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Majestic_Manor.settings')
 
 application = get_wsgi_application()
+
+# Load the static manifest and resolve every URL before the first request
+from Majestic_Manor.staticfiles import warm  # noqa: E402
+
+warm()
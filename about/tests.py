@@ -1,3 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+
+class IndexPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_visits_share_one_render(self):
+        first = self.client.get(reverse("about:index"))
+        second = self.client.get(reverse("about:index"))
+        self.assertEqual((first["X-Cache"], second["X-Cache"]), ("MISS", "HIT"))
+        self.assertEqual(first.content, second.content)
+
+    def test_signed_in_visits_are_not_cached(self):
+        self.client.force_login(User.objects.create_user("guest", password="x"))
+        response = self.client.get(reverse("about:index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Cache", response)
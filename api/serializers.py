@@ -0,0 +1,54 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from book.models import Room
+
+# Columns read for a room; list views load nothing else (only())
+ROOM_FIELDS = ["id", "number", "room_type", "price_per_night", "description", "main_image"]
+
+
+class RoomSerializer(serializers.ModelSerializer):
+    main_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Room
+        fields = ROOM_FIELDS
+
+    def get_main_image(self, room):
+        return room.main_image.url if room.main_image else None
+
+
+class AvailableRoomSerializer(RoomSerializer):
+    # Quotes come from the view: one quote_many() call per page
+    quote = serializers.SerializerMethodField()
+
+    class Meta(RoomSerializer.Meta):
+        fields = ROOM_FIELDS + ["quote"]
+
+    def get_quote(self, room):
+        quote = self.context["quotes"][room.pk]
+        return {
+            "nights": quote.nights,
+            "per_night": str(quote.per_night),
+            "discount": str(quote.discount),
+            "total": str(quote.total),
+        }
+
+
+class BookingRequestSerializer(serializers.Serializer):
+    room = serializers.PrimaryKeyRelatedField(
+        queryset=Room.objects.filter(available=True).only("id", "number", "room_type", "price_per_night"),
+    )
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+    email = serializers.EmailField()
+    phone = serializers.CharField(max_length=20, required=False, allow_blank=True, default="")
+
+    def validate(self, data):
+        if data["check_in"] < timezone.localdate():
+            raise serializers.ValidationError({"check_in": "check_in cannot be in the past."})
+        if data["check_out"] <= data["check_in"]:
+            raise serializers.ValidationError("check_out must be after check_in.")
+        return data
@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from book import availability, payments
+from book.fake_gateway import FakeGateway
+from book.models import Booking, Customer, Room
+
+
+class RoomApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [
+            Room.objects.create(number=f"10{i}", room_type="double" if i % 2 else "single", price_per_night="2000.00")
+            for i in range(5)
+        ]
+        cls.customer = Customer.objects.create(first_name="Test", email="test@example.com")
+
+    def setUp(self):
+        # Throttle history lives in the cache; the index is per process
+        cache.clear()
+        availability.get_index().reset()
+        self.addCleanup(availability.get_index().reset)
+
+    def test_rooms_are_cursor_paginated(self):
+        first = self.client.get("/api/v1/rooms/?page_size=2").json()
+        second = self.client.get(first["next"]).json()
+
+        self.assertEqual([room["number"] for room in first["results"]], ["100", "101"])
+        self.assertEqual([room["number"] for room in second["results"]], ["102", "103"])
+        self.assertIsNone(first["previous"])
+
+    def test_unchanged_list_is_not_modified_after_one_query(self):
+        response = self.client.get("/api/v1/rooms/")
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        # The stamps live in the database: another process, or an emptied cache, agrees
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/rooms/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rooms[0].price_per_night = "2500.00"
+            self.rooms[0].save()
+        response = self.client.get("/api/v1/rooms/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_availability_excludes_booked_rooms(self):
+        today = date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                room=self.rooms[1], customer=self.customer, status="confirmed",
+                check_in=today, check_out=today + timedelta(days=2), total_amount="4000.00",
+            )
+        data = self.client.get(f"/api/v1/availability/?check_in={today}&check_out={today + timedelta(days=2)}").json()
+
+        self.assertNotIn("101", [room["number"] for room in data["results"]])
+        self.assertEqual(data["results"][0]["quote"], {
+            "nights": 2, "per_night": "2000.00", "discount": "0.00", "total": "4000.00",
+        })
+        self.assertEqual(self.client.get("/api/v1/availability/?check_in=tomorrow").status_code, 400)
+
+    def test_booking_creates_hold_and_order(self):
+        with FakeGateway() as gateway, override_settings(RAZORPAY_BASE_URL=gateway.url):
+            payments.reset()
+            self.addCleanup(payments.reset)
+            check_in = date.today() + timedelta(days=10)
+            request = {
+                "room": self.rooms[0].pk,
+                "check_in": check_in.isoformat(),
+                "check_out": (check_in + timedelta(days=1)).isoformat(),
+                "first_name": "Asha",
+                "email": "asha@example.com",
+            }
+            response = self.client.post("/api/v1/bookings/", request, content_type="application/json")
+            again = self.client.post("/api/v1/bookings/", request, content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        booking = Booking.objects.get(pk=response.json()["id"])
+        self.assertEqual(booking.status, "pending")
+        self.assertEqual(booking.razorpay_order_id, response.json()["razorpay_order_id"])
+        self.assertEqual(again.status_code, 409)
+
+    def test_booking_rejects_past_dates(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        response = self.client.post("/api/v1/bookings/", {
+            "room": self.rooms[0].pk,
+            "check_in": yesterday.isoformat(),
+            "check_out": (yesterday + timedelta(days=2)).isoformat(),
+            "first_name": "Asha",
+            "email": "asha@example.com",
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("check_in", response.json())
+        self.assertFalse(Booking.objects.exists())
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('rooms/', views.RoomList.as_view(), name='room_list'),
+    path('rooms/<int:pk>/', views.RoomDetail.as_view(), name='room_detail'),
+    path('availability/', views.Availability.as_view(), name='availability'),
+    path('bookings/', views.BookingCreate.as_view(), name='booking_create'),
+]
@@ -0,0 +1,186 @@
+import hashlib
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from razorpay.errors import BadRequestError
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from Majestic_Manor.replicas import primary
+from book import payments, pricing, reservations
+from book.availability import free_rooms, is_room_free, parse_stay
+from book.caching import BOOKINGS, RATES, ROOMS, room_group, stamps
+from book.models import Room
+from .serializers import AvailableRoomSerializer, BookingRequestSerializer, RoomSerializer, ROOM_FIELDS
+
+
+# -----------------------------------------------------------
+# Conditional GET
+#
+# The ETag is built from the versions of the groups a response depends
+# on, and Last-Modified from the time they last changed, both read from
+# book.caching's change stamps (bumped on every Room/Booking/rate change,
+# once it commits): one primary-key lookup, so an unchanged list answers
+# 304 before the page query, and every process agrees on the answer.
+# Stamps and body are read from the primary: a lagging replica would pair
+# old data with the new ETag, and clients would keep it until the next change.
+# -----------------------------------------------------------
+class ConditionalGetMixin:
+    cache_groups = ()
+    # Responses that default to tonight's stay also change at midnight
+    daily = False
+
+    def get_cache_groups(self):
+        return list(self.cache_groups)
+
+    def validators(self, request):
+        versions, changed_at = stamps(self.get_cache_groups())
+        parts = [".".join(map(str, versions)), request.get_full_path()]
+        if self.daily:
+            today = date.today()
+            parts.append(today.isoformat())
+            changed_at = max(changed_at, datetime.combine(today, time.min).timestamp())
+        etag = quote_etag(hashlib.md5("|".join(parts).encode()).hexdigest())
+        return etag, int(changed_at)
+
+    def get(self, request, *args, **kwargs):
+        # Validators first: a change racing the query then only costs a 200
+        with primary():
+            etag, last_modified = self.validators(request)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            # Cacheable, but always revalidated
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+class RoomCursorPagination(CursorPagination):
+    # Room numbers are unique, so they make a stable cursor
+    ordering = "number"
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+def rooms_for(request):
+    rooms = Room.objects.filter(available=True).only(*ROOM_FIELDS)
+    room_type = request.query_params.get("room_type")
+    if room_type:
+        if room_type not in dict(Room.ROOM_TYPES):
+            raise ValidationError({"room_type": f"Unknown room type {room_type!r}."})
+        rooms = rooms.filter(room_type=room_type)
+    return rooms
+
+
+# -----------------------------------------------------------
+# Rooms
+# -----------------------------------------------------------
+class RoomList(ConditionalGetMixin, generics.ListAPIView):
+    # /api/v1/rooms/?room_type=suite&page_size=50&cursor=...
+    serializer_class = RoomSerializer
+    pagination_class = RoomCursorPagination
+    cache_groups = [ROOMS]
+
+    def get_queryset(self):
+        return rooms_for(self.request)
+
+
+class RoomDetail(ConditionalGetMixin, generics.RetrieveAPIView):
+    serializer_class = RoomSerializer
+    queryset = Room.objects.only(*ROOM_FIELDS)
+
+    def get_cache_groups(self):
+        return [room_group(self.kwargs["pk"])]
+
+
+# -----------------------------------------------------------
+# Availability
+# -----------------------------------------------------------
+class Availability(ConditionalGetMixin, generics.ListAPIView):
+    # /api/v1/availability/?check_in=2026-01-10&check_out=2026-01-12&room_type=double
+    serializer_class = AvailableRoomSerializer
+    pagination_class = RoomCursorPagination
+    cache_groups = [ROOMS, BOOKINGS, RATES]
+    daily = True
+
+    def list(self, request, *args, **kwargs):
+        stay = parse_stay(request.query_params.get("check_in"), request.query_params.get("check_out"))
+        if stay is None:
+            raise ValidationError({"detail": "Invalid check-in/check-out dates."})
+
+        page = self.paginate_queryset(free_rooms(rooms_for(request), *stay))
+        # Priced per page: one rate calendar query, whatever the page size
+        quotes = pricing.quote_many(page, *stay)
+        serializer = self.get_serializer(page, many=True, context={**self.get_serializer_context(), "quotes": quotes})
+        return self.get_paginated_response(serializer.data)
+
+
+# -----------------------------------------------------------
+# Bookings
+#
+# Same flow as book.views.book_room: a pending hold, then the Razorpay
+# order the client pays with the Checkout SDK (payment_success confirms).
+# -----------------------------------------------------------
+class BookingCreate(APIView):
+    throttle_scope = "bookings"
+
+    def post(self, request, *args, **kwargs):
+        serializer = BookingRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        room, check_in, check_out = data["room"], data["check_in"], data["check_out"]
+
+        unavailable = Response(
+            {"detail": "This room is already booked for the selected dates."}, status=status.HTTP_409_CONFLICT,
+        )
+        if not is_room_free(room, check_in, check_out):
+            return unavailable
+
+        customer = reservations.get_customer(data["email"], data["first_name"], data["last_name"], data["phone"])
+        quote = pricing.quote(room, check_in, check_out)
+        amount_paise = pricing.to_paise(quote.total)
+        try:
+            booking = reservations.reserve(room, customer, check_in, check_out, quote.total)
+        except reservations.RoomUnavailable:
+            return unavailable
+
+        # Outside the room lock; give the hold back on failure
+        try:
+            order = payments.create_order(amount_paise)
+        except payments.GatewayUnavailable:
+            reservations.release(booking)
+            return Response(
+                {"detail": "The payment gateway is temporarily unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        except BadRequestError:
+            reservations.release(booking)
+            return Response({"detail": "Payment authentication failed."}, status=status.HTTP_502_BAD_GATEWAY)
+        except Exception as e:
+            reservations.release(booking)
+            return Response({"detail": f"Error creating Razorpay order: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
+
+        booking.razorpay_order_id = order["id"]
+        booking.save(update_fields=["razorpay_order_id"])
+        return Response({
+            "id": booking.pk,
+            "status": booking.status,
+            "room": room.pk,
+            "check_in": check_in,
+            "check_out": check_out,
+            "hold_expires_at": booking.hold_expires_at,
+            "total_amount": str(quote.total),
+            "amount_paise": amount_paise,
+            "currency": "INR",
+            "razorpay_order_id": order["id"],
+            "razorpay_key_id": settings.RAZORPAY_KEY_ID,
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,178 @@
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.utils import timezone
+
+from book.models import BookingHistory
+from book.pricing import to_paise
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+COLUMNS = [
+    "booking_id", "created_at", "status", "check_in", "check_out", "nights",
+    "total_amount", "amount_paise", "razorpay_order_id", "razorpay_payment_id",
+    "room_number", "room_type", "customer_name", "customer_email",
+]
+
+
+# -----------------------------------------------------------
+# Query
+#
+# Bookings with their customer and room joined in, read in chunks by id
+# so a year of bookings streams through a few thousand rows at a time.
+# -----------------------------------------------------------
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def created_between(bookings, start=None, end=None):
+    """Bookings created from `start` to `end` (dates, inclusive; either may be None)."""
+    if start:
+        bookings = bookings.filter(created_at__gte=day_start(start))
+    if end:
+        bookings = bookings.filter(created_at__lt=day_start(end + timedelta(days=1)))
+    return bookings
+
+
+def ledger_bookings(start=None, end=None, statuses=None):
+    # Archived bookings too: the ledger is the full record
+    bookings = BookingHistory.objects.select_related("customer", "room").only(
+        "id", "created_at", "status", "check_in", "check_out", "total_amount",
+        "razorpay_order_id", "razorpay_payment_id",
+        "room__number", "room__room_type",
+        "customer__first_name", "customer__last_name", "customer__email",
+    ).order_by("id")
+    bookings = created_between(bookings, start, end)
+    if statuses:
+        bookings = bookings.filter(status__in=statuses)
+    return bookings
+
+
+def record(booking):
+    return {
+        "booking_id": booking.pk,
+        "created_at": booking.created_at,
+        "status": booking.status,
+        "check_in": booking.check_in,
+        "check_out": booking.check_out,
+        "nights": (booking.check_out - booking.check_in).days,
+        "total_amount": booking.total_amount,
+        "amount_paise": to_paise(booking.total_amount),
+        "razorpay_order_id": booking.razorpay_order_id,
+        "razorpay_payment_id": booking.razorpay_payment_id,
+        "room_number": booking.room.number,
+        "room_type": booking.room.room_type,
+        "customer_name": str(booking.customer),
+        "customer_email": booking.customer.email,
+    }
+
+
+# -----------------------------------------------------------
+# Writers
+#
+# Each one is a generator of chunks for StreamingHttpResponse or a file.
+# -----------------------------------------------------------
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _chunks(bookings, chunk_size):
+    rows = bookings.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [record(booking) for booking in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv(bookings, chunk_size):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for chunk in _chunks(bookings, chunk_size):
+        yield "".join(writer.writerow([_text(row[name]) for name in COLUMNS]) for row in chunk)
+
+
+def write_jsonl(bookings, chunk_size):
+    for chunk in _chunks(bookings, chunk_size):
+        yield "".join(json.dumps({name: _text(row[name]) for name in COLUMNS}) + "\n" for row in chunk)
+
+
+class _Spool:
+    # Write-only file for ParquetWriter; whatever it wrote so far is taken
+    # out after every row group, so only one chunk is ever held
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def write_parquet(bookings, chunk_size):
+    # Imported here: pyarrow is big, and only this export needs it
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = pyarrow.schema([
+        ("booking_id", pyarrow.int64()),
+        ("created_at", pyarrow.timestamp("us", tz="UTC")),
+        ("status", pyarrow.string()),
+        ("check_in", pyarrow.date32()),
+        ("check_out", pyarrow.date32()),
+        ("nights", pyarrow.int32()),
+        ("total_amount", pyarrow.decimal128(9, 2)),
+        ("amount_paise", pyarrow.int64()),
+        ("razorpay_order_id", pyarrow.string()),
+        ("razorpay_payment_id", pyarrow.string()),
+        ("room_number", pyarrow.string()),
+        ("room_type", pyarrow.string()),
+        ("customer_name", pyarrow.string()),
+        ("customer_email", pyarrow.string()),
+    ])
+    spool = _Spool()
+    writer = pyarrow.parquet.ParquetWriter(spool, schema, compression="zstd")
+    # One row group per chunk
+    for chunk in _chunks(bookings, chunk_size):
+        writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+        yield spool.take()
+    writer.close()
+    yield spool.take()
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+
+def export(bookings, fmt="csv", chunk_size=2000):
+    return WRITERS[fmt](bookings, chunk_size)
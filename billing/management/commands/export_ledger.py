@@ -0,0 +1,39 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from billing import ledger
+from book.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Stream bookings with customer and room (the finance ledger) to CSV, JSONL or Parquet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help='output file, or "-" for stdout')
+        parser.add_argument("--format", choices=sorted(ledger.FORMATS),
+                            help="default: from the file extension, else csv")
+        parser.add_argument("--from", dest="start", type=date.fromisoformat, help="created on or after (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end", type=date.fromisoformat, help="created on or before (YYYY-MM-DD)")
+        parser.add_argument("--status", action="append", choices=[key for key, _ in Booking.STATUS_CHOICES],
+                            help="repeatable; default: every status")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or next(
+            (name for name in ledger.FORMATS if path.endswith(f".{name}")), "csv",
+        )
+        bookings = ledger.ledger_bookings(options["start"], options["end"], options["status"])
+        chunks = ledger.export(bookings, fmt, chunk_size=options["chunk_size"])
+
+        if path == "-":
+            out = sys.stdout.buffer if fmt == "parquet" else sys.stdout
+            for chunk in chunks:
+                out.write(chunk)
+            return
+        mode = {"mode": "wb"} if fmt == "parquet" else {"mode": "w", "encoding": "utf-8", "newline": ""}
+        with open(path, **mode) as fileobj:
+            for chunk in chunks:
+                fileobj.write(chunk)
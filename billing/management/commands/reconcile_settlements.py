@@ -0,0 +1,54 @@
+import csv
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing import reconciliation
+
+
+class Command(BaseCommand):
+    help = (
+        "Match a Razorpay settlement report (CSV or JSONL: order_id, entity_id/payment_id, "
+        "amount, type) against confirmed bookings and report every discrepancy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='settlement file, or "-" for stdin')
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension, else csv")
+        parser.add_argument("--from", dest="start", type=date.fromisoformat,
+                            help="only expect bookings created on or after (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end", type=date.fromisoformat,
+                            help="only expect bookings created on or before (YYYY-MM-DD)")
+        parser.add_argument("--amount-unit", choices=["paise", "rupees"], default="paise",
+                            help="unit of the amount column (Razorpay reports use paise)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--report", help="write the discrepancies to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        fileobj = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            settlements = reconciliation.read_settlements(fileobj, fmt, options["amount_unit"])
+            result = reconciliation.reconcile(
+                settlements, options["start"], options["end"], batch_size=options["batch_size"],
+            )
+        finally:
+            if fileobj is not sys.stdin:
+                fileobj.close()
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8", newline="") as report:
+                writer = csv.DictWriter(report, ["kind", "line", "order_id", "payment_id", "booking_id", "detail"])
+                writer.writeheader()
+                writer.writerows(result.issues)
+        else:
+            for issue in result.issues:
+                where = f"line {issue['line']}" if issue["line"] else f"booking {issue['booking_id']}"
+                self.stderr.write(
+                    f"{issue['kind']}: {where} order={issue['order_id'] or '-'} {issue['detail']}".rstrip()
+                )
+        self.stdout.write(str(result))
+        if result.issues:
+            raise CommandError(f"{len(result.issues)} discrepancies")
@@ -1,3 +1,13 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class BillingSummary(models.Model):
+    # Single-row materialized copy of the dashboard totals
+    total_orders = models.PositiveIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_payments = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Billing summary @ {self.refreshed_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,173 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from book.models import BookingHistory
+from book.pricing import to_paise
+from .ledger import created_between
+
+# Razorpay's settlement recon report calls the payment id "entity_id"
+ALIASES = {
+    "entity_id": "payment_id",
+    "razorpay_payment_id": "payment_id",
+    "razorpay_order_id": "order_id",
+}
+
+# Discrepancy kinds, in report order
+ISSUES = {
+    "amount_mismatch": "settled amount differs from the booking total",
+    "payment_mismatch": "settled payment id differs from the booking's",
+    "not_confirmed": "settled, but the booking is not confirmed",
+    "outside_range": "settled booking was created outside the date range",
+    "unknown_order": "no booking has this order id",
+    "duplicate": "order settled more than once",
+    "unsettled": "confirmed booking has no settlement",
+    "invalid": "settlement row could not be read",
+}
+
+
+# -----------------------------------------------------------
+# Settlement File
+# -----------------------------------------------------------
+def read_settlements(fileobj, fmt="csv", amount_unit="paise"):
+    """Yield (line, settlement dict or None, error) from a CSV/JSONL settlement report."""
+    if fmt == "csv":
+        reader = csv.DictReader(fileobj)
+        rows = ((reader.line_num, raw) for raw in reader)
+    else:
+        rows = ((line, text) for line, text in enumerate(fileobj, 1) if text.strip())
+
+    for line, raw in rows:
+        if fmt != "csv":
+            try:
+                raw = json.loads(raw)
+            except ValueError as exc:
+                yield line, None, f"invalid JSON: {exc}"
+                continue
+        row = {ALIASES.get(key, key): value for key, value in raw.items()}
+        try:
+            amount = Decimal(str(row.get("amount")))
+            amount_paise = int(amount) if amount_unit == "paise" else to_paise(amount)
+        except (InvalidOperation, ValueError):
+            yield line, None, f"invalid amount {row.get('amount')!r}"
+            continue
+        yield line, {
+            "type": row.get("type") or "payment",
+            "order_id": row.get("order_id") or "",
+            "payment_id": row.get("payment_id") or "",
+            "amount_paise": amount_paise,
+            "settlement_id": row.get("settlement_id") or "",
+        }, None
+
+
+# -----------------------------------------------------------
+# Reconciliation
+#
+# Hash join: confirmed bookings of the range are loaded once into a dict
+# keyed by order id (plus payment id -> order id for rows without one),
+# then the settlement file streams past it in batches. Archived bookings
+# are read too (BookingHistory): a settlement report can reach back past
+# the live table. Only settlements
+# that miss cost a query: one indexed order-id lookup per batch, to tell a
+# booking outside the range from an unknown order. Whatever is left in
+# the dict at the end was never settled.
+# -----------------------------------------------------------
+class Reconciliation:
+    def __init__(self):
+        self.matched = 0
+        self.skipped = 0  # refunds, adjustments, ...
+        self.issues = []  # dicts: kind, line, order_id, payment_id, booking_id, detail
+
+    def add(self, kind, line=None, order_id="", payment_id="", booking_id=None, detail=""):
+        self.issues.append({
+            "kind": kind, "line": line, "order_id": order_id,
+            "payment_id": payment_id, "booking_id": booking_id, "detail": detail,
+        })
+
+    def counts(self):
+        counts = dict.fromkeys(ISSUES, 0)
+        for issue in self.issues:
+            counts[issue["kind"]] += 1
+        return {kind: count for kind, count in counts.items() if count}
+
+    def __str__(self):
+        summary = ", ".join(f"{count} {kind}" for kind, count in self.counts().items())
+        return f"{self.matched} matched, {self.skipped} skipped" + (f"; {summary}" if summary else "")
+
+
+def reconcile(settlements, start=None, end=None, batch_size=1000):
+    """Match (line, settlement, error) rows from read_settlements() against confirmed bookings."""
+    result = Reconciliation()
+    confirmed = created_between(
+        BookingHistory.objects.filter(status="confirmed").exclude(razorpay_order_id=None), start, end,
+    )
+
+    expected, order_of_payment = {}, {}
+    for pk, order_id, payment_id, amount in confirmed.values_list(
+        "id", "razorpay_order_id", "razorpay_payment_id", "total_amount",
+    ).iterator(chunk_size=5000):
+        expected[order_id] = (pk, payment_id or "", to_paise(amount))
+        if payment_id:
+            order_of_payment[payment_id] = order_id
+
+    settled = {}  # order id -> line it was settled on
+    settlements = iter(settlements)
+    while True:
+        batch = list(islice(settlements, batch_size))
+        if not batch:
+            break
+        misses = []
+        for line, row, error in batch:
+            if error:
+                result.add("invalid", line, detail=error)
+                continue
+            if row["type"] != "payment":
+                result.skipped += 1
+                continue
+            order_id = row["order_id"] or order_of_payment.get(row["payment_id"], "")
+            if order_id in settled:
+                result.add("duplicate", line, order_id, row["payment_id"],
+                           detail=f"already settled on line {settled[order_id]}")
+                continue
+            booking = expected.pop(order_id, None)
+            if booking is None:
+                misses.append((line, row))
+                continue
+            settled[order_id] = line
+            _compare(result, line, order_id, row, *booking)
+
+        # Which misses are bookings we did not expect rather than no booking at all
+        known = {}
+        orders = [row["order_id"] for _, row in misses if row["order_id"]]
+        if orders:
+            known = {
+                order_id: (pk, status)
+                for order_id, pk, status in BookingHistory.objects.filter(
+                    razorpay_order_id__in=orders,
+                ).values_list("razorpay_order_id", "id", "status")
+            }
+        for line, row in misses:
+            order_id = row["order_id"]
+            if order_id in known:
+                pk, status = known[order_id]
+                settled[order_id] = line
+                if status == "confirmed":
+                    result.add("outside_range", line, order_id, row["payment_id"], pk)
+                else:
+                    result.add("not_confirmed", line, order_id, row["payment_id"], pk, f"status {status}")
+            else:
+                result.add("unknown_order", line, order_id, row["payment_id"])
+
+    for order_id, (pk, payment_id, _) in expected.items():
+        result.add("unsettled", None, order_id, payment_id, pk)
+    return result
+
+
+def _compare(result, line, order_id, row, pk, payment_id, amount_paise):
+    result.matched += 1
+    if row["amount_paise"] != amount_paise:
+        result.add("amount_mismatch", line, order_id, row["payment_id"], pk,
+                   f"settled {row['amount_paise']} paise, booked {amount_paise}")
+    if payment_id and row["payment_id"] and row["payment_id"] != payment_id:
+        result.add("payment_mismatch", line, order_id, row["payment_id"], pk, f"booking has {payment_id}")
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from book.models import Booking
+from book.signals import bookings_status_bulk_changed
+from . import summary
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(bookings_status_bulk_changed, sender=Booking)
+def booking_changed(sender, **kwargs):
+    summary.booking_changed()
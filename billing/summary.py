@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from book.archive import archive_totals
+from book.models import Booking
+from .models import BillingSummary
+
+SUMMARY_PK = 1
+
+
+def compute_totals():
+    # One query over the live bookings for all three dashboard cards,
+    # plus the archive's totals (cached until the next archive run)
+    totals = Booking.objects.aggregate(
+        total_orders=Count("id"),
+        total_revenue=Sum("total_amount", filter=Q(status="confirmed"), default=0),
+        pending_payments=Count("id", filter=Q(status="pending")),
+    )
+    archived = archive_totals()
+    totals["total_orders"] += archived["orders"]
+    totals["total_revenue"] += archived["revenue"]
+    return totals
+
+
+def max_age():
+    # 0 disables the materialized summary and always aggregates live
+    return getattr(settings, "BILLING_SUMMARY_MAX_AGE", 0)
+
+
+def refresh_summary():
+    totals = compute_totals()
+    summary, _ = BillingSummary.objects.update_or_create(
+        pk=SUMMARY_PK,
+        defaults={**totals, "refreshed_at": timezone.now()},
+    )
+    return summary
+
+
+def is_stale(summary):
+    return summary.refreshed_at < timezone.now() - timedelta(seconds=max_age())
+
+
+def get_totals():
+    if not max_age():
+        return compute_totals()
+
+    summary = BillingSummary.objects.filter(pk=SUMMARY_PK).first()
+    if summary is None or is_stale(summary):
+        summary = refresh_summary()
+    return {
+        "total_orders": summary.total_orders,
+        "total_revenue": summary.total_revenue,
+        "pending_payments": summary.pending_payments,
+    }
+
+
+def booking_changed():
+    # Debounced: a burst of booking writes costs at most one aggregate per window
+    if not max_age():
+        return
+    refreshed_at = BillingSummary.objects.filter(pk=SUMMARY_PK).values_list("refreshed_at", flat=True).first()
+    if refreshed_at is None or refreshed_at < timezone.now() - timedelta(seconds=max_age()):
+        refresh_summary()
@@ -1,3 +1,174 @@
-from django.test import TestCase
+import csv
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from book import archive
+from book.models import Booking, Customer, Room
+from . import ledger, summary
+from .reconciliation import reconcile
+from .models import BillingSummary
+
+
+# -----------------------------------------------------------
+# Dashboard: staff only, summary cards from the materialized row
+# -----------------------------------------------------------
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("accounts", password="x", is_staff=True)
+        cls.room = Room.objects.create(number="101", room_type="single", price_per_night="1000.00")
+        cls.customer = Customer.objects.create(first_name="Meera", email="meera@example.com")
+
+    def setUp(self):
+        # Archive totals are cached
+        cache.clear()
+
+    def book(self, status="confirmed", amount="1000.00"):
+        return Booking.objects.create(
+            room=self.room, customer=self.customer, status=status, check_in=date(2026, 5, 1),
+            check_out=date(2026, 5, 2), total_amount=amount,
+        )
+
+    def cards(self):
+        response = self.client.get(reverse("billing:dashboard"))
+        return tuple(response.context[key] for key in ("total_orders", "total_revenue", "pending_payments"))
+
+    def test_staff_only(self):
+        response = self.client.get(reverse("billing:dashboard"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/admin/login/", response["Location"])
+
+        self.client.force_login(User.objects.create_user("guest", password="x"))
+        self.assertEqual(self.client.get(reverse("billing:dashboard")).status_code, 302)
+
+    def test_live_totals_without_a_summary(self):
+        self.client.force_login(self.staff)
+        self.book()
+        self.book("pending")
+        self.assertEqual(self.cards(), (2, Decimal("1000.00"), 1))
+        self.assertFalse(BillingSummary.objects.exists())
+
+    @override_settings(BILLING_SUMMARY_MAX_AGE=60)
+    def test_summary_is_refreshed_at_most_once_per_window(self):
+        self.client.force_login(self.staff)
+        self.book()
+        self.assertEqual(self.cards(), (1, Decimal("1000.00"), 0))
+
+        # Inside the window a new booking is not counted yet
+        self.book("pending")
+        self.assertEqual(self.cards(), (1, Decimal("1000.00"), 0))
+
+        # Once the row is older than the window the next change refreshes it
+        BillingSummary.objects.update(refreshed_at=timezone.now() - timedelta(seconds=61))
+        self.book("confirmed", "500.00")
+        self.assertEqual(self.cards(), (3, Decimal("1500.00"), 1))
+
+        # ...and so does a page view with no change in between
+        BillingSummary.objects.update(refreshed_at=timezone.now() - timedelta(seconds=61), total_orders=0)
+        self.assertEqual(self.cards()[0], 3)
+        self.assertFalse(summary.is_stale(BillingSummary.objects.get()))
+
+
+# -----------------------------------------------------------
+# Ledger export: streamed CSV/JSONL, filtered by creation date and status
+# -----------------------------------------------------------
+class LedgerExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("accounts", password="x", is_staff=True)
+        room = Room.objects.create(number="101", room_type="single", price_per_night="1000.00")
+        customer = Customer.objects.create(first_name="Meera", last_name="Iyer", email="meera@example.com")
+        cls.bookings = []
+        for day, status in [(3, "confirmed"), (1, "confirmed"), (2, "cancelled"), (9, "confirmed")]:
+            booking = Booking.objects.create(
+                room=room, customer=customer, status=status, check_in=date(2026, 5, day),
+                check_out=date(2026, 5, day + 2), total_amount="2000.50", razorpay_order_id=f"order_{day}",
+            )
+            # Created on 2026-04-<day>
+            Booking.objects.filter(pk=booking.pk).update(created_at=timezone.make_aware(datetime(2026, 4, day, 12)))
+            cls.bookings.append(booking)
+
+    def export(self, **params):
+        self.client.force_login(self.staff)
+        return self.client.get(reverse("billing:ledger_export"), params)
+
+    def test_staff_only(self):
+        response = self.client.get(reverse("billing:ledger_export"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/admin/login/", response["Location"])
+
+    def test_csv_rows_in_booking_order(self):
+        response = self.export(**{"from": "2026-04-01", "to": "2026-04-08", "status": "confirmed"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="ledger-2026-04-01-2026-04-08.csv"')
+
+        rows = list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ledger.COLUMNS)
+        # Cancelled and out-of-range bookings are left out; ids ascending
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.bookings[0].pk), str(self.bookings[1].pk)])
+        record = dict(zip(rows[0], rows[1]))
+        self.assertEqual(
+            (record["nights"], record["total_amount"], record["amount_paise"], record["customer_email"]),
+            ("2", "2000.50", "200050", "meera@example.com"),
+        )
+
+    def test_jsonl_and_bad_parameters(self):
+        response = self.export(format="jsonl", status=["confirmed", "cancelled"], to="2026-04-02")
+        records = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(r["booking_id"], r["status"]) for r in records], [
+            (self.bookings[1].pk, "confirmed"), (self.bookings[2].pk, "cancelled"),
+        ])
+
+        self.assertEqual(self.export(format="xlsx").status_code, 400)
+        self.assertEqual(self.export(**{"from": "April"}).status_code, 400)
+        self.assertEqual(self.export(status="refunded").status_code, 400)
+
+
+# -----------------------------------------------------------
+# Archived bookings still count in the ledger, reconciliation and totals
+# -----------------------------------------------------------
+class ArchivedBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = Room.objects.create(number="501", room_type="suite", price_per_night="9000.00")
+        customer = Customer.objects.create(first_name="Meera", email="meera@example.com")
+        old = timezone.localdate() - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS + 30)
+        cls.bookings = [
+            Booking.objects.create(
+                room=room, customer=customer, status=status, check_in=check_in, check_out=check_in + timedelta(days=2),
+                total_amount="18000.00", razorpay_order_id=f"order_{status}_{check_in}",
+            )
+            for check_in, status in [
+                (old, "confirmed"), (old - timedelta(days=40), "cancelled"), (timezone.localdate(), "confirmed"),
+            ]
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.totals = summary.compute_totals()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive_bookings(), 2)
+
+    def test_totals_and_ledger_include_the_archive(self):
+        self.assertEqual(summary.compute_totals(), self.totals)
+        self.assertEqual([booking.pk for booking in ledger.ledger_bookings()], [booking.pk for booking in self.bookings])
+
+    def test_settlements_match_archived_bookings(self):
+        settlements = [
+            (line, {"type": "payment", "order_id": booking.razorpay_order_id, "payment_id": "",
+                    "amount_paise": 1800000, "settlement_id": ""}, None)
+            for line, booking in enumerate(self.bookings[:2], 1)
+        ]
+        result = reconcile(settlements)
+        self.assertEqual(result.matched, 1)
+        # The live confirmed booking has no settlement yet
+        self.assertEqual(result.counts(), {"not_confirmed": 1, "unsettled": 1})
@@ -5,4 +5,5 @@ app_name = "billing"
 
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('ledger/', views.ledger_export, name='ledger_export'),
 ]
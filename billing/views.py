@@ -1,18 +1,59 @@
+from datetime import date
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render
 from book.models import Booking  # import your Booking model
+from Majestic_Manor.replicas import read_alias
+from . import ledger
+from .summary import get_totals
+
+PAGE_SIZE = 50
+
 
+@staff_member_required
 def dashboard(request):
-    bookings = Booking.objects.all().order_by('-id')
-
-    # Calculate summary
-    total_orders = bookings.count()
-    total_revenue = sum(b.total_amount for b in bookings if b.status == "confirmed")
-    pending_payments = bookings.filter(status="pending").count()
-
-    context = {
-        "total_orders": total_orders,
-        "total_revenue": total_revenue,
-        "pending_payments": pending_payments,
-        "bookings": bookings,
-    }
+    # Summary cards: single aggregate query (or the cached summary row)
+    context = get_totals()
+
+    # Keyset pagination: ?before=<id> shows the next page of older bookings
+    bookings = Booking.objects.select_related("customer").order_by("-id")
+    before = request.GET.get("before")
+    if before:
+        if not before.isdigit():
+            return HttpResponseBadRequest("Invalid page cursor.")
+        bookings = bookings.filter(id__lt=int(before))
+
+    page = list(bookings[:PAGE_SIZE + 1])
+    has_more = len(page) > PAGE_SIZE
+    page = page[:PAGE_SIZE]
+
+    context.update({
+        "bookings": page,
+        "next_cursor": page[-1].id if has_more else None,
+        "is_first_page": not before,
+    })
     return render(request, "billing/dashboard.html", context)
+
+
+@staff_member_required
+def ledger_export(request):
+    # /billing/ledger/?from=2025-01-01&to=2025-01-31&status=confirmed&format=csv
+    fmt = request.GET.get("format", "csv")
+    if fmt not in ledger.FORMATS:
+        return HttpResponseBadRequest("Unknown format.")
+    try:
+        start = date.fromisoformat(request.GET["from"]) if request.GET.get("from") else None
+        end = date.fromisoformat(request.GET["to"]) if request.GET.get("to") else None
+    except ValueError:
+        return HttpResponseBadRequest("Dates must be YYYY-MM-DD.")
+    statuses = request.GET.getlist("status")
+    if not set(statuses) <= {key for key, _ in Booking.STATUS_CHOICES}:
+        return HttpResponseBadRequest("Unknown status.")
+
+    # Streamed after the view returns, outside the request's routing: pin the replica now
+    bookings = ledger.ledger_bookings(start, end, statuses).using(read_alias())
+    response = StreamingHttpResponse(ledger.export(bookings, fmt), content_type=ledger.FORMATS[fmt])
+    name = "-".join(["ledger", *(str(day) for day in (start, end) if day)])
+    response["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    return response
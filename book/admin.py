@@ -1,9 +1,187 @@
-from django.contrib import admin
-from .models import Room, Customer, Booking
+import io
+import json
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.urls import path
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import inventory, reservations
+from .models import Room, Customer, Booking, ArchivedBooking
 from .models import HomePage
+from .models import Season, WeekdayRate, StayDiscount
 
 admin.site.register(HomePage)
 
-admin.site.register(Room)
-admin.site.register(Customer)
-admin.site.register(Booking)
+
+# -----------------------------------------------------------
+# Estimated counts
+#
+# The changelist counts its queryset on every page. On PostgreSQL that is
+# a full scan of millions of bookings; the planner's row estimate costs
+# nothing and is plenty for a page count. Small results, and every other
+# database, still get the exact COUNT(*).
+# -----------------------------------------------------------
+ESTIMATE_ABOVE = 10_000
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+            if estimate > ESTIMATE_ABOVE:
+                return estimate
+        return super().count
+
+
+# -----------------------------------------------------------
+# Rooms: bulk import / streamed export (book/inventory.py)
+# -----------------------------------------------------------
+class RoomImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or JSON Lines (.jsonl)")
+    dry_run = forms.BooleanField(required=False, help_text="Validate only, write nothing")
+
+
+def export_response(queryset, fmt):
+    response = StreamingHttpResponse(inventory.export_rows(queryset, fmt), content_type=inventory.FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="rooms.{fmt}"'
+    return response
+
+
+@admin.register(Room)
+class RoomAdmin(admin.ModelAdmin):
+    list_display = ("number", "room_type", "price_per_night", "available")
+    list_filter = ("room_type", "available")
+    # Also what the booking form's room autocomplete searches
+    search_fields = ("number",)
+    ordering = ("number",)
+    change_list_template = "admin/book/room/change_list.html"
+    actions = ["export_csv", "export_jsonl"]
+
+    @admin.action(description="Export selected rooms as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, "csv")
+
+    @admin.action(description="Export selected rooms as JSON Lines")
+    def export_jsonl(self, request, queryset):
+        return export_response(queryset, "jsonl")
+
+    def get_urls(self):
+        return [
+            path("import/", self.admin_site.admin_view(self.import_view), name="book_room_import"),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return self.admin_site.login(request)
+        report = None
+        form = RoomImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            fileobj = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            try:
+                report = inventory.import_rooms(
+                    fileobj, inventory.detect_format(upload.name), dry_run=form.cleaned_data["dry_run"],
+                )
+            except (ValueError, UnicodeDecodeError) as exc:
+                form.add_error("file", str(exc))
+            else:
+                level = messages.SUCCESS if report.ok else messages.WARNING
+                prefix = "Dry run: " if form.cleaned_data["dry_run"] else ""
+                self.message_user(request, f"{prefix}{report}", level)
+        return render(request, "admin/book/room/import.html", {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import rooms",
+            "form": form,
+            "report": report,
+            # A bad file can reject every row; the page shows the first ones
+            "errors": report.errors[:200] if report else [],
+        })
+
+
+# -----------------------------------------------------------
+# Customers and bookings
+# -----------------------------------------------------------
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ("email", "first_name", "last_name", "phone")
+    # email is unique (indexed); names are a scan, but only when searching
+    search_fields = ("email", "first_name", "last_name")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ("id", "customer", "room", "check_in", "check_out", "status", "total_amount", "created_at")
+    # customer/room for __str__ in one JOIN instead of two queries per row
+    list_select_related = ("customer", "room")
+    # booking_status_* indexes lead with status
+    list_filter = ("status",)
+    date_hierarchy = "check_in"
+    search_fields = ("=id", "=razorpay_order_id", "=razorpay_payment_id", "customer__email")
+    # Search boxes instead of <select>s holding every customer and room
+    autocomplete_fields = ("customer", "room")
+    readonly_fields = ("created_at", "razorpay_order_id", "razorpay_payment_id", "razorpay_signature")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    # No second, unfiltered COUNT(*) and no per-filter counts
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    actions = ["cancel_bookings", "expire_holds"]
+
+    def _set_status(self, request, bookings, status, done):
+        changed = reservations.set_status(bookings, status)
+        self.message_user(request, f"{changed} booking{'s' if changed != 1 else ''} {done}.", messages.SUCCESS)
+
+    @admin.action(description="Cancel selected bookings", permissions=["change"])
+    def cancel_bookings(self, request, queryset):
+        self._set_status(request, queryset.filter(status__in=["pending", "confirmed"]), "cancelled", "cancelled")
+
+    @admin.action(description="Expire lapsed pending holds", permissions=["change"])
+    def expire_holds(self, request, queryset):
+        lapsed = queryset.filter(status="pending", hold_expires_at__lte=timezone.now())
+        self._set_status(request, lapsed, "cancelled", "released")
+
+
+# Filled by manage.py archive_bookings; read-only
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ("id", "customer", "room", "check_in", "check_out", "status", "total_amount")
+    list_select_related = ("customer", "room")
+    list_filter = ("status",)
+    # Partition pruning on PostgreSQL
+    date_hierarchy = "check_in"
+    search_fields = ("=id", "=razorpay_order_id", "=razorpay_payment_id", "customer__email")
+    ordering = ("-check_in",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# Saving any of these refreshes the rate calendar (book.signals)
+admin.site.register(Season)
+admin.site.register(WeekdayRate)
+admin.site.register(StayDiscount)
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from Majestic_Manor.cache import cached, invalidate_on_commit
+from .caching import ARCHIVE
+from .models import ArchivedBooking, Booking, BookingHistory
+
+# Statuses that never change again once the stay is over
+FINAL_STATUSES = ("confirmed", "cancelled", "failed")
+
+COLUMNS = (
+    "id", "room_id", "customer_id", "check_in", "check_out", "total_amount", "created_at",
+    "status", "razorpay_order_id", "razorpay_payment_id",
+)
+
+
+# -----------------------------------------------------------
+# Reading
+#
+# Nothing that checked out within the last BOOKING_ARCHIVE_AFTER_DAYS is
+# ever archived, so queries about stays ending after that horizon (the
+# site, and most reports) read only the live table; older windows read
+# the union view.
+# -----------------------------------------------------------
+def horizon(today=None):
+    return (today or timezone.localdate()) - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+
+
+def stays_ending_after(day):
+    """Booking or BookingHistory rows: whichever holds every stay with check_out > day."""
+    return Booking.objects if day >= horizon() else BookingHistory.objects
+
+
+def archive_totals():
+    # Archived rows never change; recomputed only after a move
+    return cached("archive_totals", [ARCHIVE], lambda: ArchivedBooking.objects.aggregate(
+        orders=Count("id"),
+        revenue=Sum("total_amount", filter=Q(status="confirmed"), default=0),
+    ))
+
+
+# -----------------------------------------------------------
+# Moving
+#
+# Each batch copies its rows with INSERT ... SELECT and deletes them from
+# book_booking in one transaction, in SQL: no per-row signals, so the
+# reporting rollups (which count every booking, live or archived) stay
+# as they are. The batch is locked first, so a concurrent status change
+# either lands before the copy or waits for it and finds the row gone.
+# -----------------------------------------------------------
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(month):
+    return f"book_archivedbooking_{month:%Y_%m}"
+
+
+def ensure_partitions(months):
+    """PostgreSQL: create the monthly partitions the archive rows will land in."""
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for month in sorted(set(day.replace(day=1) for day in months)):
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "book_archivedbooking" '
+                f"FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"
+            )
+
+
+def move_batch(cutoff, batch_size):
+    """Archive up to batch_size finished stays that checked out before cutoff; returns how many."""
+    with transaction.atomic():
+        rows = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(status__in=FINAL_STATUSES, check_out__lt=cutoff)
+            .order_by("check_out", "id")
+            .values_list("id", "check_in")[:batch_size]
+        )
+        if not rows:
+            return 0
+        ensure_partitions(check_in for _, check_in in rows)
+        pks = [pk for pk, _ in rows]
+        placeholders = ", ".join(["%s"] * len(pks))
+        columns = ", ".join(COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO book_archivedbooking ({columns}) "
+                f"SELECT {columns} FROM book_booking WHERE id IN ({placeholders})",
+                pks,
+            )
+            cursor.execute(f"DELETE FROM book_booking WHERE id IN ({placeholders})", pks)
+        invalidate_on_commit(ARCHIVE)
+    return len(pks)
+
+
+def archive_bookings(older_than_days=None, batch_size=None, log=None):
+    """Move every finished stay that checked out more than older_than_days ago; returns how many."""
+    days = settings.BOOKING_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    if days < settings.BOOKING_ARCHIVE_AFTER_DAYS:
+        # stays_ending_after() relies on nothing newer than the horizon being archived
+        raise ValueError(f"Stays are kept live for at least BOOKING_ARCHIVE_AFTER_DAYS ({settings.BOOKING_ARCHIVE_AFTER_DAYS}) days.")
+    cutoff = timezone.localdate() - timedelta(days=days)
+    moved = 0
+    while True:
+        count = move_batch(cutoff, batch_size or settings.BOOKING_ARCHIVE_BATCH_SIZE)
+        if not count:
+            return moved
+        moved += count
+        if log:
+            log(f"{moved} bookings archived")
@@ -0,0 +1,214 @@
+import threading
+import time
+from bisect import insort
+from itertools import compress
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+_BIT_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+# -----------------------------------------------------------
+# Availability Index
+#
+# Two views of the same confirmed bookings, kept in sync:
+#   * per-room sorted interval lists (check_in, check_out, booking_id),
+#     used to repaint a room's nights when a booking is removed
+#   * day buckets: day ordinal -> int bitmask of booked rooms,
+#     so "who is busy over [check_in, check_out)" is a handful of ORs
+# -----------------------------------------------------------
+class AvailabilityIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self._room_bits = {}      # room_id -> bit position
+        self._bit_rooms = []      # bit position -> room_id
+        self._intervals = {}      # room_id -> sorted [(start, end, booking_id)]
+        self._booking_rooms = {}  # booking_id -> room_id
+        self._days = {}           # day ordinal -> bitmask of booked rooms
+        self.built_at = None
+
+    def load(self, rows):
+        """Rebuild from (booking_id, room_id, check_in, check_out) rows."""
+        with self._lock:
+            self.reset()
+            for booking_id, room_id, check_in, check_out in rows:
+                self._add(booking_id, room_id, check_in.toordinal(), check_out.toordinal())
+            self.built_at = time.monotonic()
+
+    def is_stale(self, ttl):
+        return self.built_at is None or time.monotonic() - self.built_at > ttl
+
+    # ---------------- incremental updates ----------------
+    def add(self, booking_id, room_id, check_in, check_out):
+        with self._lock:
+            self._remove(booking_id)
+            self._add(booking_id, room_id, check_in.toordinal(), check_out.toordinal())
+
+    def discard(self, booking_id):
+        with self._lock:
+            self._remove(booking_id)
+
+    def _bit(self, room_id):
+        bit = self._room_bits.get(room_id)
+        if bit is None:
+            bit = len(self._bit_rooms)
+            self._room_bits[room_id] = bit
+            self._bit_rooms.append(room_id)
+        return bit
+
+    def _paint(self, mask, start, end):
+        days = self._days
+        for day in range(start, end):
+            days[day] = days.get(day, 0) | mask
+
+    def _add(self, booking_id, room_id, start, end):
+        if end <= start:
+            return
+        insort(self._intervals.setdefault(room_id, []), (start, end, booking_id))
+        self._booking_rooms[booking_id] = room_id
+        self._paint(1 << self._bit(room_id), start, end)
+
+    def _remove(self, booking_id):
+        room_id = self._booking_rooms.pop(booking_id, None)
+        if room_id is None:
+            return
+        intervals = self._intervals[room_id]
+        for i, (start, end, other_id) in enumerate(intervals):
+            if other_id == booking_id:
+                del intervals[i]
+                break
+
+        # Clear the freed nights, then repaint any other stay of the
+        # same room that still covers part of them.
+        mask = 1 << self._room_bits[room_id]
+        days = self._days
+        for day in range(start, end):
+            remaining = days.get(day, 0) & ~mask
+            if remaining:
+                days[day] = remaining
+            else:
+                days.pop(day, None)
+        for other_start, other_end, _ in intervals:
+            if other_start >= end:
+                break
+            if other_end > start:
+                self._paint(mask, max(start, other_start), min(end, other_end))
+
+    # ---------------- lookups ----------------
+    def busy_mask(self, check_in, check_out):
+        days = self._days
+        mask = 0
+        for day in range(check_in.toordinal(), check_out.toordinal()):
+            mask |= days.get(day, 0)
+        return mask
+
+    def busy_room_ids(self, check_in, check_out):
+        """Room ids with a confirmed booking overlapping [check_in, check_out)."""
+        with self._lock:
+            mask = self.busy_mask(check_in, check_out)
+            # Decode set bits in C: reversed binary string -> 0/1 bytes
+            flags = bin(mask)[:1:-1].encode().translate(_BIT_BYTES)
+            return list(compress(self._bit_rooms, flags))
+
+    def is_free(self, room_id, check_in, check_out):
+        with self._lock:
+            bit = self._room_bits.get(room_id)
+            if bit is None:
+                return True
+            return not (self.busy_mask(check_in, check_out) >> bit) & 1
+
+
+_index = AvailabilityIndex()
+
+
+_rebuild_lock = threading.Lock()
+
+
+def get_index():
+    # Each worker keeps its own copy; signals keep it exact for writes made
+    # in this process, the TTL bounds how stale other workers' writes get.
+    ttl = getattr(settings, "AVAILABILITY_INDEX_TTL", 60)
+    if _index.is_stale(ttl):
+        # Single flight: threads that waited here find it rebuilt
+        with _rebuild_lock:
+            if _index.is_stale(ttl):
+                rebuild()
+    return _index
+
+
+def rebuild():
+    from .models import Booking
+
+    rows = Booking.objects.filter(
+        status="confirmed",
+        check_out__gt=date.today(),
+    ).values_list("id", "room_id", "check_in", "check_out")
+    # Fetched first: lookups wait on the index lock only while it is painted
+    _index.load(list(rows.iterator(chunk_size=5000)))
+    return _index
+
+
+# Applied once the writing transaction commits: a rolled-back booking
+# never blocks its room, and the values are taken at save time.
+def sync_booking(booking, status=None):
+    """Apply a saved booking (optionally with a new status) to the index; no-op until built."""
+    if (status or booking.status) == "confirmed":
+        stay = (booking.pk, booking.room_id, _as_date(booking.check_in), _as_date(booking.check_out))
+        transaction.on_commit(lambda: _add(*stay))
+    else:
+        forget_booking(booking)
+
+
+def forget_booking(booking):
+    pk = booking.pk
+    transaction.on_commit(lambda: _discard(pk))
+
+
+def _add(booking_id, room_id, check_in, check_out):
+    if _index.built_at is not None:
+        _index.add(booking_id, room_id, check_in, check_out)
+
+
+def _discard(booking_id):
+    if _index.built_at is not None:
+        _index.discard(booking_id)
+
+
+# -----------------------------------------------------------
+# Helpers used by the views
+# -----------------------------------------------------------
+def _as_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def parse_stay(check_in, check_out, default_nights=1):
+    """Parse ISO dates (or dates) from a request; falls back to tonight. Returns None if invalid."""
+    try:
+        check_in = _as_date(check_in) if check_in else date.today()
+        if check_out:
+            check_out = _as_date(check_out)
+        else:
+            check_out = check_in + timedelta(days=default_nights)
+    except ValueError:
+        return None
+    if check_out <= check_in:
+        return None
+    return check_in, check_out
+
+
+def free_rooms(queryset, check_in, check_out):
+    busy = get_index().busy_room_ids(check_in, check_out)
+    if not busy:
+        return queryset
+    return queryset.exclude(pk__in=busy)
+
+
+def is_room_free(room, check_in, check_out):
+    return get_index().is_free(room.pk, check_in, check_out)
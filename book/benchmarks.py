@@ -0,0 +1,340 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from billing import summary
+from reporting import rollups
+from . import availability, pricing, reservations, search
+from .models import Booking, Customer, Room
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+DESCRIPTION_WORDS = [
+    "sea view", "garden view", "balcony", "king bed", "twin beds", "bathtub",
+    "rain shower", "work desk", "quiet", "corner room", "high floor", "pool access",
+]
+
+
+# -----------------------------------------------------------
+# Data Generator
+#
+# Bulk inserts without signals, then rebuilds what the signals would
+# have maintained (search index, billing summary, reporting rollups).
+# Stays of one room never overlap, whatever their status.
+# -----------------------------------------------------------
+def generate(bookings, rooms=None, customers=None, seed=42, batch_size=5000):
+    rng = random.Random(seed)
+    rooms = rooms or max(20, bookings // 200)
+    customers = customers or max(10, bookings // 5)
+    room_types = [key for key, _ in Room.ROOM_TYPES]
+    prices = {"single": (1500, 3000), "double": (2500, 5000), "suite": (6000, 15000)}
+
+    room_objects = []
+    for i in range(rooms):
+        room_type = room_types[i % len(room_types)]
+        room_objects.append(Room(
+            number=f"G{i:05d}",
+            room_type=room_type,
+            price_per_night=Decimal(rng.randrange(*prices[room_type], 100)),
+            description=", ".join(rng.sample(DESCRIPTION_WORDS, 3)).capitalize(),
+            available=rng.random() > 0.05,
+        ))
+    Room.objects.bulk_create(room_objects, batch_size=batch_size)
+    room_rows = list(Room.objects.filter(number__startswith="G").values_list("id", "price_per_night"))
+
+    Customer.objects.bulk_create([
+        Customer(first_name=f"Guest{i}", last_name="Bench", email=f"guest{i}@bench.example")
+        for i in range(customers)
+    ], batch_size=batch_size)
+    customer_ids = list(Customer.objects.filter(email__endswith="@bench.example").values_list("id", flat=True))
+
+    # Back-to-back stays per room, half of them already in the past
+    per_room = -(-bookings // len(room_rows))
+    statuses = ["confirmed", "pending", "cancelled", "failed"]
+    weights = [70, 10, 15, 5]
+    now = timezone.now()
+
+    def rows():
+        created = 0
+        for room_id, price in room_rows:
+            day = date.today() - timedelta(days=per_room * 2)
+            for _ in range(per_room):
+                if created == bookings:
+                    return
+                day += timedelta(days=rng.randint(0, 3))
+                nights = rng.randint(1, 4)
+                status = rng.choices(statuses, weights)[0]
+                created += 1
+                yield Booking(
+                    room_id=room_id,
+                    customer_id=rng.choice(customer_ids),
+                    check_in=day,
+                    check_out=day + timedelta(days=nights),
+                    total_amount=price * nights,
+                    status=status,
+                    created_at=now - timedelta(minutes=bookings - created),
+                    razorpay_order_id=f"order_bench_{created}",
+                    # Generated holds have all lapsed
+                    hold_expires_at=now - timedelta(hours=1) if status == "pending" else None,
+                )
+                day += timedelta(days=nights)
+
+    batch = []
+    for booking in rows():
+        batch.append(booking)
+        if len(batch) == batch_size:
+            Booking.objects.bulk_create(batch)
+            batch = []
+    Booking.objects.bulk_create(batch)
+
+    search.rebuild_index()
+    if summary.max_age():
+        summary.refresh_summary()
+    span = Booking.objects.aggregate(first=Min("check_in"), last=Max("check_out"))
+    if span["first"]:
+        rollups.rebuild(span["first"], span["last"] + timedelta(days=1))
+    return {"rooms": len(room_rows), "customers": len(customer_ids), "bookings": Booking.objects.count()}
+
+
+# -----------------------------------------------------------
+# Measuring
+# -----------------------------------------------------------
+# Transaction control differs between a request (BEGIN) and a TestCase
+# (SAVEPOINT/RELEASE around every atomic block); only count the real work
+TRANSACTION_STATEMENTS = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK")
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(fn):
+    """(seconds, queries) for one call on this thread's connection."""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start, counter.count
+
+
+def summarize(samples, elapsed, errors=None):
+    latencies = sorted(seconds for seconds, _ in samples)
+    queries = [count for _, count in samples]
+
+    def percentile(q):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 3)
+
+    result = {
+        "throughput": round(len(samples) / elapsed, 1),
+        "p50_ms": percentile(0.5),
+        "p90_ms": percentile(0.9),
+        "p99_ms": percentile(0.99),
+        "queries_mean": round(sum(queries) / len(queries), 2),
+        # Cold-cache requests set the max, which makes it stable across runs
+        "queries_max": max(queries),
+    }
+    if errors is not None:
+        result["errors"] = errors
+    return result
+
+
+# -----------------------------------------------------------
+# Micro-benchmarks: the query helpers behind the views
+# -----------------------------------------------------------
+def micro_benchmarks(iterations, seed=42):
+    rng = random.Random(seed)
+    rooms = list(Room.objects.filter(available=True))
+    today = date.today()
+
+    def stay():
+        check_in = today + timedelta(days=rng.randint(0, 60))
+        return check_in, check_in + timedelta(days=rng.randint(1, 7))
+
+    cases = [
+        # (name, share of the iterations, callable)
+        ("availability.rebuild", 0.05, availability.rebuild),
+        ("availability.free_rooms", 1, lambda: list(availability.free_rooms(Room.objects.filter(available=True), *stay()))),
+        ("availability.is_room_free", 1, lambda: availability.is_room_free(rng.choice(rooms), *stay())),
+        ("search.search_rooms", 1, lambda: search.search_rooms(
+            Room.objects.filter(available=True), search.parse_query(rng.choice(["suite", "sea view", "balcony under 4000"])),
+        )),
+        ("pricing.quote", 1, lambda: pricing.quote(rng.choice(rooms), *stay())),
+        ("pricing.quote_many", 0.2, lambda: pricing.quote_many(rooms, *stay())),
+        ("reservations.blocking_bookings", 1, lambda: reservations.blocking_bookings(rng.choice(rooms).pk, *stay()).exists()),
+        ("billing.get_totals", 0.1, summary.get_totals),
+        ("billing.dashboard_page", 1, lambda: list(Booking.objects.select_related("customer").order_by("-id")[:51])),
+    ]
+
+    results = {}
+    for name, share, fn in cases:
+        fn()  # warm up (index build, caches, statement compilation)
+        count = max(3, int(iterations * share))
+        start = time.perf_counter()
+        samples = [measure(fn) for _ in range(count)]
+        results[name] = summarize(samples, time.perf_counter() - start)
+    return results
+
+
+# -----------------------------------------------------------
+# Load driver
+#
+# In-process: every client thread drives the full middleware stack
+# through its own test Client, so no server or network is involved.
+# book_room needs the fake gateway (RAZORPAY_BASE_URL) to be running.
+# -----------------------------------------------------------
+def endpoints():
+    rooms = list(Room.objects.filter(available=True).values_list("pk", flat=True))
+    queries = ["suite", "sea view", "double balcony", "king bed under 5000", "quiet garden"]
+    today = date.today()
+
+    def stay(rng):
+        # Past the generated stays (~400 nights ahead at every scale), inside the rate calendar
+        check_in = today + timedelta(days=rng.randint(450, 718))
+        return check_in.isoformat(), (check_in + timedelta(days=2)).isoformat()
+
+    def book(client, rng):
+        check_in, check_out = stay(rng)
+        return client.post(reverse("book:book_room", args=[rng.choice(rooms)]), {
+            "first_name": "Load",
+            "email": f"load{rng.randint(0, 99)}@bench.example",
+            "check_in": check_in,
+            "check_out": check_out,
+        })
+
+    return {
+        "home": lambda client, rng: client.get(reverse("book:home")),
+        "room_list": lambda client, rng: client.get(reverse("book:room_list")),
+        "search": lambda client, rng: client.get(reverse("book:search"), {"q": rng.choice(queries)}),
+        "room_detail": lambda client, rng: client.get(reverse("book:room_detail", args=[rng.choice(rooms)])),
+        "book_room": book,
+        "billing_dashboard": lambda client, rng: client.get(reverse("billing:dashboard")),
+    }
+
+
+# Staff-only pages; their clients log in once, outside the timed request
+STAFF_ENDPOINTS = {"billing_dashboard"}
+
+
+def load_test(requests, concurrency, seed=42):
+    results = {}
+    staff, _ = User.objects.get_or_create(username="bench-staff", defaults={"is_staff": True})
+    for name, request in endpoints().items():
+        # Each endpoint starts cold, so runs compare like with like
+        cache.clear()
+        local = threading.local()
+        samples, errors = [], []
+        lock = threading.Lock()
+
+        def one(i, name=name, request=request):
+            if not hasattr(local, "client"):
+                local.client = Client()
+                if name in STAFF_ENDPOINTS:
+                    local.client.force_login(staff)
+            rng = random.Random(f"{seed}:{name}:{i}")
+            response = None
+
+            def call():
+                nonlocal response
+                response = request(local.client, rng)
+
+            try:
+                sample = measure(call)
+            except Exception:
+                with lock:
+                    errors.append(i)
+                return
+            with lock:
+                samples.append(sample)
+                if response.status_code >= 400:
+                    errors.append(i)
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            for i in range(requests):
+                one(i)
+        else:
+            def worker(i):
+                try:
+                    one(i)
+                finally:
+                    connections.close_all()
+
+            with ThreadPoolExecutor(concurrency) as pool:
+                list(pool.map(worker, range(requests)))
+        results[name] = summarize(samples, time.perf_counter() - start, len(errors))
+    return results
+
+
+# -----------------------------------------------------------
+# Baselines
+#
+# A result regresses when it is slower (or has less throughput) than the
+# baseline by more than `tolerance`, makes more queries, or errors more.
+# Query counts are exact; timings only mean something on the machine
+# that recorded the baseline.
+# -----------------------------------------------------------
+TIMING_METRICS = {"throughput": -1, "p50_ms": 1, "p99_ms": 1}
+COUNT_METRICS = ("queries_max", "errors")
+
+
+def compare(results, baseline, tolerance=0.5, timings=True):
+    regressions = []
+    for section, entries in baseline.items():
+        if section not in ("micro", "load"):
+            continue
+        for name, expected in entries.items():
+            actual = results.get(section, {}).get(name)
+            if actual is None:
+                continue
+            for metric in COUNT_METRICS:
+                if metric in expected and actual.get(metric, 0) > expected[metric]:
+                    regressions.append(f"{section}.{name}.{metric}: {actual[metric]} > baseline {expected[metric]}")
+            if not timings:
+                continue
+            for metric, direction in TIMING_METRICS.items():
+                if metric not in expected or not expected[metric]:
+                    continue
+                change = (actual[metric] - expected[metric]) / expected[metric] * direction
+                if change > tolerance:
+                    regressions.append(
+                        f"{section}.{name}.{metric}: {actual[metric]} vs baseline {expected[metric]} ({change:+.0%})"
+                    )
+    return regressions
+
+
+def load_baseline(path, scale):
+    try:
+        with open(path) as fileobj:
+            return json.load(fileobj).get(scale)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, scale, results):
+    try:
+        with open(path) as fileobj:
+            baselines = json.load(fileobj)
+    except FileNotFoundError:
+        baselines = {}
+    baselines[scale] = results
+    with open(path, "w") as fileobj:
+        json.dump(baselines, fileobj, indent=2, sort_keys=True)
+        fileobj.write("\n")
@@ -0,0 +1,85 @@
+import hashlib
+
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from Majestic_Manor.cache import acached, cached_many, on_invalidate
+from .models import ChangeStamp, HomePage
+
+# Cache groups invalidated from book.signals
+HOMEPAGE = "homepage"
+ROOMS = "rooms"
+BOOKINGS = "bookings"
+RATES = "rates"
+IMAGES = "images"
+# Moved by book.archive
+ARCHIVE = "archive"
+
+
+def room_group(pk):
+    return f"room:{pk}"
+
+
+# -----------------------------------------------------------
+# Change Stamps
+#
+# The API builds its ETags from these groups (api.views), so their
+# versions are also kept in the database: cache versions are per process
+# with locmem and start over whenever the cache is emptied. Bumped with
+# the cache versions, i.e. after the writing transaction commits.
+# -----------------------------------------------------------
+STAMPED = (ROOMS, BOOKINGS, RATES)
+
+
+def is_stamped(group):
+    return group in STAMPED or group.startswith("room:")
+
+
+@on_invalidate
+def stamp(groups):
+    groups = [group for group in groups if is_stamped(group)]
+    if not groups:
+        return
+    now = timezone.now()
+    ChangeStamp.objects.bulk_create([ChangeStamp(group=group, changed_at=now) for group in groups], ignore_conflicts=True)
+    ChangeStamp.objects.filter(group__in=groups).update(version=F("version") + 1, changed_at=now)
+
+
+def stamps(groups):
+    """([version, ...], last change timestamp) of the groups in one query; 0 for groups never changed."""
+    found = {
+        group: (version, changed_at)
+        for group, version, changed_at in ChangeStamp.objects.filter(group__in=groups).values_list("group", "version", "changed_at")
+    }
+    versions = [found[group][0] if group in found else 0 for group in groups]
+    changed = [found[group][1].timestamp() for group in groups if group in found]
+    return versions, max(changed, default=0)
+
+
+async def aget_homepage():
+    return await acached("homepage", [HOMEPAGE], HomePage.objects.afirst)
+
+
+def _card_key(room):
+    # Keyed by the fields the card shows, so an edited room never hits a stale card
+    fingerprint = f"{room.number}|{room.room_type}|{room.price_per_night}|{room.main_image.name if room.main_image else ''}"
+    quote = getattr(room, "quote", None)
+    if quote:
+        fingerprint += f"|{quote.nights}|{quote.total}"
+    return f"{room.pk}:{hashlib.md5(fingerprint.encode()).hexdigest()}"
+
+
+def room_cards(rooms):
+    from .images import assets_for  # images imports this module
+
+    assets = None
+
+    def render(room):
+        # First miss loads the image assets of the whole page at once
+        nonlocal assets
+        if assets is None:
+            assets = assets_for(rooms)
+        return render_to_string("book/room_card.html", {"room": room, "assets": assets})
+
+    return cached_many("room_card", [IMAGES], rooms, key_of=_card_key, render=render)
@@ -0,0 +1,111 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# -----------------------------------------------------------
+# Fake Razorpay API for tests and load benchmarks
+#
+# Implements POST /v1/orders and GET /v1/orders/<id> with optional
+# latency and error injection. Point RAZORPAY_BASE_URL at it.
+# -----------------------------------------------------------
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse sockets
+    # Write headers and body in one segment; avoids Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject(self):
+        server = self.server
+        server.stats["requests"] += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._reply(500, {"error": {"code": "SERVER_ERROR", "description": "Injected failure"}})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if self._inject():
+            return
+        if self.path.rstrip("/") != "/v1/orders":
+            self._reply(404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "Not found"}})
+            return
+        if not data.get("amount"):
+            self._reply(400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "amount is required"}})
+            return
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": data["amount"],
+            "currency": data.get("currency", "INR"),
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+        self.server.orders[order["id"]] = order
+        self._reply(200, order)
+
+    def do_GET(self):
+        if self._inject():
+            return
+        order_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        order = self.server.orders.get(order_id)
+        if order is None:
+            self._reply(400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The id provided does not exist"}})
+            return
+        self._reply(200, order)
+
+
+class FakeGatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeGateway:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0):
+        self.server = FakeGatewayServer((host, port), FakeGatewayHandler)
+        self.server.latency = latency
+        self.server.error_rate = error_rate
+        self.server.orders = {}
+        self.server.stats = {"requests": 0}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return self.server.stats
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
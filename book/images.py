@@ -0,0 +1,170 @@
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageOps, features
+
+from Majestic_Manor.cache import invalidate_on_commit, make_key, record as record_hit
+from Majestic_Manor.replicas import primary
+from .caching import IMAGES
+from .models import HomePage, ImageAsset, Room
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+# Models whose image fields get derivatives
+IMAGE_MODELS = (Room, HomePage)
+
+
+def derivative_formats():
+    # AVIF needs a Pillow build with libavif; fall back to WebP only
+    return [fmt for fmt in settings.IMAGE_DERIVATIVE_FORMATS if features.check(fmt)]
+
+
+def image_files(instance):
+    """Stored files (FieldFile) of an instance's image fields; Cloudinary values are skipped."""
+    files = []
+    for field in instance._meta.concrete_fields:
+        value = getattr(instance, field.attname, None)
+        if isinstance(value, FieldFile) and value.name:
+            files.append(value)
+    return files
+
+
+def stored_image_names():
+    names = set()
+    for model in IMAGE_MODELS:
+        for instance in model.objects.all():
+            names.update(file.name for file in image_files(instance))
+    return sorted(names)
+
+
+# -----------------------------------------------------------
+# Hashing and Derivatives
+#
+# Runs without the database so the backfill can fan out to worker
+# processes; recording the result is left to the caller.
+# -----------------------------------------------------------
+def content_hash(fileobj):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(1 << 16), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def hash_stored(name):
+    with default_storage.open(name, "rb") as fileobj:
+        return content_hash(fileobj)
+
+
+def derivative_name(digest, width, fmt):
+    return f"derivatives/{digest[:2]}/{digest}/{width}.{fmt}"
+
+
+def build_derivatives(name):
+    """Write every width/format of a stored image; returns the ImageAsset fields."""
+    with default_storage.open(name, "rb") as fileobj:
+        digest = content_hash(fileobj)
+        image = ImageOps.exif_transpose(Image.open(fileobj))
+        image.load()
+    original_size = default_storage.size(name)
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    # Never upscale: the largest derivative is capped at the original width
+    largest = min(image.width, max(settings.IMAGE_DERIVATIVE_WIDTHS))
+    widths = sorted({w for w in settings.IMAGE_DERIVATIVE_WIDTHS if w < largest} | {largest})
+    variants = []
+    for width in widths:
+        resized = image if width == image.width else image.resize(
+            (width, max(1, round(image.height * width / image.width))), Image.LANCZOS,
+        )
+        for fmt in derivative_formats():
+            target = derivative_name(digest, width, fmt)
+            # Content-addressed: an existing file already holds these bytes
+            if not default_storage.exists(target):
+                buffer = BytesIO()
+                resized.save(buffer, format=fmt.upper(), quality=settings.IMAGE_DERIVATIVE_QUALITY)
+                if width == image.width and buffer.tell() >= original_size:
+                    # Re-encoding an already small original at full size gains nothing
+                    continue
+                default_storage.save(target, ContentFile(buffer.getvalue()))
+            variants.append({"format": fmt, "width": width, "name": target})
+
+    return {"content_hash": digest, "width": image.width, "height": image.height, "variants": variants}
+
+
+# -----------------------------------------------------------
+# Recording
+# -----------------------------------------------------------
+def record(name, fields):
+    asset, _ = ImageAsset.objects.update_or_create(name=name, defaults=fields)
+    invalidate_on_commit(IMAGES)
+    return asset
+
+
+def process_image(name, force=False):
+    """Create (or reuse by content hash) the derivatives for one stored image."""
+    if not force and ImageAsset.objects.filter(name=name).exists():
+        return None
+    digest = hash_stored(name)
+    twin = ImageAsset.objects.filter(content_hash=digest).exclude(name=name).first()
+    if twin and not force:
+        fields = {"content_hash": digest, "width": twin.width, "height": twin.height, "variants": twin.variants}
+    else:
+        fields = build_derivatives(name)
+    return record(name, fields)
+
+
+def dedupe_uploads(instance):
+    """Point freshly uploaded files at an identical stored original instead of saving a copy."""
+    for field in instance._meta.concrete_fields:
+        value = getattr(instance, field.attname, None)
+        if not isinstance(value, FieldFile) or not value.name or value._committed:
+            continue
+        digest = content_hash(value.file)
+        existing = ImageAsset.objects.filter(content_hash=digest).order_by("id").first()
+        if existing and default_storage.exists(existing.name):
+            setattr(instance, field.attname, existing.name)
+
+
+# -----------------------------------------------------------
+# Lookup (template tag)
+# -----------------------------------------------------------
+def get_assets(names):
+    """{name: ImageAsset or None} for many stored names: one get_many, one query for the misses."""
+    keys = {make_key("obj", [IMAGES], f"image:{hashlib.md5(name.encode()).hexdigest()}"): name for name in set(names)}
+    found = cache.get_many(list(keys))
+    record_hit("object", True, len(found))
+    record_hit("object", False, len(keys) - len(found))
+
+    missing = {key: name for key, name in keys.items() if key not in found}
+    if missing:
+        with primary():
+            loaded = {asset.name: asset for asset in ImageAsset.objects.filter(name__in=missing.values())}
+        # Names without an asset are cached as None too
+        fresh = {key: loaded.get(name) for key, name in missing.items()}
+        cache.set_many(fresh)
+        found.update(fresh)
+    return {name: found[key] for key, name in keys.items()}
+
+
+def get_asset(name):
+    return get_assets([name])[name]
+
+
+def assets_for(instances):
+    """Assets of every stored image on a page of Room/HomePage instances, for {% responsive_image ... assets=assets %}."""
+    return get_assets(file.name for instance in instances for file in image_files(instance))
+
+
+def srcsets(asset):
+    """{format: "url 320w, url 640w"} in the order browsers should try them."""
+    by_format = {}
+    for variant in asset.variants:
+        by_format.setdefault(variant["format"], []).append(
+            f"{default_storage.url(variant['name'])} {variant['width']}w"
+        )
+    return {fmt: ", ".join(by_format[fmt]) for fmt in settings.IMAGE_DERIVATIVE_FORMATS if fmt in by_format}
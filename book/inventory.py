@@ -0,0 +1,224 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from Majestic_Manor.cache import invalidate
+from . import images, search, tasks
+from .caching import ROOMS, room_group
+from .models import Room
+
+# Column order of exports; imports need the first three, the rest are optional
+FIELDS = ["number", "room_type", "price_per_night", "description", "available", "main_image"]
+REQUIRED = FIELDS[:3]
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+TRUE = {"true", "t", "1", "yes", "y"}
+FALSE = {"false", "f", "0", "no", "n"}
+
+
+def detect_format(filename, default="csv"):
+    if filename.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename.endswith(".csv"):
+        return "csv"
+    return default
+
+
+# -----------------------------------------------------------
+# Export
+#
+# values_list().iterator() fetches in chunks without caching the queryset,
+# so memory stays flat whatever the size of the inventory.
+# -----------------------------------------------------------
+class _Echo:
+    # csv.writer target that hands back the formatted row instead of storing it
+    def write(self, value):
+        return value
+
+
+def _export_record(row):
+    record = dict(zip(FIELDS, row))
+    record["price_per_night"] = str(record["price_per_night"])
+    record["main_image"] = record["main_image"] or ""
+    return record
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def export_rows(queryset, fmt="csv", chunk_size=2000):
+    """Yield the rooms of `queryset` as CSV or JSONL text, one chunk of rows at a time."""
+    rows = queryset.order_by("number").values_list(*FIELDS).iterator(chunk_size=chunk_size)
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(FIELDS)
+    while True:
+        chunk = [_export_record(row) for row in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        if fmt == "csv":
+            yield "".join(writer.writerow([_csv_value(value) for value in record.values()]) for record in chunk)
+        else:
+            yield "".join(json.dumps(record) + "\n" for record in chunk)
+
+
+# -----------------------------------------------------------
+# Import
+#
+# Rows are read lazily, validated field by field (no per-row queries) and
+# upserted per chunk with one INSERT ... ON CONFLICT (number) DO UPDATE.
+# bulk_create sends no post_save, so the chunk then does what
+# book.signals.room_saved would: search index, image derivatives and
+# cache groups.
+# -----------------------------------------------------------
+def read_rows(fileobj, fmt):
+    """Yield (line, raw dict or None, error) from a text file object."""
+    if fmt == "csv":
+        reader = csv.DictReader(fileobj)
+        missing = [name for name in REQUIRED if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(missing)}")
+        unknown = [name for name in reader.fieldnames if name not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown CSV columns: {', '.join(unknown)}")
+        for raw in reader:
+            yield reader.line_num, raw, None
+        return
+
+    for line, text in enumerate(fileobj, 1):
+        if not text.strip():
+            continue
+        try:
+            raw = json.loads(text)
+        except ValueError as exc:
+            yield line, None, f"invalid JSON: {exc}"
+            continue
+        if not isinstance(raw, dict):
+            yield line, None, "expected a JSON object"
+            continue
+        yield line, raw, None
+
+
+def _clean_available(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in TRUE:
+        return True
+    if str(value).strip().lower() in FALSE:
+        return False
+    raise ValidationError(f"“{value}” is not true or false.")
+
+
+def clean_row(raw):
+    """(Room, None) for a valid row, (None, message) otherwise. Empty optional values mean the default."""
+    unknown = [name for name in raw if name not in FIELDS]
+    if unknown:
+        return None, f"unknown fields: {', '.join(unknown)}"
+    values, errors = {}, []
+    for name in FIELDS:
+        value = raw.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, "") and name not in REQUIRED:
+            continue
+        field = Room._meta.get_field(name)
+        try:
+            if name == "available":
+                values[name] = _clean_available(value)
+            elif name == "main_image":
+                # A reference to an already stored file (or Cloudinary public id)
+                if len(str(value)) > field.max_length:
+                    raise ValidationError(f"longer than {field.max_length} characters.")
+                values[name] = str(value)
+            else:
+                values[name] = field.clean(value, None)
+        except ValidationError as exc:
+            errors.append(f"{name}: {' '.join(exc.messages)}")
+    if errors:
+        return None, "; ".join(errors)
+    return Room(**values), None
+
+
+def updated_fields(raw):
+    # Columns the file leaves out keep their current value on existing rooms
+    return tuple(name for name in FIELDS[1:] if name in raw)
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []  # [(line, message)]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __str__(self):
+        return f"{self.created} created, {self.updated} updated, {len(self.errors)} rejected"
+
+
+def import_rooms(fileobj, fmt="csv", chunk_size=500, dry_run=False):
+    """Upsert rooms by number from CSV/JSONL; invalid rows are reported and skipped."""
+    report = ImportReport()
+    seen = {}  # number -> line, so a room appears once per file
+    chunk = []
+    for line, raw, error in read_rows(fileobj, fmt):
+        room = None
+        if error is None:
+            room, error = clean_row(raw)
+        if room is not None and room.number in seen:
+            room, error = None, f"room {room.number} already appears on line {seen[room.number]}"
+        if error:
+            report.errors.append((line, error))
+            continue
+        seen[room.number] = line
+        chunk.append((line, room, updated_fields(raw)))
+        if len(chunk) == chunk_size:
+            _write_chunk(chunk, report, dry_run)
+            chunk = []
+    if chunk:
+        _write_chunk(chunk, report, dry_run)
+    return report
+
+
+def _write_chunk(chunk, report, dry_run):
+    rooms = [room for _, room, _ in chunk]
+    numbers = [room.number for room in rooms]
+    existing = set(Room.objects.filter(number__in=numbers).values_list("number", flat=True))
+    if dry_run:
+        report.updated += len(existing)
+        report.created += len(rooms) - len(existing)
+        return
+    try:
+        with transaction.atomic():
+            # One upsert per column set; a CSV file is always a single one
+            by_fields = {}
+            for _, room, fields in chunk:
+                by_fields.setdefault(fields, []).append(room)
+            for fields, group in by_fields.items():
+                Room.objects.bulk_create(
+                    group,
+                    update_conflicts=True,
+                    unique_fields=["number"],
+                    update_fields=fields,
+                )
+            # Conflicting rows do not always get their pk back; read them again
+            saved = list(Room.objects.filter(number__in=numbers).only("id", "number", "room_type", "description"))
+            search.index_rooms(saved)
+            # Rows that set main_image; the task skips names it has already processed
+            names = [file.name for _, room, fields in chunk if "main_image" in fields for file in images.image_files(room)]
+            for name in dict.fromkeys(names):
+                tasks.process_images.delay(name)
+    except DatabaseError as exc:
+        report.errors.extend((line, f"not saved: {exc}") for line, _, _ in chunk)
+        return
+    report.updated += len(existing)
+    report.created += len(rooms) - len(existing)
+    invalidate(ROOMS, *(room_group(room.pk) for room in saved))
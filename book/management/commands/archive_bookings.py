@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from book.archive import archive_bookings
+
+
+class Command(BaseCommand):
+    help = "Move finished stays that checked out long ago from Booking to the archive, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.BOOKING_ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            moved = archive_bookings(
+                older_than_days=options["older_than_days"],
+                batch_size=options["batch_size"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} bookings"))
@@ -0,0 +1,86 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from Majestic_Manor.cache import invalidate
+from book import images
+from book.caching import HOMEPAGE, IMAGES, ROOMS
+from book.models import ImageAsset
+
+
+class Command(BaseCommand):
+    help = "Generate responsive derivatives for existing Room/HomePage images in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--force", action="store_true", help="Rebuild images that already have derivatives")
+        parser.add_argument("--dedupe", action="store_true",
+                            help="Point model fields at one stored original per content hash")
+
+    def handle(self, *args, **options):
+        names = images.stored_image_names()
+        if not options["force"]:
+            done = set(ImageAsset.objects.filter(name__in=names).values_list("name", flat=True))
+            names = [name for name in names if name not in done]
+
+        if names:
+            # Workers only touch storage; never hand them this process's DB connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+                by_hash = defaultdict(list)
+                for name, digest in zip(names, pool.map(images.hash_stored, names)):
+                    by_hash[digest].append(name)
+
+                # Each distinct content is encoded once, reusing earlier runs where possible
+                known = {} if options["force"] else {
+                    asset.content_hash: asset
+                    for asset in ImageAsset.objects.filter(content_hash__in=by_hash)
+                }
+                todo = [group[0] for digest, group in by_hash.items() if digest not in known]
+                built = dict(zip(todo, pool.map(images.build_derivatives, todo)))
+
+            for digest, group in by_hash.items():
+                if digest in known:
+                    asset = known[digest]
+                    fields = {"content_hash": digest, "width": asset.width,
+                              "height": asset.height, "variants": asset.variants}
+                else:
+                    fields = built[group[0]]
+                for name in group:
+                    ImageAsset.objects.update_or_create(name=name, defaults=fields)
+            invalidate(IMAGES)
+            self.stdout.write(
+                f"Processed {len(names)} images ({len(by_hash)} distinct, {len(todo)} encoded)"
+            )
+        else:
+            self.stdout.write("No new images")
+
+        if options["dedupe"]:
+            self.stdout.write(f"Repointed {self.dedupe()} image fields to their canonical file")
+
+    def dedupe(self):
+        # Oldest asset per hash is the canonical original
+        canonical = {}
+        for asset in ImageAsset.objects.order_by("id"):
+            canonical.setdefault(asset.content_hash, asset.name)
+        by_name = dict(ImageAsset.objects.values_list("name", "content_hash"))
+
+        changed = 0
+        for model in images.IMAGE_MODELS:
+            for instance in model.objects.all():
+                updates = {}
+                for file in images.image_files(instance):
+                    target = canonical.get(by_name.get(file.name))
+                    if target and target != file.name:
+                        updates[file.field.attname] = target
+                if updates:
+                    # update() keeps the save signals from re-processing every image
+                    model.objects.filter(pk=instance.pk).update(**updates)
+                    changed += len(updates)
+        if changed:
+            invalidate(ROOMS, HOMEPAGE, IMAGES)
+        return changed
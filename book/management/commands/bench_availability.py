@@ -0,0 +1,67 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from book.availability import AvailabilityIndex
+
+
+class Command(BaseCommand):
+    help = "Benchmark availability lookups against a synthetic in-memory index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=10_000)
+        parser.add_argument("--bookings", type=int, default=1_000_000)
+        parser.add_argument("--lookups", type=int, default=2_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        rooms = options["rooms"]
+        per_room = max(1, options["bookings"] // rooms)
+        start = date.today()
+
+        # Back-to-back stays of 1-4 nights with 0-2 night gaps per room
+        def rows():
+            booking_id = 0
+            for room_id in range(1, rooms + 1):
+                day = start
+                for _ in range(per_room):
+                    day += timedelta(days=rng.randint(0, 2))
+                    nights = rng.randint(1, 4)
+                    booking_id += 1
+                    yield booking_id, room_id, day, day + timedelta(days=nights)
+                    day += timedelta(days=nights)
+
+        index = AvailabilityIndex()
+        t0 = time.perf_counter()
+        index.load(rows())
+        build = time.perf_counter() - t0
+        self.stdout.write(f"built index: {rooms} rooms, {rooms * per_room} bookings in {build:.2f}s")
+
+        horizon = per_room * 4
+        stays = []
+        for _ in range(options["lookups"]):
+            check_in = start + timedelta(days=rng.randint(0, horizon))
+            stays.append((check_in, check_in + timedelta(days=rng.randint(1, 7))))
+
+        self._report("busy_room_ids", [
+            self._time(index.busy_room_ids, check_in, check_out)
+            for check_in, check_out in stays
+        ])
+        self._report("is_free", [
+            self._time(index.is_free, rng.randint(1, rooms), check_in, check_out)
+            for check_in, check_out in stays
+        ])
+
+    def _time(self, fn, *args):
+        t0 = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - t0
+
+    def _report(self, name, samples):
+        samples.sort()
+        p50 = samples[len(samples) // 2] * 1000
+        p99 = samples[int(len(samples) * 0.99)] * 1000
+        self.stdout.write(f"{name}: p50={p50:.3f}ms p99={p99:.3f}ms")
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections, transaction
+
+from book.models import Booking, Customer, Room
+
+
+class Command(BaseCommand):
+    help = (
+        "pgbench-style comparison of the database configuration: per-request "
+        "connections and default SQLite journaling vs the tuned settings. "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10, help="seconds per profile")
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--select-only", action="store_true", help="availability reads only")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        db = connections.settings["default"]
+        tuned = {
+            "CONN_MAX_AGE": db["CONN_MAX_AGE"],
+            "CONN_HEALTH_CHECKS": db["CONN_HEALTH_CHECKS"],
+            "OPTIONS": dict(db["OPTIONS"]),
+        }
+        if connection.vendor == "sqlite":
+            profiles = [
+                ("default", {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {
+                    # The previous settings; explicit, since WAL mode sticks to the database file
+                    "init_command": "PRAGMA journal_mode=DELETE; PRAGMA synchronous=FULL;",
+                }}),
+                ("tuned", tuned),
+            ]
+        else:
+            profiles = [
+                ("connection per request", {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {}}),
+                ("persistent", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True, "OPTIONS": {}}),
+            ]
+            if "pool" in tuned["OPTIONS"]:
+                profiles.append(("pooled", tuned))
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self._seed(options)
+            for name, profile in profiles:
+                connection.close()
+                db.update(profile)
+                self._run(name, options)
+                connections.close_all()
+                if "pool" in profile["OPTIONS"]:
+                    connection.close_pool()
+        finally:
+            connections.close_all()
+            db.update(tuned)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _seed(self, options):
+        # bulk_create: no signals, so search/cache/rollup handlers stay out of the numbers
+        Room.objects.bulk_create([
+            Room(number=f"B{i}", room_type=("single", "double", "suite")[i % 3], price_per_night="2000.00")
+            for i in range(options["rooms"])
+        ])
+        Customer.objects.create(first_name="Bench", email="bench@example.com")
+
+    def _run(self, name, options):
+        room_ids = list(Room.objects.values_list("id", flat=True))
+        customer = Customer.objects.get()
+        deadline = time.perf_counter() + options["duration"]
+        samples, errors = [], []
+        lock = threading.Lock()
+
+        def read(rng):
+            check_in = date.today() + timedelta(days=rng.randint(0, 60))
+            Booking.objects.filter(
+                room_id=rng.choice(room_ids),
+                status="confirmed",
+                check_in__lt=check_in + timedelta(days=3),
+                check_out__gt=check_in,
+            ).exists()
+
+        def write(rng):
+            read(rng)
+            check_in = date.today() + timedelta(days=rng.randint(0, 60))
+            booking, = Booking.objects.bulk_create([Booking(
+                room_id=rng.choice(room_ids),
+                customer=customer,
+                check_in=check_in,
+                check_out=check_in + timedelta(days=2),
+                total_amount="4000.00",
+            )])
+            Booking.objects.filter(pk=booking.pk).update(status="cancelled")
+
+        work = read if options["select_only"] else write
+
+        def client(seed):
+            rng = random.Random(seed)
+            mine, failed = [], 0
+            while time.perf_counter() < deadline:
+                # One "request": what request_started / request_finished do
+                close_old_connections()
+                t0 = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        work(rng)
+                except OperationalError:
+                    failed += 1
+                else:
+                    mine.append(time.perf_counter() - t0)
+                finally:
+                    close_old_connections()
+            connection.close()
+            with lock:
+                samples.extend(mine)
+                errors.append(failed)
+
+        threads = [
+            threading.Thread(target=client, args=(options["seed"] + i,))
+            for i in range(options["clients"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        samples.sort()
+        if not samples:
+            self.stdout.write(f"{name}: no transaction completed, {sum(errors)} errors")
+            return
+        avg = sum(samples) / len(samples) * 1000
+        p95 = samples[int(len(samples) * 0.95)] * 1000
+        self.stdout.write(
+            f"{name}: {len(samples) / options['duration']:.0f} tps, "
+            f"avg={avg:.2f}ms p95={p95:.2f}ms, errors={sum(errors)}"
+        )
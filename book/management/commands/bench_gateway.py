@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import razorpay
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from book import payments
+from book.fake_gateway import FakeGateway
+
+
+class Command(BaseCommand):
+    help = "Load-test order creation against the fake gateway: pooled client vs a client per call."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--latency-ms", type=float, default=5)
+
+    def handle(self, *args, **options):
+        with FakeGateway(latency=options["latency_ms"] / 1000) as gateway:
+            with override_settings(RAZORPAY_BASE_URL=gateway.url):
+                payments.reset()
+
+                def per_call():
+                    # What book_room used to do: a fresh client and session per order
+                    client = razorpay.Client(
+                        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                        base_url=gateway.url,
+                    )
+                    return client.order.create({"amount": 100000, "currency": "INR", "payment_capture": 1})
+
+                def pooled():
+                    return payments.create_order(100000)
+
+                self._run("client per call", per_call, options)
+                self._run("pooled client", pooled, options)
+            payments.reset()
+
+    def _run(self, name, fn, options):
+        def timed(_):
+            t0 = time.perf_counter()
+            fn()
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            samples = sorted(pool.map(timed, range(options["requests"])))
+        elapsed = time.perf_counter() - t0
+
+        p50 = samples[len(samples) // 2] * 1000
+        p99 = samples[int(len(samples) * 0.99)] * 1000
+        self.stdout.write(
+            f"{name}: {len(samples) / elapsed:.0f} req/s, p50={p50:.1f}ms p99={p99:.1f}ms"
+        )
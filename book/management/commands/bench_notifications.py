@@ -0,0 +1,77 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from book import notifications
+from book.models import Booking, Customer, Room
+from book.smtp_sink import SmtpSink
+
+
+class Command(BaseCommand):
+    help = "Benchmark confirmation emails against a local SMTP sink: one connection per email vs batched (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--emails", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=settings.NOTIFY_BATCH_SIZE)
+        # A hosted relay: TCP + STARTTLS + AUTH before the first message
+        parser.add_argument("--connect-latency-ms", type=float, default=30)
+        parser.add_argument("--message-latency-ms", type=float, default=1)
+
+    def handle(self, *args, **options):
+        count, size = options["emails"], options["batch_size"]
+        with transaction.atomic():
+            bookings = self._seed(count)
+            calls = [["confirmation", booking.pk, booking.check_in.isoformat()] for booking in bookings]
+
+            with SmtpSink(
+                connect_latency=options["connect_latency_ms"] / 1000,
+                message_latency=options["message_latency_ms"] / 1000,
+            ) as sink, override_settings(DEBUG=False, **sink.settings()):
+                def per_email():
+                    # What sending from the request would do: compile, connect, send, per email
+                    for call in calls:
+                        notifications._templates.clear()
+                        notifications.send([call])
+
+                def batched():
+                    for i in range(0, len(calls), size):
+                        notifications.send(calls[i:i + size])
+
+                self._run("connection per email", per_email, sink, count)
+                self._run(f"batches of {size}", batched, sink, count)
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        rooms = Room.objects.bulk_create([
+            Room(number=f"bench-{i}", room_type="double", price_per_night=Decimal("3500.00")) for i in range(10)
+        ])
+        customers = Customer.objects.bulk_create([
+            Customer(first_name=f"Guest{i}", email=f"bench-{i}@example.com") for i in range(count)
+        ])
+        start = date.today() + timedelta(days=30)
+        return Booking.objects.bulk_create([
+            Booking(
+                room=rooms[i % len(rooms)], customer=customer, status="confirmed",
+                check_in=start + timedelta(days=i // len(rooms)),
+                check_out=start + timedelta(days=i // len(rooms) + 2),
+                total_amount=Decimal("7000.00"),
+            )
+            for i, customer in enumerate(customers)
+        ])
+
+    def _run(self, name, fn, sink, count):
+        before = dict(sink.stats)
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        sent = sink.stats["messages"] - before["messages"]
+        connections = sink.stats["connections"] - before["connections"]
+        self.stdout.write(
+            f"{name}: {sent}/{count} emails in {elapsed:.2f}s, {sent / elapsed:,.0f} emails/s, {connections} connections"
+        )
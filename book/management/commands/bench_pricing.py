@@ -0,0 +1,84 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from book import pricing
+from book.models import Room, Season, StayDiscount, WeekdayRate
+
+
+class Command(BaseCommand):
+    help = "Benchmark stay quotes against a synthetic rate calendar (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quotes", type=int, default=10_000)
+        parser.add_argument("--max-nights", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        start = date.today()
+
+        with transaction.atomic():
+            self._seed_rules(rng, start)
+            t0 = time.perf_counter()
+            nights = pricing.rebuild_calendar()
+            self.stdout.write(f"built calendar: {nights} nights in {time.perf_counter() - t0:.2f}s")
+
+            rooms = [
+                Room(pk=i, number=str(i), room_type=room_type, price_per_night=Decimal(price))
+                for i, (room_type, price) in enumerate(
+                    [("single", "1999.00"), ("double", "3499.50"), ("suite", "8999.99")], start=1
+                )
+            ]
+            stays = []
+            for _ in range(options["quotes"]):
+                check_in = start + timedelta(days=rng.randint(0, 300))
+                stays.append((rng.choice(rooms), check_in, check_in + timedelta(days=rng.randint(1, options["max_nights"]))))
+
+            pricing.quote(*stays[0])  # warm the discount cache
+            samples = []
+            # DEBUG query logging would otherwise cost as much as the quote itself
+            with override_settings(DEBUG=False):
+                t0 = time.perf_counter()
+                for room, check_in, check_out in stays:
+                    t1 = time.perf_counter()
+                    pricing.quote(room, check_in, check_out)
+                    samples.append(time.perf_counter() - t1)
+                elapsed = time.perf_counter() - t0
+
+            transaction.set_rollback(True)
+
+        samples.sort()
+        p50 = samples[len(samples) // 2] * 1000
+        p99 = samples[int(len(samples) * 0.99)] * 1000
+        self.stdout.write(
+            f"quote: {len(stays) / elapsed:,.0f} quotes/s p50={p50:.3f}ms p99={p99:.3f}ms "
+            f"(1-{options['max_nights']} nights)"
+        )
+
+    def _seed_rules(self, rng, start):
+        for room_type, _ in Room.ROOM_TYPES:
+            Season.objects.bulk_create([
+                Season(
+                    room_type=room_type,
+                    name=f"season {i}",
+                    start_date=start + timedelta(days=i * 45),
+                    end_date=start + timedelta(days=i * 45 + rng.randint(10, 60)),
+                    rate_percent=Decimal(rng.randint(80, 160)),
+                )
+                for i in range(16)
+            ])
+            WeekdayRate.objects.bulk_create([
+                WeekdayRate(room_type=room_type, weekday=weekday, rate_percent=Decimal("112.50"))
+                for weekday in (4, 5)
+            ])
+        StayDiscount.objects.bulk_create([
+            StayDiscount(min_nights=7, percent_off=Decimal("5")),
+            StayDiscount(min_nights=14, percent_off=Decimal("10")),
+            StayDiscount(room_type="suite", min_nights=28, percent_off=Decimal("15")),
+        ])
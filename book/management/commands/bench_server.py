@@ -0,0 +1,143 @@
+import os
+import random
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from book.fake_gateway import FakeGateway
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SEED = (
+    "from book.models import Room\n"
+    "for i in range({rooms}):\n"
+    "    Room.objects.create(number=f'L{{i}}', room_type='double', price_per_night='2500.00')\n"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test gunicorn with gunicorn.conf.py in both profiles (gthread WSGI "
+        "and uvicorn ASGI) against a throwaway SQLite database and the fake "
+        "Razorpay gateway; reports p50/p99 for home and book_room."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400, help="bookings per profile")
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=4, help="gthread threads per worker")
+        parser.add_argument("--latency-ms", type=float, default=500, help="gateway latency")
+        parser.add_argument("--rooms", type=int, default=50)
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix="bench_server")
+        try:
+            with FakeGateway(latency=options["latency_ms"] / 1000) as gateway:
+                env = {
+                    **os.environ,
+                    "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}",
+                    "RAZORPAY_BASE_URL": gateway.url,
+                    "RAZORPAY_POOL_SIZE": str(options["concurrency"]),
+                    "WEB_CONCURRENCY": str(options["workers"]),
+                    "GUNICORN_THREADS": str(options["threads"]),
+                    # Locmem caches are per process; keep the runs independent
+                    "CACHE_BACKEND": "locmem",
+                }
+                self._manage(env, "migrate", "--noinput")
+                self._manage(env, "shell", "-c", SEED.format(rooms=options["rooms"]))
+                for name, asgi in (("wsgi (gthread)", "False"), ("asgi (uvicorn)", "True")):
+                    self._run(name, {**env, "ASGI": asgi}, options)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _manage(self, env, *args):
+        subprocess.run(
+            [sys.executable, "manage.py", *args],
+            cwd=settings.BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+    def _run(self, name, env, options):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            ["gunicorn", "--config", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}"],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self._wait_ready(base)
+            samples = {"home": [], "book_room": []}
+            held = []
+            local = threading.local()
+            lock = threading.Lock()
+
+            def book(i):
+                session = getattr(local, "session", None)
+                if session is None:
+                    session = local.session = requests.Session()
+                # Seeded per profile: the holds of the previous run are still live.
+                # Far apart random stays: conflicts are rare but possible, as in real traffic
+                rng = random.Random(f"{name}:{i}")
+                check_in = date.today() + timedelta(days=rng.randint(1, 3000))
+                url = f"{base}/room/{rng.randint(1, options['rooms'])}/book/"
+
+                t0 = time.perf_counter()
+                session.get(f"{base}/").raise_for_status()
+                home = time.perf_counter() - t0
+
+                form = session.get(url)
+                token = CSRF_RE.search(form.text).group(1)
+                t0 = time.perf_counter()
+                response = session.post(url, data={
+                    "csrfmiddlewaretoken": token,
+                    "first_name": "Load",
+                    "email": f"load{i % 100}@example.com",
+                    "check_in": check_in.isoformat(),
+                    "check_out": (check_in + timedelta(days=2)).isoformat(),
+                }, headers={"Referer": url})
+                elapsed = time.perf_counter() - t0
+                response.raise_for_status()
+                with lock:
+                    samples["home"].append(home)
+                    samples["book_room"].append(elapsed)
+                    held.append('"order_id": "order_' in response.text)
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                list(pool.map(book, range(options["requests"])))
+            elapsed = time.perf_counter() - t0
+
+            self.stdout.write(
+                f"{name}: {options['requests'] / elapsed:.1f} bookings/s, {sum(held)} orders created"
+            )
+            for path, values in samples.items():
+                values.sort()
+                p50 = values[len(values) // 2] * 1000
+                p99 = values[int(len(values) * 0.99)] * 1000
+                self.stdout.write(f"  {path}: p50={p50:.1f}ms p99={p99:.1f}ms")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    def _wait_ready(self, base, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f"{base}/", timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        raise RuntimeError(f"server at {base} did not start")
@@ -0,0 +1,83 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from book import benchmarks, payments
+from book.fake_gateway import FakeGateway
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database at the given scale, run the query-helper "
+        "micro-benchmarks and the endpoint load driver, print the results as "
+        "JSON and fail if they regress past the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=benchmarks.SCALES, default="1k")
+        parser.add_argument("--iterations", type=int, default=200, help="calls per micro-benchmark")
+        parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--latency-ms", type=float, default=0, help="fake gateway latency")
+        parser.add_argument("--output", help="also write the JSON results to this file")
+        parser.add_argument("--baseline", default=str(settings.BASE_DIR / "benchmarks" / "baseline.json"))
+        parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+        parser.add_argument("--tolerance", type=float, default=0.5, help="allowed timing regression (0.5 = 50%%)")
+        parser.add_argument("--ignore-timings", action="store_true", help="only check query and error counts")
+
+    def handle(self, *args, **options):
+        scale = options["scale"]
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # DEBUG would log every query; testserver is the test Client's host
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                t0 = time.perf_counter()
+                counts = benchmarks.generate(benchmarks.SCALES[scale])
+                self.stderr.write(f"seeded {counts} in {time.perf_counter() - t0:.1f}s")
+
+                micro = benchmarks.micro_benchmarks(options["iterations"])
+                with FakeGateway(latency=options["latency_ms"] / 1000) as gateway:
+                    with override_settings(RAZORPAY_BASE_URL=gateway.url):
+                        payments.reset()
+                        load = benchmarks.load_test(options["requests"], options["concurrency"])
+                    payments.reset()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        results = {
+            "meta": {
+                "scale": scale,
+                "vendor": connection.vendor,
+                **counts,
+                "iterations": options["iterations"],
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+            },
+            "micro": micro,
+            "load": load,
+        }
+        output = json.dumps(results, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w") as fileobj:
+                fileobj.write(output + "\n")
+
+        if options["update_baseline"]:
+            benchmarks.save_baseline(options["baseline"], scale, results)
+            self.stderr.write(f"baseline for {scale} written to {options['baseline']}")
+            return
+
+        baseline = benchmarks.load_baseline(options["baseline"], scale)
+        if baseline is None:
+            self.stderr.write(f"no baseline for {scale} in {options['baseline']}; nothing to compare")
+            return
+        regressions = benchmarks.compare(
+            results, baseline, options["tolerance"], timings=not options["ignore_timings"],
+        )
+        if regressions:
+            raise CommandError("Regressed past the baseline:\n  " + "\n  ".join(regressions))
+        self.stderr.write(self.style.SUCCESS(f"within the {scale} baseline"))
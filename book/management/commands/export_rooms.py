@@ -0,0 +1,26 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from book import inventory
+from book.models import Room
+
+
+class Command(BaseCommand):
+    help = "Stream every room (prices and image references) to CSV or JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help='output file, or "-" for stdout')
+        parser.add_argument("--format", choices=sorted(inventory.FORMATS),
+                            help="default: from the file extension, else csv")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or inventory.detect_format(path)
+        fileobj = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        try:
+            for chunk in inventory.export_rows(Room.objects.all(), fmt):
+                fileobj.write(chunk)
+        finally:
+            if fileobj is not sys.stdout:
+                fileobj.close()
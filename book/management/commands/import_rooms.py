@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from book import inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update rooms (matched on number) from a CSV or JSONL file, "
+        "streamed and upserted in chunks. Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='CSV/JSONL file, or "-" for stdin')
+        parser.add_argument("--format", choices=sorted(inventory.FORMATS),
+                            help="default: from the file extension, else csv")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or inventory.detect_format(path)
+        # utf-8-sig: spreadsheets like to prepend a BOM
+        fileobj = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            report = inventory.import_rooms(
+                fileobj, fmt, chunk_size=options["chunk_size"], dry_run=options["dry_run"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        finally:
+            if fileobj is not sys.stdin:
+                fileobj.close()
+
+        for line, message in report.errors:
+            self.stderr.write(f"line {line}: {message}")
+        self.stdout.write(("Would import: " if options["dry_run"] else "Imported: ") + str(report))
+        if not report.ok:
+            raise CommandError(f"{len(report.errors)} rows were rejected")
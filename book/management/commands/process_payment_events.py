@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from book.webhooks import process_batch
+
+
+class Command(BaseCommand):
+    help = "Apply queued Razorpay webhook events to bookings in batches (the worker does this as they arrive)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--idle-sleep", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            count = process_batch(options["batch_size"])
+            total += count
+            if count:
+                self.stdout.write(f"applied {count} events ({total} total)")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from Majestic_Manor.cache import invalidate
+from book.caching import RATES
+from book.pricing import rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = "Recompute the nightly rate calendar from today (run daily to extend the horizon)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Nights ahead (default RATE_CALENDAR_DAYS)")
+
+    def handle(self, *args, **options):
+        count = rebuild_calendar(days=options["days"])
+        invalidate(RATES)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} calendar nights"))
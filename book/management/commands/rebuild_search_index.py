@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from book.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Re-index every room in the full-text search table."
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} rooms"))
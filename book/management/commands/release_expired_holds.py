@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from book.reservations import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Cancel pending bookings whose payment hold has expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds"))
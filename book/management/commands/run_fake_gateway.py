@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from book.fake_gateway import FakeGateway
+
+
+class Command(BaseCommand):
+    help = "Serve a fake Razorpay orders API (set RAZORPAY_BASE_URL to its URL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=9090)
+        parser.add_argument("--latency-ms", type=float, default=0)
+        parser.add_argument("--error-rate", type=float, default=0)
+
+    def handle(self, *args, **options):
+        gateway = FakeGateway(
+            port=options["port"],
+            latency=options["latency_ms"] / 1000,
+            error_rate=options["error_rate"],
+        )
+        self.stdout.write(f"Fake gateway listening on {gateway.url}")
+        try:
+            gateway.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway.server.server_close()
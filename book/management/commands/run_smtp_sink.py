@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from book.smtp_sink import SmtpSink
+
+
+class Command(BaseCommand):
+    help = "Serve a local SMTP sink that keeps mail in memory (set EMAIL_HOST/EMAIL_PORT to it)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=1025)
+        parser.add_argument("--connect-latency-ms", type=float, default=0)
+        parser.add_argument("--message-latency-ms", type=float, default=0)
+
+    def handle(self, *args, **options):
+        sink = SmtpSink(
+            port=options["port"],
+            connect_latency=options["connect_latency_ms"] / 1000,
+            message_latency=options["message_latency_ms"] / 1000,
+        )
+        self.stdout.write(f"SMTP sink listening on {sink.host}:{sink.port}")
+        try:
+            sink.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server.server_close()
+            self.stdout.write(f"{sink.stats['messages']} messages over {sink.stats['connections']} connections")
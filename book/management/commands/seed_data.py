@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from book.benchmarks import SCALES, generate
+from book.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Seed rooms, customers and bookings at benchmark scale into the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="1k", help="number of bookings")
+        parser.add_argument("--bookings", type=int, help="exact number of bookings (overrides --scale)")
+        parser.add_argument("--rooms", type=int, help="default: one per 200 bookings, at least 20")
+        parser.add_argument("--customers", type=int, help="default: one per 5 bookings")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if Booking.objects.exists():
+            raise CommandError("The database already has bookings; seed an empty one.")
+        t0 = time.perf_counter()
+        counts = generate(
+            options["bookings"] or SCALES[options["scale"]],
+            rooms=options["rooms"],
+            customers=options["customers"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {counts['rooms']} rooms, {counts['customers']} customers and "
+            f"{counts['bookings']} bookings in {time.perf_counter() - t0:.1f}s"
+        ))
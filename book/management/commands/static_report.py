@@ -0,0 +1,64 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from Majestic_Manor.staticfiles import ENCODINGS
+
+# Public pages built on book/base.html
+PAGES = ["/", "/rooms/", "/search/?q=suite", "/about/", "/contact/", "/hospitality/"]
+
+
+class Command(BaseCommand):
+    help = "Report static bytes per page of book/base.html: raw vs the precompressed variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument("pages", nargs="*", default=PAGES)
+
+    def handle(self, *args, **options):
+        asset_re = re.compile(r'(?:href|src)="%s([^"?#]+)' % re.escape(settings.STATIC_URL))
+        client = Client(SERVER_NAME="localhost")
+        columns = ["raw", *ENCODINGS, "best"]
+        self.stdout.write(f"{'page':<22}{'assets':>7}" + "".join(f"{c:>10}" for c in columns) + f"{'saved':>16}")
+
+        totals = dict.fromkeys(columns, 0)
+        # Hashed URLs, as production renders them
+        with override_settings(DEBUG=False):
+            for page in options["pages"]:
+                response = client.get(page)
+                if response.status_code != 200:
+                    self.stdout.write(f"{page:<22} HTTP {response.status_code}")
+                    continue
+                names = sorted(set(asset_re.findall(response.content.decode())))
+                sizes = dict.fromkeys(columns, 0)
+                for name in names:
+                    for column, size in self.sizes(name).items():
+                        sizes[column] += size
+                for column in columns:
+                    totals[column] += sizes[column]
+                self.stdout.write(self.row(page, len(names), sizes, columns))
+        self.stdout.write(self.row("total", "", totals, columns))
+
+    def sizes(self, name):
+        path = os.path.join(settings.STATIC_ROOT, name)
+        if not os.path.isfile(path):
+            self.stderr.write(f"missing from STATIC_ROOT: {name} (run collectstatic)")
+            return {}
+        raw = os.path.getsize(path)
+        sizes = {"raw": raw}
+        for encoding, suffix in ENCODINGS.items():
+            # No variant means compression did not pay off: served raw
+            sizes[encoding] = os.path.getsize(path + suffix) if os.path.isfile(path + suffix) else raw
+        sizes["best"] = min(sizes.values())
+        return sizes
+
+    def row(self, label, count, sizes, columns):
+        saved = sizes["raw"] - sizes["best"]
+        percent = 100 * saved / sizes["raw"] if sizes["raw"] else 0
+        return (
+            f"{label:<22}{count:>7}" + "".join(f"{sizes[c]:>10,}" for c in columns)
+            + f"{saved:>9,} ({percent:.0f}%)"
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0006_remove_homepage_hero_subtitle_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'check_out'], name='booking_status_checkout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', '-id'], name='booking_status_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('razorpay_order_id',), name='booking_razorpay_order_uniq'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS book_room_fts "
+            "USING fts5(number, room_type, description, tokenize='porter unicode61')"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS book_room_search ("
+            "room_id bigint PRIMARY KEY REFERENCES book_room (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS book_room_search_document_gin "
+            "ON book_room_search USING GIN (document)"
+        )
+    else:
+        return
+
+    Room = apps.get_model("book", "Room")
+    labels = dict(Room._meta.get_field("room_type").choices)
+    for room in Room.objects.all():
+        room_type = labels.get(room.room_type, room.room_type)
+        if vendor == "sqlite":
+            schema_editor.execute(
+                "INSERT INTO book_room_fts (rowid, number, room_type, description) VALUES (%s, %s, %s, %s)",
+                [room.pk, room.number, room_type, room.description],
+            )
+        else:
+            schema_editor.execute(
+                "INSERT INTO book_room_search (room_id, document) VALUES "
+                "(%s, setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B'))",
+                [room.pk, f"{room.number} {room_type}", room.description],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS book_room_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS book_room_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0007_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+def merge_duplicate_customers(apps, schema_editor):
+    # Email becomes unique: keep the oldest customer per email, move bookings to it
+    Customer = apps.get_model("book", "Customer")
+    Booking = apps.get_model("book", "Booking")
+    keep = {}
+    for customer in Customer.objects.order_by("id"):
+        original = keep.setdefault(customer.email, customer)
+        if original.pk != customer.pk:
+            Booking.objects.filter(customer_id=customer.pk).update(customer_id=original.pk)
+            customer.delete()
+
+
+def add_overlap_exclusion(apps, schema_editor):
+    # PostgreSQL backstop: two confirmed stays of one room can never overlap
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE book_booking ADD CONSTRAINT booking_confirmed_no_overlap "
+        "EXCLUDE USING gist (room_id WITH =, daterange(check_in, check_out, '[)') WITH &&) "
+        "WHERE (status = 'confirmed')"
+    )
+
+
+def drop_overlap_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE book_booking DROP CONSTRAINT IF EXISTS booking_confirmed_no_overlap")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0009_payment_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_customers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'check_in', 'check_out'], name='booking_room_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'hold_expires_at'], name='booking_status_hold_idx'),
+        ),
+        migrations.RunPython(add_overlap_exclusion, drop_overlap_exclusion),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:52
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_rate_calendar(apps, schema_editor):
+    # No seasons exist yet, so every night is charged at the base price
+    RateCalendar = apps.get_model("book", "RateCalendar")
+    today = date.today()
+    RateCalendar.objects.bulk_create([
+        RateCalendar(room_type=room_type, night=today + timedelta(days=offset), rate_percent=100)
+        for room_type in ("single", "double", "suite")
+        for offset in range(settings.RATE_CALENDAR_DAYS)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0010_reservation_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(help_text='Last night the season applies to')),
+                ('rate_percent', models.DecimalField(decimal_places=2, default=100, max_digits=6)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StayDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(blank=True, choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite')], max_length=10)),
+                ('min_nights', models.PositiveSmallIntegerField()),
+                ('percent_off', models.DecimalField(decimal_places=2, max_digits=5)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RateCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite')], max_length=10)),
+                ('night', models.DateField()),
+                ('rate_percent', models.DecimalField(decimal_places=4, max_digits=9)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'night'), name='ratecalendar_type_night_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeekdayRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite')], max_length=10)),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('rate_percent', models.DecimalField(decimal_places=2, default=100, max_digits=6)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'weekday'), name='weekdayrate_type_day_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_rate_calendar, migrations.RunPython.noop),
+    ]
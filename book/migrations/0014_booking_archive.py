@@ -0,0 +1,100 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_archive_table(apps, schema_editor):
+    ArchivedBooking = apps.get_model("book", "ArchivedBooking")
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(ArchivedBooking)
+        return
+    # Range-partitioned by check_in month; book.archive creates the monthly
+    # partitions as it moves rows in. The partition key has to be part of
+    # the primary key (ids stay unique: they come from book_booking).
+    schema_editor.execute(
+        'CREATE TABLE "book_archivedbooking" ('
+        '"id" bigint NOT NULL, '
+        '"room_id" bigint NOT NULL REFERENCES "book_room" ("id") DEFERRABLE INITIALLY DEFERRED, '
+        '"customer_id" bigint NOT NULL REFERENCES "book_customer" ("id") DEFERRABLE INITIALLY DEFERRED, '
+        '"check_in" date NOT NULL, '
+        '"check_out" date NOT NULL, '
+        '"total_amount" numeric(9, 2) NOT NULL, '
+        '"created_at" timestamp with time zone NOT NULL, '
+        '"status" varchar(20) NOT NULL, '
+        '"razorpay_order_id" varchar(255) NULL, '
+        '"razorpay_payment_id" varchar(255) NULL, '
+        'PRIMARY KEY ("id", "check_in")'
+        ') PARTITION BY RANGE ("check_in")'
+    )
+    schema_editor.execute('CREATE INDEX "archive_check_in_idx" ON "book_archivedbooking" ("check_in")')
+    schema_editor.execute('CREATE INDEX "archive_customer_idx" ON "book_archivedbooking" ("customer_id")')
+
+
+def drop_archive_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions
+    schema_editor.delete_model(apps.get_model("book", "ArchivedBooking"))
+
+
+HISTORY_COLUMNS = (
+    "id, room_id, customer_id, check_in, check_out, total_amount, created_at, "
+    "status, razorpay_order_id, razorpay_payment_id"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0013_booking_check_in_idx'),
+    ]
+
+    operations = [
+        # State only: the table itself is created below, partitioned on PostgreSQL
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='ArchivedBooking',
+                fields=[
+                    ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                    ('check_in', models.DateField()),
+                    ('check_out', models.DateField()),
+                    ('total_amount', models.DecimalField(decimal_places=2, max_digits=9)),
+                    ('created_at', models.DateTimeField()),
+                    ('status', models.CharField(choices=[('pending', 'Pending Payment'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('failed', 'Payment Failed')], max_length=20)),
+                    ('razorpay_order_id', models.CharField(blank=True, max_length=255, null=True)),
+                    ('razorpay_payment_id', models.CharField(blank=True, max_length=255, null=True)),
+                    ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='book.customer')),
+                    ('room', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='archived_bookings', to='book.room')),
+                ],
+                options={
+                    'indexes': [models.Index(fields=['check_in'], name='archive_check_in_idx'), models.Index(fields=['customer'], name='archive_customer_idx')],
+                },
+            ),
+        ]),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+        migrations.CreateModel(
+            name='BookingHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('check_in', models.DateField()),
+                ('check_out', models.DateField()),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=9)),
+                ('created_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending Payment'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('failed', 'Payment Failed')], max_length=20)),
+                ('razorpay_order_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('razorpay_payment_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('hold_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('archived', models.BooleanField()),
+                ('customer', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='book.customer')),
+                ('room', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='book.room')),
+            ],
+            options={
+                'db_table': 'book_bookinghistory',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            f"CREATE VIEW book_bookinghistory AS "
+            f"SELECT {HISTORY_COLUMNS}, hold_expires_at, FALSE AS archived FROM book_booking "
+            f"UNION ALL "
+            f"SELECT {HISTORY_COLUMNS}, NULL AS hold_expires_at, TRUE AS archived FROM book_archivedbooking",
+            "DROP VIEW book_bookinghistory",
+        ),
+    ]
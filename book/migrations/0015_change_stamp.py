@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def stamp_existing(apps, schema_editor):
+    # Every group starts at version 1 as of now, each room included
+    ChangeStamp = apps.get_model("book", "ChangeStamp")
+    Room = apps.get_model("book", "Room")
+    groups = ["rooms", "bookings", "rates"] + [f"room:{pk}" for pk in Room.objects.values_list("pk", flat=True)]
+    ChangeStamp.objects.bulk_create([ChangeStamp(group=group, version=1) for group in groups], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0014_booking_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeStamp',
+            fields=[
+                ('group', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(stamp_existing, migrations.RunPython.noop),
+    ]
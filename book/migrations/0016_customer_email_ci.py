@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:28
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def merge_case_duplicates(apps, schema_editor):
+    # 0010 merged exact duplicates only: keep the oldest customer per
+    # lower(email), move live and archived bookings to it
+    Customer = apps.get_model("book", "Customer")
+    Booking = apps.get_model("book", "Booking")
+    ArchivedBooking = apps.get_model("book", "ArchivedBooking")
+    keep = {}
+    for customer in Customer.objects.order_by("id"):
+        original = keep.setdefault(customer.email.lower(), customer)
+        if original.pk != customer.pk:
+            Booking.objects.filter(customer_id=customer.pk).update(customer_id=original.pk)
+            ArchivedBooking.objects.filter(customer_id=customer.pk).update(customer_id=original.pk)
+            customer.delete()
+    if schema_editor.connection.vendor == "postgresql":
+        # Check the moved bookings' deferred foreign keys now: the table
+        # cannot be altered below while those checks are pending
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0015_change_stamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customer',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='customer_email_ci_uniq'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0016_customer_email_ci'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['razorpay_order_id'], name='archive_order_idx'),
+        ),
+    ]
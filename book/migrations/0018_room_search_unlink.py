@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def drop_room_foreign_key(apps, schema_editor):
+    # Django's flush truncates only model tables, so a key from the search
+    # side table to book_room breaks it; search.remove_room already drops
+    # the rows of a deleted room
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("ALTER TABLE book_room_search DROP CONSTRAINT IF EXISTS book_room_search_room_id_fkey")
+
+
+def add_room_foreign_key(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DELETE FROM book_room_search WHERE room_id NOT IN (SELECT id FROM book_room)")
+    schema_editor.execute(
+        "ALTER TABLE book_room_search ADD CONSTRAINT book_room_search_room_id_fkey "
+        "FOREIGN KEY (room_id) REFERENCES book_room (id) ON DELETE CASCADE"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0017_archive_order_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_room_foreign_key, add_room_foreign_key),
+    ]
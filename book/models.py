@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.conf import settings
 
+# email__lower=...: the same expression as the customer email constraint, so it can use its index
+models.EmailField.register_lookup(Lower)
+
 # Use ImageField in local, CloudinaryField in production
 if settings.DEBUG:
     from django.db.models import ImageField as DynamicImageField
@@ -33,6 +37,12 @@ class Customer(models.Model):
     email = models.EmailField()
     phone = models.CharField(max_length=20, blank=True)
 
+    class Meta:
+        constraints = [
+            # One customer per address, whatever case it was typed in
+            models.UniqueConstraint(Lower('email'), name='customer_email_ci_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}".strip()
 
@@ -58,10 +68,88 @@ class Booking(models.Model):
     razorpay_payment_id = models.CharField(max_length=255, null=True, blank=True)
     razorpay_signature = models.CharField(max_length=255, null=True, blank=True)
 
+    # Pending bookings block the room only until their hold expires
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # availability / room_list / search: status + date window
+            models.Index(fields=['status', 'check_out'], name='booking_status_checkout_idx'),
+            # billing dashboard: filter by status, newest first
+            models.Index(fields=['status', '-id'], name='booking_status_id_idx'),
+            # reservation overlap check for one room
+            models.Index(fields=['room', 'check_in', 'check_out'], name='booking_room_dates_idx'),
+            # hold sweeper
+            models.Index(fields=['status', 'hold_expires_at'], name='booking_status_hold_idx'),
+            # admin date hierarchy: check_in ranges
+            models.Index(fields=['check_in'], name='booking_check_in_idx'),
+        ]
+        constraints = [
+            # payment_success looks bookings up by order id
+            models.UniqueConstraint(fields=['razorpay_order_id'], name='booking_razorpay_order_uniq'),
+        ]
+
     def __str__(self):
         return f"Booking {self.pk} - {self.customer}"
 
 
+# -----------------------------------------------------------
+# Booking archive (book/archive.py)
+#
+# Stays that ended more than BOOKING_ARCHIVE_AFTER_DAYS ago move here in
+# batches, keeping their id, so Booking holds only the rows the site
+# still works with. On PostgreSQL the table is range-partitioned by
+# check_in month (created in migration 0014, partitions on demand).
+# -----------------------------------------------------------
+class ArchivedBooking(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    room = models.ForeignKey(Room, on_delete=models.PROTECT, related_name="archived_bookings", db_index=False)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="archived_bookings", db_index=False)
+
+    check_in = models.DateField()
+    check_out = models.DateField()
+    total_amount = models.DecimalField(max_digits=9, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    # Final statuses only; the payment signature and the hold are not kept
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    razorpay_order_id = models.CharField(max_length=255, null=True, blank=True)
+    razorpay_payment_id = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['check_in'], name='archive_check_in_idx'),
+            # customer deletes cascade here
+            models.Index(fields=['customer'], name='archive_customer_idx'),
+            # settlement reconciliation: order ids missing from the range
+            models.Index(fields=['razorpay_order_id'], name='archive_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived booking {self.pk} - {self.customer}"
+
+
+class BookingHistory(models.Model):
+    """Live and archived bookings together: a read-only view for reporting."""
+    id = models.BigIntegerField(primary_key=True)
+    room = models.ForeignKey(Room, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    customer = models.ForeignKey(Customer, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+
+    check_in = models.DateField()
+    check_out = models.DateField()
+    total_amount = models.DecimalField(max_digits=9, decimal_places=2)
+    created_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    razorpay_order_id = models.CharField(max_length=255, null=True, blank=True)
+    razorpay_payment_id = models.CharField(max_length=255, null=True, blank=True)
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    archived = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = "book_bookinghistory"
+
+
 class HomePage(models.Model):
     hero_title = models.CharField(max_length=200, default="Welcome to Majestic Manor")
     hero_image = DynamicImageField(blank=True, null=True)
@@ -78,3 +166,116 @@ class HomePage(models.Model):
 
     def __str__(self):
         return "Home Page Content"
+
+
+class PaymentEvent(models.Model):
+    # Raw Razorpay webhook events, inserted once per event id and never edited;
+    # processed_at/attempts/error are the worker's queue bookkeeping.
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50)
+    order_id = models.CharField(max_length=255, blank=True)
+    payload = models.TextField()
+    received_at = models.DateTimeField(default=timezone.now)
+
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # worker queue: unprocessed events in arrival order
+            models.Index(fields=['processed_at', 'id'], name='paymentevent_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id}"
+
+
+class Season(models.Model):
+    # Nightly rate for a date range, as a percentage of the room's base price.
+    # Where seasons overlap, the one starting latest wins.
+    room_type = models.CharField(max_length=10, choices=Room.ROOM_TYPES)
+    name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField(help_text="Last night the season applies to")
+    rate_percent = models.DecimalField(max_digits=6, decimal_places=2, default=100)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_room_type_display()})"
+
+
+class WeekdayRate(models.Model):
+    WEEKDAYS = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    # Applied on top of the season rate for that night
+    room_type = models.CharField(max_length=10, choices=Room.ROOM_TYPES)
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    rate_percent = models.DecimalField(max_digits=6, decimal_places=2, default=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'weekday'], name='weekdayrate_type_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} ({self.get_room_type_display()})"
+
+
+class StayDiscount(models.Model):
+    # Length-of-stay discount; the largest min_nights the stay reaches applies.
+    # A blank room_type applies to every room type.
+    room_type = models.CharField(max_length=10, choices=Room.ROOM_TYPES, blank=True)
+    min_nights = models.PositiveSmallIntegerField()
+    percent_off = models.DecimalField(max_digits=5, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.percent_off}% off {self.min_nights}+ nights"
+
+
+class RateCalendar(models.Model):
+    # Precomputed season x weekday percentage per room type and night,
+    # maintained by book.pricing; a stay quote is one range scan of this table.
+    room_type = models.CharField(max_length=10, choices=Room.ROOM_TYPES)
+    night = models.DateField()
+    rate_percent = models.DecimalField(max_digits=9, decimal_places=4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'night'], name='ratecalendar_type_night_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type} {self.night}: {self.rate_percent}%"
+
+
+class ImageAsset(models.Model):
+    # One row per stored original (Room/HomePage image). Derivatives are named
+    # by content hash, so duplicate uploads share one set of files.
+    name = models.CharField(max_length=255, unique=True)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # [{"format": "webp", "width": 320, "name": "derivatives/..."}, ...]
+    variants = models.JSONField(default=list)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+class ChangeStamp(models.Model):
+    # Database copy of a cache group's version (book.caching.STAMPED), bumped
+    # with it: the API's ETags must agree across processes and cache flushes.
+    group = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.group} v{self.version}"
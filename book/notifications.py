@@ -0,0 +1,153 @@
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+
+from tasks.queue import BatchIncomplete
+from .models import Booking
+
+# kind -> booking status the email still has to match when it goes out
+KINDS = {
+    "confirmation": "confirmed",
+    "reminder": "confirmed",
+    "cancellation": "cancelled",
+}
+# Guests wait on confirmations; reminders can queue behind them
+PRIORITIES = {"confirmation": 5, "cancellation": 5, "reminder": 0}
+
+
+# -----------------------------------------------------------
+# Scheduling (called from book.signals)
+#
+# Nothing is sent here: each email is a task (book.tasks.send_notifications)
+# queued in the transaction that changed the booking, so a rolled-back
+# payment never mails anyone. Reminders are queued with run_at on the
+# reminder date and re-checked when they come due.
+# -----------------------------------------------------------
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def queue(kind, booking, run_at=None):
+    from .tasks import send_notifications
+
+    check_in = _as_date(booking.check_in).isoformat()
+    send_notifications.delay(kind, booking.pk, check_in, priority=PRIORITIES[kind], run_at=run_at)
+
+
+def reminder_time(check_in):
+    day = _as_date(check_in) - timedelta(days=settings.NOTIFY_REMINDER_DAYS)
+    return timezone.make_aware(datetime.combine(day, time(settings.NOTIFY_REMINDER_HOUR)))
+
+
+def schedule_reminder(booking):
+    at = reminder_time(booking.check_in)
+    # Booked inside the reminder window: the confirmation is reminder enough
+    if at > timezone.now():
+        queue("reminder", booking, run_at=at)
+
+
+def booking_changed(booking, before, status=None):
+    """
+    Queue the emails a change calls for. `before` is the stored
+    (status, check_in) ahead of the change, None for a new booking;
+    `status` overrides booking.status (bulk updates).
+    """
+    status = status or booking.status
+    previous_status, previous_check_in = before or (None, None)
+    if status == "confirmed":
+        if previous_status != "confirmed":
+            queue("confirmation", booking)
+            schedule_reminder(booking)
+        elif _as_date(previous_check_in) != _as_date(booking.check_in):
+            # The reminder queued for the old date will find it changed and skip
+            schedule_reminder(booking)
+    elif status == "cancelled" and previous_status != "cancelled":
+        # Lapsed unpaid holds cancel silently; a paid or confirmed stay is mailed
+        if previous_status == "confirmed" or booking.razorpay_payment_id:
+            queue("cancellation", booking)
+
+
+# -----------------------------------------------------------
+# Rendering
+#
+# Compiled templates are kept per process: the worker renders the same
+# three emails thousands of times. The shared details block is rendered
+# here too and passed in, since an {% include %} looks its template up
+# again on every render.
+# -----------------------------------------------------------
+_templates = {}
+
+
+def template(name):
+    compiled = _templates.get(name)
+    if compiled is None:
+        compiled = _templates[name] = get_template(name)
+    return compiled
+
+
+def build_message(kind, booking):
+    context = {"booking": booking, "customer": booking.customer, "room": booking.room}
+    subject = template(f"book/email/{kind}_subject.txt").render(context)
+    bodies = {
+        fmt: template(f"book/email/{kind}.{fmt}").render({
+            **context, "details": template(f"book/email/_details.{fmt}").render(context),
+        })
+        for fmt in ("txt", "html")
+    }
+    message = EmailMultiAlternatives(
+        subject=" ".join(subject.split()),
+        body=bodies["txt"],
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[booking.customer.email],
+    )
+    message.attach_alternative(bodies["html"], "text/html")
+    return message
+
+
+# -----------------------------------------------------------
+# Delivery
+# -----------------------------------------------------------
+def send(calls, connection=None):
+    """
+    Send [kind, booking_id, check_in] notifications over one SMTP connection;
+    those whose booking has moved on since they were queued are dropped.
+    Returns how many were sent. If the connection fails partway, raises
+    BatchIncomplete naming the calls already sent or dropped, so a retry
+    never mails a guest twice.
+    """
+    bookings = Booking.objects.select_related("customer", "room").only(
+        "id", "status", "check_in", "check_out", "total_amount",
+        "customer__first_name", "customer__last_name", "customer__email",
+        "room__number", "room__room_type",
+    ).in_bulk([booking_id for _, booking_id, _ in calls])
+
+    messages = []  # (call index, message)
+    for index, (kind, booking_id, check_in) in enumerate(calls):
+        booking = bookings.get(booking_id)
+        if booking is None or booking.status != KINDS[kind]:
+            continue
+        if kind == "reminder" and booking.check_in.isoformat() != check_in:
+            continue
+        messages.append((index, build_message(kind, booking)))
+    if not messages:
+        return 0
+
+    # One message at a time on a connection opened once, to know how far a failure got
+    connection = connection or get_connection()
+    opened = connection.open()
+    pending = {index for index, _ in messages}
+    sent = 0
+    try:
+        for index, message in messages:
+            try:
+                sent += connection.send_messages([message]) or 0
+            except Exception as exc:
+                raise BatchIncomplete([i for i in range(len(calls)) if i not in pending]) from exc
+            pending.discard(index)
+    finally:
+        if opened:
+            connection.close()
+    return sent
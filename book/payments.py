@@ -0,0 +1,217 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import razorpay
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from razorpay.errors import GatewayError, ServerError
+from requests.adapters import HTTPAdapter
+
+
+class GatewayUnavailable(Exception):
+    """Raised without calling Razorpay while the circuit breaker is open."""
+
+
+# -----------------------------------------------------------
+# HTTP session: pooled connections, bounded timeouts
+# -----------------------------------------------------------
+class TimeoutSession(requests.Session):
+    def __init__(self, timeout, pool_size):
+        super().__init__()
+        self.timeout = timeout
+        # Retries are handled in call() so they can respect idempotency
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class PooledClient(razorpay.Client):
+    _version = None
+
+    def _get_version(self):
+        # razorpay resolves its version through pkg_resources on every request
+        if PooledClient._version is None:
+            PooledClient._version = super()._get_version()
+        return PooledClient._version
+
+
+# -----------------------------------------------------------
+# Circuit Breaker
+# -----------------------------------------------------------
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._trial_running):
+                raise GatewayUnavailable("Payment gateway circuit is open")
+            if state == "half-open":
+                # Let exactly one request probe the gateway
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        # A probe that ended some other way (bad request, unreadable reply)
+        # says nothing either way: the next request probes again
+        with self._lock:
+            self._trial_running = False
+
+
+# -----------------------------------------------------------
+# Process-wide client (one per worker process)
+# -----------------------------------------------------------
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_breaker = None
+_executor = None
+_executor_pid = None
+
+# Transport errors and gateway-side failures; BadRequestError is the caller's fault
+FAILURES = (requests.ConnectionError, requests.Timeout, ServerError, GatewayError)
+
+
+def get_client():
+    global _client, _client_pid
+    # Rebuild after fork so workers never share pooled sockets
+    if _client is None or _client_pid != os.getpid():
+        with _lock:
+            if _client is None or _client_pid != os.getpid():
+                session = TimeoutSession(
+                    timeout=(settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT),
+                    pool_size=settings.RAZORPAY_POOL_SIZE,
+                )
+                options = {}
+                if settings.RAZORPAY_BASE_URL:
+                    options["base_url"] = settings.RAZORPAY_BASE_URL
+                _client = PooledClient(
+                    session=session,
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    **options,
+                )
+                _client_pid = os.getpid()
+    return _client
+
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        with _lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    settings.RAZORPAY_BREAKER_THRESHOLD,
+                    settings.RAZORPAY_BREAKER_RESET,
+                )
+    return _breaker
+
+
+def get_executor():
+    """Threads for gateway calls from async views, one per pooled connection."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(settings.RAZORPAY_POOL_SIZE, thread_name_prefix="razorpay")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def reset():
+    """Drop the cached client, breaker and executor (settings changed, tests)."""
+    global _client, _breaker, _executor
+    with _lock:
+        _client = None
+        _breaker = None
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+
+
+def call(fn, *args, idempotent=False):
+    """
+    Run a gateway call through the breaker. Idempotent calls are retried on
+    any failure; others only when the connection was never established.
+    """
+    breaker = get_breaker()
+    breaker.before_call()
+    attempt = 0
+    try:
+        while True:
+            try:
+                result = fn(*args)
+            except FAILURES as exc:
+                retryable = idempotent or isinstance(exc, requests.ConnectTimeout)
+                if not retryable or attempt >= settings.RAZORPAY_MAX_RETRIES:
+                    breaker.record_failure()
+                    raise
+                attempt += 1
+                # Full jitter: sleep somewhere in [0, base * 2^attempt)
+                time.sleep(random.uniform(0, settings.RAZORPAY_RETRY_BACKOFF * 2 ** attempt))
+            else:
+                breaker.record_success()
+                return result
+    finally:
+        # Errors outside FAILURES are neutral, but must not strand a half-open probe
+        breaker.release_trial()
+
+
+def create_order(amount_paise, currency="INR"):
+    client = get_client()
+    return call(client.order.create, {
+        "amount": amount_paise,
+        "currency": currency,
+        "payment_capture": 1,
+    })
+
+
+async def acreate_order(amount_paise, currency="INR"):
+    # The SDK is blocking (requests): run it on the gateway threads rather than
+    # the request's ORM thread or the loop's small default executor
+    return await sync_to_async(
+        create_order, thread_sensitive=False, executor=get_executor(),
+    )(amount_paise, currency)
+
+
+def fetch_order(order_id):
+    client = get_client()
+    return call(client.order.fetch, order_id, idempotent=True)
+
+
+def verify_payment_signature(params):
+    # Local HMAC check, no network round trip
+    return get_client().utility.verify_payment_signature(params)
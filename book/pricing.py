@@ -0,0 +1,204 @@
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from Majestic_Manor.cache import cached
+from .caching import RATES
+from .models import RateCalendar, Room, Season, StayDiscount, WeekdayRate
+
+CENT = Decimal("0.01")
+PERCENT_PLACES = Decimal("0.0001")
+HUNDRED = Decimal(100)
+ZERO = Decimal(0)
+
+
+class Quote(namedtuple("Quote", "check_in nightly subtotal discount total")):
+    """Price of one stay; `nightly` is the price of each night in order. All amounts are Decimal."""
+    __slots__ = ()
+
+    @property
+    def nights(self):
+        return len(self.nightly)
+
+    @property
+    def per_night(self):
+        return (self.total / self.nights).quantize(CENT, ROUND_HALF_UP) if self.nightly else ZERO
+
+    def breakdown(self):
+        return [(self.check_in + timedelta(days=offset), price) for offset, price in enumerate(self.nightly)]
+
+
+def to_paise(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+# -----------------------------------------------------------
+# Rate Rules
+#
+# A night costs base price x season % x weekday %. Seasons and weekday
+# rates are per room type; where seasons overlap the latest start wins.
+# -----------------------------------------------------------
+def load_rules(room_type):
+    seasons = list(
+        Season.objects.filter(room_type=room_type)
+        .order_by("-start_date", "-id")
+        .values_list("start_date", "end_date", "rate_percent")
+    )
+    weekdays = dict(WeekdayRate.objects.filter(room_type=room_type).values_list("weekday", "rate_percent"))
+    return seasons, weekdays
+
+
+def nightly_percent(night, seasons, weekdays):
+    percent = HUNDRED
+    for start, end, season_percent in seasons:
+        if start <= night <= end:
+            percent = season_percent
+            break
+    weekday_percent = weekdays.get(night.weekday())
+    if weekday_percent is not None:
+        percent = percent * weekday_percent / HUNDRED
+    return percent.quantize(PERCENT_PLACES, ROUND_HALF_UP)
+
+
+def _discounts():
+    # (room_type, min_nights, percent_off), type-specific rows after general ones
+    return cached("stay_discounts", [RATES], lambda: sorted(
+        StayDiscount.objects.values_list("room_type", "min_nights", "percent_off"),
+        key=lambda row: (row[1], row[0] != ""),
+    ))
+
+
+def stay_discount(room_type, nights, discounts=None):
+    """Percent off for the longest length-of-stay tier the stay reaches."""
+    percent_off = ZERO
+    for discount_type, min_nights, discount_percent in discounts if discounts is not None else _discounts():
+        if min_nights > nights:
+            break
+        if discount_type in ("", room_type):
+            percent_off = discount_percent
+    return percent_off
+
+
+# -----------------------------------------------------------
+# Rate Calendar
+# -----------------------------------------------------------
+def rebuild_calendar(room_types=None, start=None, days=None):
+    """Recompute the calendar from `start` (today) for RATE_CALENDAR_DAYS nights."""
+    start = start or date.today()
+    days = days or settings.RATE_CALENDAR_DAYS
+    room_types = room_types or [key for key, _ in Room.ROOM_TYPES]
+
+    rows = []
+    for room_type in room_types:
+        seasons, weekdays = load_rules(room_type)
+        for offset in range(days):
+            night = start + timedelta(days=offset)
+            rows.append(RateCalendar(
+                room_type=room_type,
+                night=night,
+                rate_percent=nightly_percent(night, seasons, weekdays),
+            ))
+
+    with transaction.atomic():
+        RateCalendar.objects.filter(room_type__in=room_types, night__lt=start).delete()
+        RateCalendar.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["room_type", "night"],
+            update_fields=["rate_percent"],
+        )
+    return len(rows)
+
+
+def _fill_missing(room_type, check_in, check_out, percents):
+    """Percent per night of the stay from {night: percent}; gaps are priced from the rules."""
+    nights = [check_in + timedelta(days=offset) for offset in range((check_out - check_in).days)]
+    if len(percents) < len(nights):
+        # Outside the precomputed horizon
+        seasons, weekdays = load_rules(room_type)
+        for night in nights:
+            if night not in percents:
+                percents[night] = nightly_percent(night, seasons, weekdays)
+    return [percents[night] for night in nights]
+
+
+def _as_decimals(values):
+    # SQLite hands NUMERIC columns back as float/int; str() keeps the stored digits.
+    # A stay only has a handful of distinct rates, so convert each once.
+    converted = {value: Decimal(str(value)) for value in set(values)}
+    return [converted[value] for value in values]
+
+
+# Hot path, so hand-written: compiling the equivalent queryset cost more than running it.
+# Only the rate is selected; the unique (room_type, night) key means a full
+# row count is exactly the stay's nights in order.
+RANGE_SQL = (
+    f"SELECT rate_percent FROM {RateCalendar._meta.db_table} "
+    "WHERE room_type = %s AND night >= %s AND night < %s ORDER BY night"
+)
+
+
+def nightly_rates(room_type, check_in, check_out):
+    """Rate percent for each night of the stay: one range query on the calendar."""
+    with connection.cursor() as cursor:
+        cursor.execute(RANGE_SQL, [room_type, check_in.isoformat(), check_out.isoformat()])
+        rows = cursor.fetchall()
+    if len(rows) == (check_out - check_in).days:
+        return _as_decimals([row[0] for row in rows])
+    percents = dict(
+        RateCalendar.objects.filter(room_type=room_type, night__gte=check_in, night__lt=check_out)
+        .values_list("night", "rate_percent")
+    )
+    return _fill_missing(room_type, check_in, check_out, percents)
+
+
+# -----------------------------------------------------------
+# Quotes
+# -----------------------------------------------------------
+def price_stay(base_price, check_in, percents, percent_off=ZERO):
+    base_price = Decimal(base_price)
+    prices = {
+        percent: (base_price * percent / HUNDRED).quantize(CENT, ROUND_HALF_UP)
+        for percent in set(percents)
+    }
+    nightly = [prices[percent] for percent in percents]
+    subtotal = sum(nightly, ZERO)
+    discount = (subtotal * percent_off / HUNDRED).quantize(CENT, ROUND_HALF_UP)
+    return Quote(check_in, nightly, subtotal, discount, subtotal - discount)
+
+
+def quote(room, check_in, check_out):
+    percents = nightly_rates(room.room_type, check_in, check_out)
+    return price_stay(room.price_per_night, check_in, percents, stay_discount(room.room_type, len(percents)))
+
+
+def quote_many(rooms, check_in, check_out):
+    """Quotes for several rooms keyed by room id, with one calendar query in total."""
+    rooms = list(rooms)
+    room_types = {room.room_type for room in rooms}
+
+    known = {room_type: {} for room_type in room_types}
+    for room_type, night, percent in RateCalendar.objects.filter(
+        room_type__in=room_types, night__gte=check_in, night__lt=check_out,
+    ).values_list("room_type", "night", "rate_percent"):
+        known[room_type][night] = percent
+    percents = {
+        room_type: _fill_missing(room_type, check_in, check_out, known[room_type])
+        for room_type in room_types
+    }
+
+    discounts = _discounts()
+    nights = (check_out - check_in).days
+    return {
+        room.pk: price_stay(
+            room.price_per_night,
+            check_in,
+            percents[room.room_type],
+            stay_discount(room.room_type, nights, discounts),
+        )
+        for room in rooms
+    }
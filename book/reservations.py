@@ -0,0 +1,164 @@
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Booking, Customer, Room
+from .signals import bookings_status_bulk_changed
+
+LOCK_RETRIES = 5
+
+
+class RoomUnavailable(Exception):
+    """The room already has a confirmed booking or a live hold for those dates."""
+
+
+# -----------------------------------------------------------
+# Locking
+# -----------------------------------------------------------
+def lock_room(room_id):
+    """Serialize reservations for one room until the transaction ends."""
+    if connection.features.has_select_for_update:
+        list(Room.objects.select_for_update().filter(pk=room_id).values_list("pk"))
+    else:
+        # SQLite has no row locks: a no-op write takes the database write
+        # lock, which every other reservation has to wait for
+        Room.objects.filter(pk=room_id).update(number=F("number"))
+
+
+def _with_lock_retries(fn):
+    # SQLite reports lock contention as OperationalError instead of waiting
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return fn()
+        except OperationalError as exc:
+            if "locked" not in str(exc) or attempt == LOCK_RETRIES - 1:
+                raise
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+
+def blocking_bookings(room_id, check_in, check_out, now=None):
+    now = now or timezone.now()
+    return Booking.objects.filter(
+        Q(status="confirmed") | Q(status="pending", hold_expires_at__gt=now),
+        room_id=room_id,
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+    )
+
+
+# -----------------------------------------------------------
+# Reservation lifecycle
+# -----------------------------------------------------------
+def get_customer(email, first_name, last_name="", phone=""):
+    # email is unique ignoring case; get_or_create re-reads if a concurrent insert wins
+    customer, _ = _with_lock_retries(lambda: Customer.objects.get_or_create(
+        email__lower=email.lower(),
+        defaults={
+            "email": email,
+            "first_name": first_name,
+            "last_name": last_name or "",
+            "phone": phone or "",
+        },
+    ))
+    return customer
+
+
+def reserve(room, customer, check_in, check_out, total_amount):
+    """Create a time-limited pending hold, or raise RoomUnavailable."""
+    def attempt():
+        with transaction.atomic():
+            lock_room(room.pk)
+            if blocking_bookings(room.pk, check_in, check_out).exists():
+                raise RoomUnavailable(f"Room {room.number} is not available for these dates")
+            return Booking.objects.create(
+                room=room,
+                customer=customer,
+                check_in=check_in,
+                check_out=check_out,
+                total_amount=total_amount,
+                status="pending",
+                hold_expires_at=timezone.now() + timedelta(minutes=settings.RESERVATION_HOLD_MINUTES),
+            )
+    return _with_lock_retries(attempt)
+
+
+def stay_is_taken(booking, now=None):
+    """
+    Whether another booking holds the room for this booking's stay; call
+    with the room locked. While its own hold is live only confirmed stays
+    count (no other hold can overlap it); once it has lapsed, a newer live
+    hold counts too.
+    """
+    now = now or timezone.now()
+    if booking.hold_expires_at and booking.hold_expires_at > now:
+        others = Booking.objects.filter(
+            room_id=booking.room_id,
+            status="confirmed",
+            check_in__lt=booking.check_out,
+            check_out__gt=booking.check_in,
+        )
+    else:
+        others = blocking_bookings(booking.room_id, booking.check_in, booking.check_out, now)
+    return others.exclude(pk=booking.pk).exists()
+
+
+def confirm(booking, **payment_fields):
+    """
+    Mark a paid booking confirmed. If its hold lapsed and the room was taken
+    meanwhile, the booking is cancelled instead and False is returned.
+    """
+    def attempt():
+        with transaction.atomic():
+            lock_room(booking.room_id)
+            conflict = stay_is_taken(booking)
+            booking.status = "cancelled" if conflict else "confirmed"
+            for name, value in payment_fields.items():
+                setattr(booking, name, value)
+            booking.save(update_fields=["status", *payment_fields])
+            return not conflict
+    return _with_lock_retries(attempt)
+
+
+def release(booking):
+    """Give up a hold (e.g. the payment order could not be created)."""
+    if booking.status == "pending":
+        booking.status = "cancelled"
+        booking.save(update_fields=["status"])
+
+
+def release_expired_holds(now=None, chunk_size=500):
+    """Cancel lapsed pending holds in bulk; returns how many were released."""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            bookings = list(
+                Booking.objects.select_for_update().select_related("room")
+                .filter(status="pending", hold_expires_at__lte=now)
+                .order_by("id")[:chunk_size]
+            )
+            if not bookings:
+                return released
+            Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(status="cancelled")
+            # update() skips post_save, so tell availability/rollups/caches directly
+            bookings_status_bulk_changed.send(sender=Booking, bookings=bookings, status="cancelled")
+        released += len(bookings)
+
+
+def set_status(bookings, status):
+    """Move every booking of a queryset to `status` in one UPDATE; returns how many changed."""
+    with transaction.atomic():
+        bookings = bookings.exclude(status=status)
+        # Locked, so the UPDATE below changes exactly these rows; the receivers
+        # need each booking's previous state and room type
+        changed = list(bookings.select_for_update(of=("self",)).select_related("room"))
+        if not changed:
+            return 0
+        bookings.update(status=status)
+        bookings_status_bulk_changed.send(sender=Booking, bookings=changed, status=status)
+    return len(changed)
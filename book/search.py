@@ -0,0 +1,220 @@
+import re
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Room
+
+
+# -----------------------------------------------------------
+# Query Parser
+#
+# Pulls structured filters out of the free-text `q`:
+#   "suite under 5000 2026-01-10 2026-01-12 sea view"
+#   -> room_type=suite, max_price=5000, dates, terms=["sea", "view"]
+# Filler words ("room 101", "a room with a balcony") are dropped: every
+# term must match, and no room describes itself with them.
+# -----------------------------------------------------------
+ROOM_TYPE_WORDS = {}
+for key, label in Room.ROOM_TYPES:
+    ROOM_TYPE_WORDS[key] = key
+    ROOM_TYPE_WORDS[label.lower()] = key
+
+AMOUNT = r"(?:rs\.?|₹)?\s*(\d+(?:\.\d{1,2})?)"
+DATE_RE = re.compile(r"(?:\b(?:from|to|until)\s+)?\b(\d{4}-\d{2}-\d{2})\b", re.I)
+TYPE_RE = re.compile(r"\btype:(\w+)", re.I)
+PRICE_RANGE_RE = re.compile(r"(?:\bprice:)?" + AMOUNT + r"\s*-\s*" + AMOUNT, re.I)
+PRICE_MAX_RE = re.compile(r"(?:\b(?:under|below|max|upto|up to)\b|<=?)\s*" + AMOUNT, re.I)
+PRICE_MIN_RE = re.compile(r"(?:\b(?:over|above|min|from)\b|>=?)\s*" + AMOUNT, re.I)
+WORD_RE = re.compile(r"\w+")
+FILLER_WORDS = {
+    "a", "an", "the", "and", "or", "with", "for", "in", "on", "of", "at", "by", "near",
+    "room", "rooms", "no", "number", "show", "me", "find", "i", "want", "need", "please",
+    "book", "available", "night", "nights", "per",
+}
+
+
+def parse_query(q):
+    parsed = {
+        "terms": [],
+        "room_type": None,
+        "min_price": None,
+        "max_price": None,
+        "check_in": None,
+        "check_out": None,
+    }
+
+    dates = []
+    for value in DATE_RE.findall(q):
+        try:
+            dates.append(date.fromisoformat(value))
+        except ValueError:
+            pass
+    q = DATE_RE.sub(" ", q)
+    if dates:
+        parsed["check_in"] = dates[0]
+        parsed["check_out"] = dates[1] if len(dates) > 1 else None
+
+    match = TYPE_RE.search(q)
+    if match and match.group(1).lower() in ROOM_TYPE_WORDS:
+        parsed["room_type"] = ROOM_TYPE_WORDS[match.group(1).lower()]
+    q = TYPE_RE.sub(" ", q)
+
+    match = PRICE_RANGE_RE.search(q)
+    if match:
+        low, high = sorted((Decimal(match.group(1)), Decimal(match.group(2))))
+        parsed["min_price"], parsed["max_price"] = low, high
+        q = PRICE_RANGE_RE.sub(" ", q)
+    match = PRICE_MAX_RE.search(q)
+    if match:
+        parsed["max_price"] = Decimal(match.group(1))
+        q = PRICE_MAX_RE.sub(" ", q)
+    match = PRICE_MIN_RE.search(q)
+    if match:
+        parsed["min_price"] = Decimal(match.group(1))
+        q = PRICE_MIN_RE.sub(" ", q)
+
+    for word in WORD_RE.findall(q.lower()):
+        if parsed["room_type"] is None and word in ROOM_TYPE_WORDS:
+            parsed["room_type"] = ROOM_TYPE_WORDS[word]
+        elif word not in ROOM_TYPE_WORDS and word not in FILLER_WORDS:
+            parsed["terms"].append(word)
+    return parsed
+
+
+# -----------------------------------------------------------
+# Index Backends
+#
+# SQLite keeps an FTS5 table (rowid = room id), PostgreSQL a tsvector
+# side table with a GIN index. Both are created by migration 0008.
+# -----------------------------------------------------------
+class SQLiteFTSBackend:
+    table = "book_room_fts"
+
+    def index(self, cursor, room):
+        cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [room.pk])
+        cursor.execute(
+            f"INSERT INTO {self.table} (rowid, number, room_type, description) VALUES (%s, %s, %s, %s)",
+            [room.pk, room.number, room.get_room_type_display(), room.description],
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk])
+
+    def search(self, cursor, terms):
+        # Prefix match on every term; bm25 weights: number, type, description
+        match = " ".join(f'"{term}"*' for term in terms)
+        cursor.execute(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+            f"ORDER BY bm25({self.table}, 5.0, 10.0, 1.0)",
+            [match],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend:
+    table = "book_room_search"
+
+    def index(self, cursor, room):
+        cursor.execute(
+            f"INSERT INTO {self.table} (room_id, document) VALUES "
+            "(%s, setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B')) "
+            "ON CONFLICT (room_id) DO UPDATE SET document = EXCLUDED.document",
+            [room.pk, f"{room.number} {room.get_room_type_display()}", room.description],
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f"DELETE FROM {self.table} WHERE room_id = %s", [pk])
+
+    def search(self, cursor, terms):
+        query = " & ".join(f"{term}:*" for term in terms)
+        cursor.execute(
+            f"SELECT room_id FROM {self.table}, to_tsquery('english', %s) query "
+            "WHERE document @@ query ORDER BY ts_rank(document, query) DESC",
+            [query],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresBackend,
+}
+_backend = {}
+
+
+def get_backend():
+    """Backend for the current database, or None if it has no search index."""
+    vendor = connection.vendor
+    if vendor not in _backend:
+        backend = BACKENDS.get(vendor)
+        if backend and backend.table not in connection.introspection.table_names():
+            backend = None
+        _backend[vendor] = backend() if backend else None
+    return _backend[vendor]
+
+
+def index_room(room):
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.index(cursor, room)
+
+
+def index_rooms(rooms):
+    """Index many rooms over one cursor (bulk imports skip the save signal)."""
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            for room in rooms:
+                backend.index(cursor, room)
+
+
+def remove_room(pk):
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, pk)
+
+
+def rebuild_index():
+    backend = get_backend()
+    if backend is None:
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        for room in Room.objects.only("id", "number", "room_type", "description").iterator():
+            backend.index(cursor, room)
+            count += 1
+    return count
+
+
+# -----------------------------------------------------------
+# Search
+# -----------------------------------------------------------
+def search_rooms(queryset, parsed, limit=200):
+    """Apply parsed filters to `queryset` and return matching rooms, best first."""
+    if parsed["room_type"]:
+        queryset = queryset.filter(room_type=parsed["room_type"])
+    if parsed["min_price"] is not None:
+        queryset = queryset.filter(price_per_night__gte=parsed["min_price"])
+    if parsed["max_price"] is not None:
+        queryset = queryset.filter(price_per_night__lte=parsed["max_price"])
+
+    if not parsed["terms"]:
+        return list(queryset.order_by("price_per_night")[:limit])
+
+    backend = get_backend()
+    if backend is None:
+        # No index on this database: plain substring match, unranked
+        for term in parsed["terms"]:
+            queryset = queryset.filter(Q(number__icontains=term) | Q(description__icontains=term))
+        return list(queryset[:limit])
+
+    # The index only returns ranked ids; filters are applied before slicing
+    with connection.cursor() as cursor:
+        ranked_ids = backend.search(cursor, parsed["terms"])
+    rooms = queryset.in_bulk(ranked_ids)
+    return [rooms[pk] for pk in ranked_ids if pk in rooms][:limit]
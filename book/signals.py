@@ -0,0 +1,97 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from Majestic_Manor.cache import invalidate_on_commit
+from . import availability, images, notifications, pricing, search, tasks
+from .caching import HOMEPAGE, ROOMS, BOOKINGS, RATES, room_group
+from .models import Booking, HomePage, Room, Season, StayDiscount, WeekdayRate
+
+# Sent after a queryset update() changes the status of many bookings at once
+# (post_save does not fire). `bookings` still carry their previous status.
+bookings_status_bulk_changed = Signal()
+
+
+@receiver(pre_save, sender=Booking)
+def remember_notified_state(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Only saves that can change the status or dates pay for the lookup
+    if raw or (update_fields is not None and not {"status", "check_in"} & set(update_fields)):
+        instance._notify_before = False
+    elif instance.pk is None:
+        instance._notify_before = None
+    else:
+        instance._notify_before = Booking.objects.filter(pk=instance.pk).values_list("status", "check_in").first()
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    availability.sync_booking(instance)
+    invalidate_on_commit(BOOKINGS)
+    before = getattr(instance, "_notify_before", False)
+    if before is not False:
+        notifications.booking_changed(instance, before)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    availability.forget_booking(instance)
+    invalidate_on_commit(BOOKINGS)
+
+
+@receiver(bookings_status_bulk_changed, sender=Booking)
+def bookings_bulk_changed(sender, bookings, status, **kwargs):
+    for booking in bookings:
+        availability.sync_booking(booking, status)
+        notifications.booking_changed(booking, (booking.status, booking.check_in), status)
+    invalidate_on_commit(BOOKINGS)
+
+
+@receiver(pre_save, sender=Room)
+@receiver(pre_save, sender=HomePage)
+def dedupe_image_uploads(sender, instance, **kwargs):
+    images.dedupe_uploads(instance)
+
+
+def queue_images(instance):
+    # Derivatives are built by a worker; pages show the original until then
+    for file in images.image_files(instance):
+        tasks.process_images.delay(file.name)
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, **kwargs):
+    queue_images(instance)
+    search.index_room(instance)
+    invalidate_on_commit(ROOMS, room_group(instance.pk))
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    search.remove_room(instance.pk)
+    invalidate_on_commit(ROOMS, room_group(instance.pk))
+
+
+@receiver(post_save, sender=HomePage)
+def homepage_saved(sender, instance, **kwargs):
+    queue_images(instance)
+    invalidate_on_commit(HOMEPAGE)
+
+
+@receiver(post_delete, sender=HomePage)
+def homepage_deleted(sender, **kwargs):
+    invalidate_on_commit(HOMEPAGE)
+
+
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+@receiver(post_save, sender=WeekdayRate)
+@receiver(post_delete, sender=WeekdayRate)
+def rates_changed(sender, **kwargs):
+    # A rule may have moved between room types, so recompute them all
+    pricing.rebuild_calendar()
+    invalidate_on_commit(RATES)
+
+
+@receiver(post_save, sender=StayDiscount)
+@receiver(post_delete, sender=StayDiscount)
+def discounts_changed(sender, **kwargs):
+    invalidate_on_commit(RATES)
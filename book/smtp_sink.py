@@ -0,0 +1,122 @@
+import socketserver
+import threading
+import time
+
+
+# -----------------------------------------------------------
+# Local SMTP sink for tests and mail benchmarks
+#
+# Speaks just enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA,
+# RSET, NOOP, QUIT), keeps every message in memory and counts
+# connections. Point EMAIL_HOST/EMAIL_PORT at it.
+# -----------------------------------------------------------
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.stats["connections"] += 1
+        if server.connect_latency:
+            # A real relay's TCP + TLS + AUTH round trips
+            time.sleep(server.connect_latency)
+        self.reply("220 sink ESMTP")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].decode(errors="replace").upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 sink")
+            elif command == "MAIL":
+                sender, recipients = line[10:].strip().decode(), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(line[8:].strip().decode())
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self.receive(sender, recipients)
+                self.reply("250 OK: queued")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+    def receive(self, sender, recipients):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line == b".\r\n":
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        if self.server.message_latency:
+            time.sleep(self.server.message_latency)
+        with self.server.lock:
+            self.server.stats["messages"] += 1
+            self.server.messages.append((sender, recipients, b"".join(lines)))
+
+
+class SmtpSinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SmtpSink:
+    def __init__(self, host="127.0.0.1", port=0, connect_latency=0.0, message_latency=0.0):
+        self.server = SmtpSinkServer((host, port), SmtpSinkHandler)
+        self.server.connect_latency = connect_latency
+        self.server.message_latency = message_latency
+        self.server.lock = threading.Lock()
+        self.server.messages = []
+        self.server.stats = {"connections": 0, "messages": 0}
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def stats(self):
+        return self.server.stats
+
+    @property
+    def messages(self):
+        return self.server.messages
+
+    def settings(self):
+        """override_settings() arguments that send Django mail here."""
+        return {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": self.host,
+            "EMAIL_PORT": self.port,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+            "EMAIL_USE_TLS": False,
+            "EMAIL_USE_SSL": False,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
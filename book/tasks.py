@@ -0,0 +1,28 @@
+from django.conf import settings
+
+from tasks.queue import task
+from . import images, notifications
+
+
+@task(queue="images", batch_size=20)
+def process_images(calls):
+    """Derivatives for stored images queued by book.signals; one call per image name."""
+    # A room saved several times in a row queues its image each time
+    for name in dict.fromkeys(name for name, in calls):
+        images.process_image(name)
+
+
+@task(queue="mail", batch_size=settings.NOTIFY_BATCH_SIZE)
+def send_notifications(calls):
+    """Booking emails queued by book.notifications: [kind, booking_id, check_in] per call."""
+    notifications.send(calls)
+
+
+# Ahead of emails and images: a guest is waiting on the confirmation
+@task(queue="payments", priority=10, batch_size=100)
+def apply_payment_events(calls):
+    """Queued by the webhook view once per stored event; one run applies every queued event."""
+    from .webhooks import process_batch
+
+    while process_batch():
+        pass
@@ -0,0 +1,53 @@
+from django import template
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils.html import format_html, format_html_join
+
+from book import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, sizes="100vw", alt="", css_class="", loading="lazy", assets=None):
+    """
+    <picture> with AVIF/WebP srcsets for a Room/HomePage image, falling back to
+    the original. Usage: {% responsive_image room.main_image sizes="33vw" css_class="card-img-top" %}
+    Pages showing many images pass assets=images.assets_for(rooms) so the
+    lookups are batched instead of one per image.
+    """
+    if not image:
+        return ""
+
+    if isinstance(image, FieldFile):
+        src = image.url
+        asset = assets.get(image.name) if assets else images.get_asset(image.name)
+        sources = images.srcsets(asset) if asset else {}
+        dimensions = (asset.width, asset.height) if asset else None
+    else:
+        # CloudinaryField: Cloudinary renders and caches the derivatives itself
+        src = image.url
+        sources = {
+            fmt: ", ".join(
+                f"{image.build_url(width=width, crop='limit', fetch_format=fmt, quality='auto')} {width}w"
+                for width in settings.IMAGE_DERIVATIVE_WIDTHS
+            )
+            for fmt in settings.IMAGE_DERIVATIVE_FORMATS
+        }
+        dimensions = None
+
+    img = format_html(
+        '<img src="{}" alt="{}" class="{}" loading="{}"{}>',
+        src, alt, css_class, loading,
+        format_html(' width="{}" height="{}"', *dimensions) if dimensions else "",
+    )
+    if not sources:
+        return img
+    return format_html(
+        "<picture>{}{}</picture>",
+        format_html_join(
+            "", '<source type="{}" srcset="{}" sizes="{}">',
+            ((images.MIME_TYPES[fmt], srcset, sizes) for fmt, srcset in sources.items()),
+        ),
+        img,
+    )
@@ -1,3 +1,936 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.smtp import EmailBackend
+from django.db import IntegrityError, connection, connections, transaction
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from razorpay.errors import BadRequestError, ServerError
+
+from Majestic_Manor.cache import group_version
+from tasks import queue
+from tasks.models import Task
+from . import (
+    archive, availability, benchmarks, images, inventory, notifications, payments, pricing, reservations, search, tasks,
+    webhooks,
+)
+from .caching import BOOKINGS, room_cards
+from .fake_gateway import FakeGateway
+from .models import (
+    Room, Customer, Booking, ArchivedBooking, BookingHistory, PaymentEvent, RateCalendar, Season, StayDiscount, WeekdayRate,
+)
+from .smtp_sink import SmtpSink
+
+
+# -----------------------------------------------------------
+# Query-plan regression suite
+#
+# Captures EXPLAIN for the Booking hot paths and fails when one of
+# them falls back to a full scan of book_booking.
+# -----------------------------------------------------------
+FULL_SCAN = {
+    # SQLite: "SEARCH ... USING INDEX" is fine, a bare "SCAN book_booking" is not
+    "sqlite": re.compile(r"\bSCAN book_booking\b"),
+    "postgresql": re.compile(r"Seq Scan on book_booking\b"),
+}
+
+
+class BookingQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = Room.objects.create(number="101", room_type="single", price_per_night="1000.00")
+        customer = Customer.objects.create(first_name="Test", email="test@example.com")
+        today = date.today()
+        Booking.objects.bulk_create([
+            Booking(
+                room=room,
+                customer=customer,
+                check_in=today + timedelta(days=i),
+                check_out=today + timedelta(days=i + 1),
+                total_amount="1000.00",
+                status=("confirmed", "pending", "cancelled", "failed")[i % 4],
+                razorpay_order_id=f"order_{i}",
+            )
+            for i in range(200)
+        ])
+
+    def setUp(self):
+        if connection.vendor not in FULL_SCAN:
+            self.skipTest(f"no plan checks for {connection.vendor}")
+        if connection.vendor == "postgresql":
+            # Tiny test tables are always cheaper to seq-scan; force the
+            # planner to show whether a usable index exists at all.
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, FULL_SCAN[connection.vendor], f"full table scan:\n{plan}")
+
+    def test_availability_window(self):
+        self.assertUsesIndex(Booking.objects.filter(
+            status="confirmed", check_out__gt=date.today(),
+        ).values_list("id", "room_id", "check_in", "check_out"))
+
+    def test_payment_lookup_by_order_id(self):
+        self.assertUsesIndex(Booking.objects.filter(razorpay_order_id="order_7"))
+
+    def test_dashboard_status_newest_first(self):
+        self.assertUsesIndex(Booking.objects.filter(status="confirmed").order_by("-id"))
+
+    def test_dashboard_pending_count(self):
+        self.assertUsesIndex(Booking.objects.filter(status="pending").values("id"))
+
+
+# -----------------------------------------------------------
+# Availability index: intervals, day buckets and rebuilds
+# -----------------------------------------------------------
+class AvailabilityIndexTests(SimpleTestCase):
+    day = date(2026, 6, 1)
+
+    def nights(self, first, last):
+        return self.day + timedelta(days=first), self.day + timedelta(days=last)
+
+    def test_removing_a_stay_repaints_overlapping_ones(self):
+        index = availability.AvailabilityIndex()
+        index.load([(1, 10, *self.nights(0, 4)), (2, 10, *self.nights(2, 6)), (3, 20, *self.nights(3, 5))])
+        self.assertEqual(sorted(index.busy_room_ids(*self.nights(3, 4))), [10, 20])
+
+        index.discard(1)
+        # Nights 2-3 are still booked by stay 2; nights 0-1 are free again
+        self.assertTrue(index.is_free(10, *self.nights(0, 2)))
+        self.assertFalse(index.is_free(10, *self.nights(2, 3)))
+        self.assertEqual(index.busy_room_ids(*self.nights(0, 2)), [])
+
+        # Re-adding a booking moves it rather than painting it twice
+        index.add(2, 10, *self.nights(10, 11))
+        self.assertTrue(index.is_free(10, *self.nights(0, 10)))
+        self.assertFalse(index.is_free(10, *self.nights(10, 11)))
+        index.discard(2)
+        self.assertEqual(index.busy_room_ids(*self.nights(0, 20)), [20])
+        self.assertTrue(index.is_free(99, *self.nights(0, 20)))  # never-seen room
+
+    def test_empty_or_unknown_bookings_change_nothing(self):
+        index = availability.AvailabilityIndex()
+        index.load([(1, 10, *self.nights(3, 3))])
+        index.discard(42)
+        self.assertEqual(index.busy_room_ids(*self.nights(0, 10)), [])
+
+    def test_concurrent_stale_reads_rebuild_once(self):
+        availability._index.reset()
+        self.addCleanup(availability._index.reset)
+        barrier = threading.Barrier(8)
+        calls = []
+
+        def rebuild():
+            calls.append(1)
+            time.sleep(0.05)
+            availability._index.load([])
+
+        def reader():
+            barrier.wait()
+            availability.get_index()
+
+        with mock.patch.object(availability, "rebuild", rebuild):
+            threads = [threading.Thread(target=reader) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+
+
+class AvailabilitySyncTests(TestCase):
+    def test_bookings_reach_the_index_when_they_commit(self):
+        room = Room.objects.create(number="601", room_type="single", price_per_night="1500.00")
+        customer = Customer.objects.create(first_name="Kavya", email="kavya@example.com")
+        stay = (date.today() + timedelta(days=3), date.today() + timedelta(days=5))
+        index = availability.rebuild()
+        self.addCleanup(index.reset)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(
+                room=room, customer=customer, status="confirmed", check_in=stay[0], check_out=stay[1], total_amount="3000.00",
+            )
+            self.assertTrue(index.is_free(room.pk, *stay))  # not committed yet
+        self.assertFalse(index.is_free(room.pk, *stay))
+
+        # A change that rolls back never reaches the index
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    booking.status = "cancelled"
+                    booking.save()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertFalse(index.is_free(room.pk, *stay))
+
+
+# -----------------------------------------------------------
+# Room search: query parser and the full-text index
+# -----------------------------------------------------------
+class SearchQueryTests(SimpleTestCase):
+    def test_filters_are_pulled_out_of_the_text(self):
+        parsed = search.parse_query("Suite with a sea view under ₹5000 from 2026-01-10 to 2026-01-12")
+        self.assertEqual(parsed, {
+            "terms": ["sea", "view"], "room_type": "suite", "min_price": None, "max_price": Decimal("5000"),
+            "check_in": date(2026, 1, 10), "check_out": date(2026, 1, 12),
+        })
+        parsed = search.parse_query("type:double price:2000-1500 balcony")
+        self.assertEqual(
+            (parsed["room_type"], parsed["min_price"], parsed["max_price"], parsed["terms"]),
+            ("double", Decimal("1500"), Decimal("2000"), ["balcony"]),
+        )
+
+    def test_filler_words_are_not_required_terms(self):
+        self.assertEqual(search.parse_query("room 101")["terms"], ["101"])
+        self.assertEqual(search.parse_query("show me a room near the pool")["terms"], ["pool"])
+        self.assertEqual(search.parse_query("rooms")["terms"], [])
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sea = Room.objects.create(number="101", room_type="suite", price_per_night="5000.00",
+                                      description="Corner suite with a sea view and balcony")
+        cls.garden = Room.objects.create(number="102", room_type="double", price_per_night="2500.00",
+                                         description="Quiet double facing the garden")
+
+    def setUp(self):
+        if search.get_backend() is None:
+            self.skipTest(f"no search index on {connection.vendor}")
+
+    def find(self, q):
+        return [room.number for room in search.search_rooms(Room.objects.all(), search.parse_query(q))]
+
+    def test_natural_queries_match(self):
+        self.assertEqual(self.find("room 101"), ["101"])
+        self.assertEqual(self.find("a room with a sea view"), ["101"])
+        self.assertEqual(self.find("gard"), ["102"])  # prefix match
+        self.assertEqual(self.find("rooms under 3000"), ["102"])
+        self.assertEqual(self.find("room"), ["102", "101"])  # no terms: cheapest first
+
+    def test_index_follows_saves_and_deletes(self):
+        self.garden.description = "Quiet double facing the orchard"
+        self.garden.save()
+        self.assertEqual(self.find("orchard"), ["102"])
+        self.assertEqual(self.find("garden"), [])
+
+        self.sea.delete()
+        self.assertEqual(self.find("sea"), [])
+        with connection.cursor() as cursor:
+            self.assertEqual(search.get_backend().search(cursor, ["sea"]), [])
+
+
+# -----------------------------------------------------------
+# Room inventory: streamed CSV/JSONL export and chunked upsert import
+# -----------------------------------------------------------
+@override_settings(TASKS_EAGER=False)
+class InventoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Room.objects.create(number="101", room_type="single", price_per_night="1000.00", description="Garden side")
+
+    def import_csv(self, text, **kwargs):
+        return inventory.import_rooms(StringIO(text), "csv", **kwargs)
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        report = self.import_csv(
+            "number,room_type,price_per_night\n"
+            "201,suite,5000\n"
+            "202,penthouse,9000\n"
+            "203,double,cheap\n"
+            "201,single,100\n"
+            "204,double,2500\n"
+        )
+        self.assertEqual(str(report), "2 created, 0 updated, 3 rejected")
+        self.assertEqual([line for line, _ in report.errors], [3, 4, 5])
+        self.assertIn("room_type", report.errors[0][1])
+        self.assertIn("price_per_night", report.errors[1][1])
+        self.assertIn("line 2", report.errors[2][1])
+        self.assertEqual(sorted(Room.objects.values_list("number", flat=True)), ["101", "201", "204"])
+
+        with self.assertRaisesMessage(ValueError, "missing price_per_night"):
+            self.import_csv("number,room_type\n301,single\n")
+
+    def test_upsert_in_chunks_keeps_columns_the_file_leaves_out(self):
+        rows = [{"number": "101", "room_type": "double", "price_per_night": "1200.00"}]
+        rows += [{"number": f"2{i:02}", "room_type": "single", "price_per_night": "900"} for i in range(4)]
+        with mock.patch.object(inventory, "_write_chunk", wraps=inventory._write_chunk) as write:
+            report = inventory.import_rooms(StringIO("".join(json.dumps(row) + "\n" for row in rows)), "jsonl", chunk_size=2)
+
+        self.assertEqual(write.call_count, 3)
+        self.assertEqual((report.created, report.updated, report.errors), (4, 1, []))
+        room = Room.objects.get(number="101")
+        self.assertEqual((room.room_type, room.price_per_night, room.description), ("double", Decimal("1200.00"), "Garden side"))
+        # The import bypasses save(); the search index is updated all the same
+        self.assertEqual([r.number for r in search.search_rooms(Room.objects.all(), search.parse_query("200"))], ["200"])
+
+        report = inventory.import_rooms(StringIO(json.dumps(rows[0]) + "\n"), "jsonl", dry_run=True)
+        self.assertEqual(str(report), "0 created, 1 updated, 0 rejected")
+
+    def test_imported_images_are_queued_for_derivatives(self):
+        self.import_csv(
+            "number,room_type,price_per_night,main_image\n"
+            "201,suite,5000,rooms/sea.jpg\n"
+            "202,suite,5000,rooms/sea.jpg\n"
+            "203,single,900,\n"
+        )
+        queued = Task.objects.filter(name="book.tasks.process_images").values_list("args", flat=True)
+        self.assertEqual(list(queued), [["rooms/sea.jpg"]])
+
+    def test_export_round_trips_through_import(self):
+        Room.objects.create(number="099", room_type="suite", price_per_night="5000.00", available=False)
+        exported = "".join(inventory.export_rows(Room.objects.all(), "csv", chunk_size=1))
+        self.assertEqual(exported.splitlines(), [
+            "number,room_type,price_per_night,description,available,main_image",
+            "099,suite,5000.00,,false,",
+            "101,single,1000.00,Garden side,true,",
+        ])
+        records = [json.loads(line) for line in inventory.export_rows(Room.objects.all(), "jsonl") for line in line.splitlines()]
+        self.assertEqual([(r["number"], r["available"]) for r in records], [("099", False), ("101", True)])
+
+        Room.objects.all().delete()
+        self.assertEqual(str(self.import_csv(exported)), "2 created, 0 updated, 0 rejected")
+        self.assertFalse(Room.objects.get(number="099").available)
+
+
+# -----------------------------------------------------------
+# Pricing: rate rules, the calendar and its fallback, rounding
+# -----------------------------------------------------------
+class PricingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.suite = Room.objects.create(number="701", room_type="suite", price_per_night="10000.00")
+        cls.double = Room.objects.create(number="702", room_type="double", price_per_night="3000.00")
+        # Next Monday, so the weekdays of a stay are known
+        today = date.today()
+        cls.monday = today + timedelta(days=7 - today.weekday())
+
+    def setUp(self):
+        # Cached discount tiers; the RATES bump waits for a commit that never comes here
+        cache.clear()
+
+    def night(self, offset):
+        return self.monday + timedelta(days=offset)
+
+    def test_weekday_rate_stacks_on_the_latest_season(self):
+        Season.objects.create(room_type="suite", name="Summer", start_date=self.night(0), end_date=self.night(13), rate_percent="150")
+        # Starts later, so it wins where they overlap
+        Season.objects.create(room_type="suite", name="Festival", start_date=self.night(3), end_date=self.night(5), rate_percent="200")
+        WeekdayRate.objects.create(room_type="suite", weekday=4, rate_percent="110")  # Friday
+
+        quote = pricing.quote(self.suite, self.night(2), self.night(6))  # Wed..Sat nights
+        self.assertEqual(quote.nightly, [Decimal("15000.00"), Decimal("20000.00"), Decimal("22000.00"), Decimal("20000.00")])
+        # Other room types keep the base price
+        self.assertEqual(pricing.quote(self.double, self.night(2), self.night(6)).nightly, [Decimal("3000.00")] * 4)
+
+    def test_longest_discount_tier_applies_type_specific_first(self):
+        StayDiscount.objects.create(min_nights=3, percent_off="5")
+        StayDiscount.objects.create(min_nights=7, percent_off="10")
+        StayDiscount.objects.create(room_type="suite", min_nights=3, percent_off="8")
+
+        self.assertEqual(pricing.stay_discount("suite", 2), 0)
+        self.assertEqual(pricing.stay_discount("suite", 3), Decimal("8"))
+        self.assertEqual(pricing.stay_discount("double", 3), Decimal("5"))
+        self.assertEqual(pricing.stay_discount("suite", 7), Decimal("10"))
+
+        quote = pricing.quote(self.double, self.night(0), self.night(3))
+        self.assertEqual((quote.subtotal, quote.discount, quote.total), (Decimal("9000.00"), Decimal("450.00"), Decimal("8550.00")))
+
+    def test_nights_past_the_calendar_are_priced_from_the_rules(self):
+        Season.objects.create(room_type="double", name="Peak", start_date=self.night(0), end_date=self.night(30), rate_percent="120")
+        stay = (self.night(0), self.night(4))
+        expected = pricing.quote(self.double, *stay)
+
+        # Only the first two nights precomputed
+        RateCalendar.objects.filter(night__gte=self.night(2)).delete()
+        self.assertEqual(RateCalendar.objects.filter(room_type="double", night__gte=self.night(0), night__lt=self.night(4)).count(), 2)
+        self.assertEqual(pricing.quote(self.double, *stay), expected)
+        self.assertEqual(pricing.quote_many([self.double], *stay)[self.double.pk], expected)
+        self.assertEqual(expected.nightly, [Decimal("3600.00")] * 4)
+
+    def test_paise_round_half_up(self):
+        self.assertEqual(pricing.to_paise("1999.995"), 200000)
+        self.assertEqual(pricing.to_paise("1999.994"), 199999)
+        self.assertEqual(pricing.to_paise(Decimal("0.005")), 1)
+        self.assertEqual(pricing.to_paise(2500), 250000)
+        # Per-night prices round half up too, before they are summed
+        self.assertEqual(pricing.price_stay("10.00", self.night(0), [Decimal("33.35")]).nightly, [Decimal("3.34")])
+
+
+# -----------------------------------------------------------
+# Payment gateway client against the local fake gateway
+# -----------------------------------------------------------
+class PaymentGatewayTests(SimpleTestCase):
+    def gateway(self, **kwargs):
+        gateway = FakeGateway(**kwargs).start()
+        self.addCleanup(gateway.stop)
+        settings = override_settings(
+            RAZORPAY_BASE_URL=gateway.url,
+            RAZORPAY_BREAKER_THRESHOLD=3,
+            RAZORPAY_RETRY_BACKOFF=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        payments.reset()
+        self.addCleanup(payments.reset)
+        return gateway
+
+    def test_client_is_reused(self):
+        gateway = self.gateway()
+        order = payments.create_order(150000)
+        self.assertEqual(payments.fetch_order(order["id"])["amount"], 150000)
+        self.assertIs(payments.get_client(), payments.get_client())
+        self.assertEqual(gateway.stats["requests"], 2)
+
+    def test_idempotent_calls_are_retried(self):
+        gateway = self.gateway(error_rate=1.0)
+        with self.assertRaises(ServerError):
+            payments.fetch_order("order_missing")
+        self.assertEqual(gateway.stats["requests"], 3)  # 1 + RAZORPAY_MAX_RETRIES
+
+    def test_order_creation_is_not_retried(self):
+        gateway = self.gateway(error_rate=1.0)
+        with self.assertRaises(ServerError):
+            payments.create_order(150000)
+        self.assertEqual(gateway.stats["requests"], 1)
+
+    def test_breaker_fails_fast_when_open(self):
+        gateway = self.gateway(error_rate=1.0)
+        for _ in range(3):
+            with self.assertRaises(ServerError):
+                payments.create_order(150000)
+        with self.assertRaises(payments.GatewayUnavailable):
+            payments.create_order(150000)
+        self.assertEqual(gateway.stats["requests"], 3)
+
+    def test_half_open_probe_that_raises_a_non_gateway_error_frees_the_breaker(self):
+        breaker = payments.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "half-open")
+
+        def bad_request():
+            raise BadRequestError("Authentication failed")
+
+        with mock.patch.object(payments, "get_breaker", return_value=breaker):
+            with self.assertRaises(BadRequestError):
+                payments.call(bad_request)
+            # The next request probes again instead of failing fast forever
+            self.assertEqual(payments.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+
+# -----------------------------------------------------------
+# Payment webhooks: ingest -> queued task -> bookings
+# -----------------------------------------------------------
+@override_settings(RAZORPAY_WEBHOOK_SECRET="whsec")
+class PaymentWebhookTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(number="501", room_type="double", price_per_night="4000.00")
+        cls.customer = Customer.objects.create(first_name="Ravi", email="ravi@example.com")
+
+    def book(self, order_id, days_ahead=10):
+        check_in = date.today() + timedelta(days=days_ahead)
+        return Booking.objects.create(
+            room=self.room, customer=self.customer, check_in=check_in, check_out=check_in + timedelta(days=1),
+            total_amount="4000.00", razorpay_order_id=order_id, hold_expires_at=timezone.now() + timedelta(minutes=15),
+        )
+
+    def post(self, event_id, event, order_id, payment_id="pay_1"):
+        body = json.dumps({
+            "event": event, "payload": {"payment": {"entity": {"id": payment_id, "order_id": order_id}}},
+        }).encode()
+        signature = hmac.new(b"whsec", body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse("book:payment_webhook"), body, content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=signature, HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_duplicate_deliveries_are_stored_once(self):
+        booking = self.book("order_dup")
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self.assertEqual(self.post("evt_dup", "payment.captured", "order_dup").status_code, 200)
+        self.assertEqual(PaymentEvent.objects.filter(event_id="evt_dup").count(), 1)
+
+        tasks.apply_payment_events([[]])
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, "confirmed")
+        self.assertIsNotNone(PaymentEvent.objects.get(event_id="evt_dup").processed_at)
+
+    def test_replayed_confirmation_is_applied_once(self):
+        booking = self.book("order_replay")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post("evt_captured", "payment.captured", "order_replay", "pay_first")
+            tasks.apply_payment_events([[]])
+            # order.paid for the same payment, then a late payment.failed
+            self.post("evt_paid", "order.paid", "order_replay", "pay_second")
+            self.post("evt_failed", "payment.failed", "order_replay", "pay_third")
+            tasks.apply_payment_events([[]])
+
+        booking.refresh_from_db()
+        self.assertEqual((booking.status, booking.razorpay_payment_id), ("confirmed", "pay_first"))
+        self.assertEqual(PaymentEvent.objects.filter(processed_at__isnull=True).count(), 0)
+        # One confirmation email, not one per event
+        self.assertEqual(Task.objects.filter(name="book.tasks.send_notifications", args__0="confirmation").count(), 1)
+
+    def test_poison_event_is_isolated_from_its_batch(self):
+        good = [self.book(f"order_ok{i}", days_ahead=10 + 2 * i) for i in range(2)]
+        self.book("order_bad", days_ahead=20)
+        PaymentEvent.objects.create(event_id="evt_ok0", event_type="payment.captured", order_id="order_ok0", payload="{}")
+        poison = PaymentEvent.objects.create(event_id="evt_bad", event_type="payment.captured", order_id="order_bad", payload="not json")
+        PaymentEvent.objects.create(event_id="evt_ok1", event_type="payment.captured", order_id="order_ok1", payload="{}")
+
+        self.assertEqual(webhooks.process_batch(10), 3)
+        for booking in good:
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, "confirmed")
+        poison.refresh_from_db()
+        self.assertEqual((poison.attempts, poison.processed_at), (1, None))
+        self.assertIn("JSONDecodeError", poison.error)
+
+        # Retried on its own until MAX_ATTEMPTS, then left for a person to look at
+        while webhooks.process_batch(10):
+            pass
+        poison.refresh_from_db()
+        self.assertEqual(poison.attempts, webhooks.MAX_ATTEMPTS)
+        self.assertEqual(PaymentEvent.objects.filter(processed_at__isnull=True).count(), 1)
+
+    def test_late_capture_loses_to_a_newer_hold(self):
+        lapsed = self.book("order_late")
+        Booking.objects.filter(pk=lapsed.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        newer = self.book("order_newer")
+        PaymentEvent.objects.create(event_id="evt_late", event_type="payment.captured", order_id="order_late", payload="{}")
+
+        self.assertEqual(webhooks.process_batch(10), 1)
+        lapsed.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual((lapsed.status, newer.status), ("cancelled", "pending"))
+        self.assertIn("taken", PaymentEvent.objects.get(event_id="evt_late").error)
+
+
+# -----------------------------------------------------------
+# Reservation stress test: concurrent holds never double-book
+# -----------------------------------------------------------
+class ReservationConcurrencyTests(TransactionTestCase):
+    THREADS = 12
+
+    def setUp(self):
+        self.room = Room.objects.create(number="301", room_type="double", price_per_night="2500.00")
+        self.today = date.today()
+
+    def reserve_concurrently(self, stays):
+        barrier = threading.Barrier(len(stays))
+        outcomes = []
+
+        def worker(i, check_in, check_out):
+            try:
+                barrier.wait()
+                customer = reservations.get_customer(f"guest{i % 3}@example.com", "Guest")
+                reservations.reserve(self.room, customer, check_in, check_out, "2500.00")
+                outcomes.append("held")
+            except reservations.RoomUnavailable:
+                outcomes.append("rejected")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i, *stay)) for i, stay in enumerate(stays)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_same_dates_only_one_hold(self):
+        stay = (self.today + timedelta(days=10), self.today + timedelta(days=12))
+        outcomes = self.reserve_concurrently([stay] * self.THREADS)
+
+        self.assertEqual(outcomes.count("held"), 1)
+        self.assertEqual(outcomes.count("rejected"), self.THREADS - 1)
+        self.assertEqual(Booking.objects.filter(room=self.room, status="pending").count(), 1)
+        self.assertEqual(Customer.objects.count(), 3)
+
+    def test_overlapping_stays_never_overlap(self):
+        base = self.today + timedelta(days=20)
+        stays = [(base + timedelta(days=i % 4), base + timedelta(days=i % 4 + 2)) for i in range(self.THREADS)]
+        self.reserve_concurrently(stays)
+
+        held = list(Booking.objects.filter(room=self.room, status="pending").order_by("check_in"))
+        for first, second in zip(held, held[1:]):
+            self.assertLessEqual(first.check_out, second.check_in)
+
+    def test_expired_holds_are_released(self):
+        customer = reservations.get_customer("late@example.com", "Late")
+        stay = (self.today + timedelta(days=5), self.today + timedelta(days=6))
+        hold = reservations.reserve(self.room, customer, *stay, "2500.00")
+        Booking.objects.filter(pk=hold.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(reservations.release_expired_holds(), 1)
+        self.assertEqual(Booking.objects.get(pk=hold.pk).status, "cancelled")
+        reservations.reserve(self.room, customer, *stay, "2500.00")  # room is free again
+
+    def test_late_payment_loses_to_a_newer_hold(self):
+        stay = (self.today + timedelta(days=7), self.today + timedelta(days=9))
+        first = reservations.reserve(self.room, reservations.get_customer("a@example.com", "A"), *stay, "5000.00")
+        Booking.objects.filter(pk=first.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        second = reservations.reserve(self.room, reservations.get_customer("b@example.com", "B"), *stay, "5000.00")
+
+        self.assertFalse(reservations.confirm(Booking.objects.get(pk=first.pk)))
+        self.assertEqual(Booking.objects.get(pk=first.pk).status, "cancelled")
+        self.assertEqual(Booking.objects.get(pk=second.pk).status, "pending")
+
+    def test_customer_email_ignores_case(self):
+        customer = reservations.get_customer("Meera@Example.com", "Meera")
+        self.assertEqual(reservations.get_customer("meera@example.COM", "M").pk, customer.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Customer.objects.create(first_name="Meera", email="MEERA@example.com")
+
+
+# -----------------------------------------------------------
+# Benchmark suite: a tiny run must hit every endpoint without errors
+# and stay within the stored baseline's query counts
+# -----------------------------------------------------------
+class BenchmarkSuiteTests(TestCase):
+    BASELINE = settings.BASE_DIR / "benchmarks" / "baseline.json"
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.generate(300)
+
+    def setUp(self):
+        # The index is per process; don't leave this test's rooms in it
+        self.addCleanup(availability.get_index().reset)
+
+    def test_query_counts_within_baseline(self):
+        baseline = benchmarks.load_baseline(self.BASELINE, "1k")
+        with FakeGateway() as gateway, override_settings(RAZORPAY_BASE_URL=gateway.url):
+            payments.reset()
+            self.addCleanup(payments.reset)
+            results = {
+                "micro": benchmarks.micro_benchmarks(iterations=5),
+                "load": benchmarks.load_test(requests=5, concurrency=1),
+            }
+
+        self.assertEqual(set(results["load"]), set(baseline["load"]))
+        self.assertEqual(benchmarks.compare(results, baseline, timings=False), [])
+
+    def test_regressions_are_reported(self):
+        baseline = {"load": {"home": {"throughput": 100, "p50_ms": 10, "p99_ms": 50, "queries_max": 2, "errors": 0}}}
+        results = {"load": {"home": {"throughput": 40, "p50_ms": 12, "p99_ms": 50, "queries_max": 12, "errors": 0}}}
+
+        self.assertEqual(len(benchmarks.compare(results, baseline, tolerance=0.5)), 2)
+        self.assertEqual(len(benchmarks.compare(results, baseline, timings=False)), 1)
+
+
+# -----------------------------------------------------------
+# Booking notifications: queued with the change, sent in batches
+# -----------------------------------------------------------
+@override_settings(TASKS_EAGER=False)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(number="301", room_type="suite", price_per_night="9000.00")
+        cls.customer = Customer.objects.create(first_name="Asha", email="asha@example.com")
+
+    def book(self, days_ahead, status="pending"):
+        check_in = date.today() + timedelta(days=days_ahead)
+        return Booking.objects.create(
+            room=self.room, customer=self.customer, status=status,
+            check_in=check_in, check_out=check_in + timedelta(days=1), total_amount="9000.00",
+        )
+
+    def send_due(self):
+        with SmtpSink() as sink, override_settings(**sink.settings()):
+            token, claimed = queue.claim("test", ["mail"], batch_size=50)
+            queue.run(token, claimed)
+        return sink
+
+    def test_confirmations_share_one_smtp_connection(self):
+        for days_ahead in (1, 2, 3):
+            reservations.confirm(self.book(days_ahead))
+        sink = self.send_due()
+
+        self.assertEqual(sink.stats, {"connections": 1, "messages": 3})
+        self.assertIn(b"is confirmed", sink.messages[0][2])
+        self.assertEqual(sink.messages[0][1], ["<asha@example.com>"])
+
+    def test_failed_batch_is_not_mailed_twice(self):
+        for days_ahead in (1, 2, 3):
+            reservations.confirm(self.book(days_ahead))
+        real_send = EmailBackend._send
+        attempts = []
+
+        def flaky_send(backend, message):
+            attempts.append(message)
+            if len(attempts) == 2:
+                raise OSError("connection reset")
+            return real_send(backend, message)
+
+        with mock.patch.object(EmailBackend, "_send", flaky_send):
+            sink = self.send_due()
+
+        # The first guest was mailed before the failure; only the other two are retried
+        self.assertEqual(sink.stats["messages"], 3)
+        self.assertEqual(len(attempts), 4)
+        self.assertFalse(Task.objects.filter(queue="mail", status="queued", run_at__lte=timezone.now()).exists())
+
+    def test_reminder_is_scheduled_and_dropped_after_cancellation(self):
+        booking = self.book(10)
+        reservations.confirm(booking)
+        reminder = Task.objects.get(args=["reminder", booking.pk, booking.check_in.isoformat()])
+        self.assertEqual(reminder.run_at, notifications.reminder_time(booking.check_in))
+
+        reservations.set_status(Booking.objects.filter(pk=booking.pk), "cancelled")
+        Task.objects.filter(pk=reminder.pk).update(run_at=timezone.now())
+        sink = self.send_due()
+
+        # The confirmation and the reminder went stale before the batch ran
+        self.assertEqual(sink.stats["messages"], 1)
+        self.assertIn(b"has been cancelled", sink.messages[0][2])
+
+    def test_lapsed_hold_is_not_mailed(self):
+        reservations.release(self.book(5))
+        self.assertFalse(Task.objects.filter(queue="mail").exists())
+
+
+class CacheInvalidationTests(TestCase):
+    def test_booking_groups_are_bumped_on_commit(self):
+        room = Room.objects.create(number="601", room_type="single", price_per_night="1500.00")
+        customer = Customer.objects.create(first_name="Kiran", email="kiran@example.com")
+        version = group_version(BOOKINGS)
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                room=room, customer=customer, check_in=date.today(),
+                check_out=date.today() + timedelta(days=1), total_amount="1500.00",
+            )
+            # Still uncommitted: other requests must keep the old version
+            self.assertEqual(group_version(BOOKINGS), version)
+        self.assertGreater(group_version(BOOKINGS), version)
+
+
+# -----------------------------------------------------------
+# Responsive images: derivatives, content-hash dedupe, <picture> output
+# -----------------------------------------------------------
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=[320, 640], IMAGE_DERIVATIVE_FORMATS=["webp"])
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        cache.clear()
+
+    def photo(self, seed=0):
+        buffer = BytesIO()
+        pixels = random.Random(seed).randbytes(500 * 300 * 3)
+        Image.frombytes("RGB", (500, 300), pixels).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def room(self, number, content):
+        return Room.objects.create(
+            number=number, room_type="single", price_per_night="1000.00",
+            main_image=SimpleUploadedFile(f"room{number}.png", content),
+        )
+
+    def test_derivatives_stop_at_the_original_width(self):
+        name = self.room("701", self.photo()).main_image.name
+        asset = images.process_image(name)
+
+        self.assertEqual((asset.width, asset.height), (500, 300))
+        self.assertEqual([(v["format"], v["width"]) for v in asset.variants], [("webp", 320), ("webp", 500)])
+        for variant in asset.variants:
+            self.assertTrue(default_storage.exists(variant["name"]))
+        self.assertIsNone(images.process_image(name))  # already recorded
+
+    def test_identical_content_is_stored_and_encoded_once(self):
+        first = self.room("702", self.photo())
+        asset = images.process_image(first.main_image.name)
+
+        # Same bytes uploaded again point at the stored original
+        second = self.room("703", self.photo())
+        self.assertEqual(second.main_image.name, first.main_image.name)
+
+        # Same bytes stored under another name reuse the derivatives
+        copy = default_storage.save("copy.png", ContentFile(self.photo()))
+        with mock.patch.object(images, "build_derivatives") as build:
+            twin = images.process_image(copy)
+        build.assert_not_called()
+        self.assertEqual((twin.content_hash, twin.variants), (asset.content_hash, asset.variants))
+
+    def test_picture_sources_and_fallback(self):
+        room = self.room("704", self.photo())
+        render = Template(
+            '{% load responsive_images %}{% responsive_image room.main_image sizes="33vw" alt="Room" %}'
+        ).render
+        # No asset yet: the original alone, without dimensions
+        self.assertHTMLEqual(
+            render(Context({"room": room})), f'<img src="{room.main_image.url}" alt="Room" class="" loading="lazy">',
+        )
+
+        asset = images.process_image(room.main_image.name)
+        cache.clear()
+        srcset = ", ".join(f"{default_storage.url(v['name'])} {v['width']}w" for v in asset.variants)
+        self.assertHTMLEqual(render(Context({"room": room})), (
+            f'<picture><source type="image/webp" srcset="{srcset}" sizes="33vw">'
+            f'<img src="{room.main_image.url}" alt="Room" class="" loading="lazy" width="500" height="300"></picture>'
+        ))
+
+    def test_room_cards_load_assets_in_one_query(self):
+        rooms = [self.room(str(705 + i), self.photo(i)) for i in range(3)]
+        for room in rooms:
+            images.process_image(room.main_image.name)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            cards = room_cards(rooms)
+        self.assertEqual(sum("book_imageasset" in query["sql"] for query in queries.captured_queries), 1)
+        self.assertTrue(all("<picture>" in card for card in cards))
+
+
+# -----------------------------------------------------------
+# Booking archive: finished stays move out of the live table
+# (billing and reporting test that they still see them)
+# -----------------------------------------------------------
+class BookingArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(number="501", room_type="suite", price_per_night="9000.00")
+        cls.customer = Customer.objects.create(first_name="Meera", email="meera@example.com")
+        cls.today = timezone.localdate()
+
+    def setUp(self):
+        cache.clear()
+        old = self.today - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS + 30)
+        self.old_stay = self.book(old, "confirmed")
+        self.old_cancelled = self.book(old - timedelta(days=40), "cancelled")
+        self.old_pending = self.book(old, "pending")
+        self.recent = self.book(self.today - timedelta(days=5), "confirmed")
+
+    def book(self, check_in, status):
+        return Booking.objects.create(
+            room=self.room, customer=self.customer, status=status, check_in=check_in,
+            check_out=check_in + timedelta(days=2), total_amount="18000.00", razorpay_order_id=f"order_{status}_{check_in}",
+        )
+
+    def test_finished_stays_move_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive_bookings(batch_size=1), 2)
+
+        self.assertEqual(set(Booking.objects.values_list("pk", flat=True)), {self.old_pending.pk, self.recent.pk})
+        archived = ArchivedBooking.objects.get(pk=self.old_stay.pk)
+        self.assertEqual((archived.check_in, archived.status, archived.razorpay_order_id),
+                         (self.old_stay.check_in, "confirmed", self.old_stay.razorpay_order_id))
+        self.assertEqual(BookingHistory.objects.filter(archived=True).count(), 2)
+        self.assertEqual(BookingHistory.objects.count(), 4)
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM pg_inherits WHERE inhparent = 'book_archivedbooking'::regclass")
+                self.assertEqual(cursor.fetchone()[0], 2)  # one partition per check-in month
+
+    def test_recent_stays_are_never_archived(self):
+        with self.assertRaises(ValueError):
+            archive.archive_bookings(older_than_days=settings.BOOKING_ARCHIVE_AFTER_DAYS - 1)
+        self.assertFalse(ArchivedBooking.objects.exists())
+
+
+# -----------------------------------------------------------
+# Admin: changelist counts and bulk actions
+# -----------------------------------------------------------
+class BookingAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.room = Room.objects.create(number="801", room_type="double", price_per_night="3000.00")
+        customer = Customer.objects.create(first_name="Dev", email="dev@example.com")
+        now, today = timezone.now(), date.today()
+        cls.bookings = {
+            name: Booking.objects.create(
+                room=cls.room, customer=customer, status=status, hold_expires_at=hold,
+                check_in=today + timedelta(days=2 * i), check_out=today + timedelta(days=2 * i + 1), total_amount="3000.00",
+            )
+            for i, (name, status, hold) in enumerate([
+                ("lapsed", "pending", now - timedelta(minutes=5)),
+                ("held", "pending", now + timedelta(minutes=5)),
+                ("confirmed", "confirmed", None),
+                ("failed", "failed", None),
+            ])
+        }
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def statuses(self):
+        return {name: Booking.objects.get(pk=booking.pk).status for name, booking in self.bookings.items()}
+
+    def act(self, action, names=None):
+        pks = [self.bookings[name].pk for name in (names or self.bookings)]
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("admin:book_booking_changelist"), {"action": action, "_selected_action": pks})
+
+    def test_changelist_counts_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:book_booking_changelist"), {"status__exact": "pending"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+        counts = [query["sql"] for query in queries if "COUNT(" in query["sql"].upper()]
+        # No unfiltered full count and no facet counts
+        self.assertEqual(len(counts), 1, counts)
+
+    @skipUnless(connection.vendor == "postgresql", "row estimates come from the PostgreSQL planner")
+    def test_large_changelists_use_the_planner_estimate(self):
+        with mock.patch("book.admin.ESTIMATE_ABOVE", 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("admin:book_booking_changelist"))
+        self.assertGreater(response.context["cl"].result_count, 0)
+        self.assertTrue(any(query["sql"].startswith("EXPLAIN") for query in queries))
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in queries))
+
+    def test_cancel_skips_finished_bookings(self):
+        self.act("cancel_bookings")
+        self.assertEqual(self.statuses(), {
+            "lapsed": "cancelled", "held": "cancelled", "confirmed": "cancelled", "failed": "failed",
+        })
+
+    def test_expire_releases_only_lapsed_holds(self):
+        response = self.act("expire_holds")
+        self.assertEqual(self.statuses(), {
+            "lapsed": "cancelled", "held": "pending", "confirmed": "confirmed", "failed": "failed",
+        })
+        messages = [str(message) for message in response.wsgi_request._messages]
+        self.assertEqual(messages, ["1 booking released."])
+
+    def test_room_export_action_streams_the_selection(self):
+        other = Room.objects.create(number="802", room_type="single", price_per_night="1500.00")
+        response = self.client.post(reverse("admin:book_room_changelist"), {
+            "action": "export_csv", "_selected_action": [other.pk],
+        })
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="rooms.csv"')
+        self.assertEqual(b"".join(response.streaming_content).decode().splitlines()[1:], ["802,single,1500.00,,true,"])
+
+    def test_archived_bookings_are_read_only(self):
+        self.assertEqual(self.client.get(reverse("admin:book_archivedbooking_changelist")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("admin:book_archivedbooking_add")).status_code, 403)
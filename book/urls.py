@@ -9,5 +9,6 @@ urlpatterns = [
     path('room/<int:pk>/book/', views.book_room, name='book_room'),
     path('checkout/<int:booking_id>/', views.checkout, name='checkout'),
     path('payment-success/', views.payment_success, name='payment_success'),
+    path('payments/webhook/', views.payment_webhook, name='payment_webhook'),
     path("search/", views.search, name="search"),
 ]
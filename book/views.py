@@ -1,59 +1,61 @@
-import razorpay
+import hashlib
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponseBadRequest
+from django.db import transaction
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.views.decorators.csrf import csrf_exempt
-from .models import Room, Booking, Customer, HomePage
-from decimal import Decimal
-from razorpay.errors import BadRequestError, SignatureVerificationError
-from django.db.models import Q
+from .models import Room, Booking
+from .availability import parse_stay, free_rooms, is_room_free
+from .search import parse_query, search_rooms
+from . import images, payments, pricing, reservations, tasks, webhooks
+from .caching import HOMEPAGE, ROOMS, BOOKINGS, RATES, IMAGES, room_group, aget_homepage, room_cards
+from Majestic_Manor.cache import cache_anonymous_page
 from datetime import date
+from razorpay.errors import BadRequestError, SignatureVerificationError
 
 
 # -----------------------------------------------------------
-# Razorpay Client Helper
+# Async views (I/O-bound paths)
+#
+# Under ASGI they wait on the database and Razorpay without holding a
+# worker; code that needs a transaction still runs sync, via sync_to_async.
 # -----------------------------------------------------------
-def get_razorpay_client():
-    return razorpay.Client(auth=(
-        settings.RAZORPAY_KEY_ID,
-        settings.RAZORPAY_KEY_SECRET
-    ))
+async def arender(request, template_name, context=None):
+    # Templates can query (request.user, related objects, image assets)
+    return await sync_to_async(render)(request, template_name, context)
 
 
 # -----------------------------------------------------------
 # Home Page
 # -----------------------------------------------------------
-def home(request):
-    homepage = HomePage.objects.first()
-    return render(request, "book/home.html", {"homepage": homepage})
+@cache_anonymous_page(HOMEPAGE)
+async def home(request):
+    homepage = await aget_homepage()
+    return await arender(request, "book/home.html", {"homepage": homepage})
 
 
 
 def search(request):
     query = request.GET.get("q", "")
-    today = date.today()
-
-    # All rooms
-    results = Room.objects.filter(available=True)
-
-    # Filter booked rooms
-    booked_rooms = Booking.objects.filter(
-        check_out__gte=today,
-        status="confirmed"
-    ).values_list('room_id', flat=True)
-    results = results.exclude(id__in=booked_rooms)
-
-    # Filter by search query
-    if query:
-        results = results.filter(
-            Q(room_type__icontains=query) |
-            Q(description__icontains=query) |
-            Q(price_per_night__icontains=query)
-        )
+    parsed = parse_query(query)
+
+    # Dates typed into q win over the check_in/check_out params
+    stay = parse_stay(
+        parsed["check_in"] or request.GET.get("check_in"),
+        parsed["check_out"] or request.GET.get("check_out"),
+    )
+    if stay is None:
+        return HttpResponseBadRequest("Invalid check-in/check-out dates.")
+
+    # Rooms free for the requested stay (tonight by default), ranked by the search index
+    rooms = free_rooms(Room.objects.filter(available=True), *stay)
+    results = search_rooms(rooms, parsed)
 
     return render(request, "book/search_results.html", {
         "query": query,
-        "results": results
+        "results": results,
+        "assets": images.assets_for(results),
     })
 
 
@@ -61,22 +63,26 @@ def search(request):
 # -----------------------------------------------------------
 # Room List and Details
 # -----------------------------------------------------------
+@cache_anonymous_page(ROOMS, BOOKINGS, RATES, IMAGES, key_func=lambda request: date.today())
 def room_list(request):
-    today = date.today()
+    stay = parse_stay(request.GET.get("check_in"), request.GET.get("check_out"))
+    if stay is None:
+        return HttpResponseBadRequest("Invalid check-in/check-out dates.")
 
-    # Get all rooms
-    rooms = Room.objects.filter(available=True)
+    # Exclude rooms with a confirmed booking overlapping the stay
+    available_rooms = free_rooms(Room.objects.filter(available=True), *stay)
 
-    # Exclude rooms that have active bookings in the future
-    booked_rooms = Booking.objects.filter(
-        check_out__gte=today,
-        status="confirmed"  # Only exclude confirmed bookings
-    ).values_list('room_id', flat=True)
+    # Show what the stay actually costs (seasonal/weekday rates, discounts)
+    quotes = pricing.quote_many(available_rooms, *stay)
+    for room in available_rooms:
+        room.quote = quotes[room.pk]
 
-    available_rooms = rooms.exclude(id__in=booked_rooms)
-
-    return render(request, "book/room_list.html", {"rooms": available_rooms})
+    return render(request, "book/room_list.html", {
+        "rooms": available_rooms,
+        "cards": room_cards(available_rooms),
+    })
 
+@cache_anonymous_page(room_group, IMAGES)
 def room_detail(request, pk):
     room = get_object_or_404(Room, pk=pk)
     return render(request, "book/room_detail.html", {"room": room})
@@ -85,8 +91,8 @@ def room_detail(request, pk):
 # -----------------------------------------------------------
 # Book Room (Creates Razorpay Order)
 # -----------------------------------------------------------
-def book_room(request, pk):
-    room = get_object_or_404(Room, pk=pk)
+async def book_room(request, pk):
+    room = await aget_object_or_404(Room, pk=pk)
 
     if request.method == "POST":
         # Customer Details
@@ -97,50 +103,58 @@ def book_room(request, pk):
         check_in = request.POST.get("check_in")
         check_out = request.POST.get("check_out")
 
-        # Create/Get Customer
-        customer, _ = Customer.objects.get_or_create(
-            email=email,
-            defaults={
-                "first_name": first_name,
-                "last_name": last_name,
-                "phone": phone
-            },
-        )
-
-        # Convert price to paise
-        total_amount = float(room.price_per_night)
-        amount_paise = int(total_amount * 100)
-
-        # Create Razorpay Order
-        client = get_razorpay_client()
+        # Validate the stay against the availability index
+        stay = parse_stay(check_in, check_out)
+        if not check_in or not check_out or stay is None:
+            return await arender(request, "book/error.html", {
+                "message": "Please choose a check-out date after the check-in date."
+            })
+        check_in, check_out = stay
+        if not await sync_to_async(is_room_free)(room, check_in, check_out):
+            return await arender(request, "book/error.html", {
+                "message": "Sorry, this room is already booked for the selected dates."
+            })
+
+        # Create/Get Customer (email is unique, ignoring case)
+        customer = await sync_to_async(reservations.get_customer)(email, first_name, last_name, phone)
+
+        # Price every night of the stay (Decimal throughout), then convert to paise
+        quote = await sync_to_async(pricing.quote)(room, check_in, check_out)
+        amount_paise = pricing.to_paise(quote.total)
+
+        # Hold the room while the guest pays (locks the room, checks overlaps)
+        try:
+            booking = await sync_to_async(reservations.reserve)(room, customer, check_in, check_out, quote.total)
+        except reservations.RoomUnavailable:
+            return await arender(request, "book/error.html", {
+                "message": "Sorry, this room is already booked for the selected dates."
+            })
+
+        # Create Razorpay Order (outside the lock); give the hold back on failure
         try:
-            razorpay_order = client.order.create({
-                "amount": amount_paise,
-                "currency": "INR",
-                "payment_capture": 1
+            razorpay_order = await payments.acreate_order(amount_paise)
+        except payments.GatewayUnavailable:
+            await sync_to_async(reservations.release)(booking)
+            return await arender(request, "book/error.html", {
+                "message": "The payment gateway is temporarily unavailable. Please try again in a few minutes."
             })
         except BadRequestError:
-            return render(request, "book/error.html", {
+            await sync_to_async(reservations.release)(booking)
+            return await arender(request, "book/error.html", {
                 "message": "Payment authentication failed. Check Razorpay keys."
             })
         except Exception as e:
-            return render(request, "book/error.html", {
+            await sync_to_async(reservations.release)(booking)
+            return await arender(request, "book/error.html", {
                 "message": f"Error creating Razorpay order: {e}"
             })
 
-        # Save Booking
-        booking = Booking.objects.create(
-            room=room,
-            customer=customer,
-            check_in=check_in,
-            check_out=check_out,
-            total_amount=Decimal(total_amount),
-            razorpay_order_id=razorpay_order["id"],
-            status="pending",
-        )
+        # Attach the order to the hold
+        booking.razorpay_order_id = razorpay_order["id"]
+        await booking.asave(update_fields=["razorpay_order_id"])
 
         # Render Payment Page
-        return render(request, "book/payment.html", {
+        return await arender(request, "book/payment.html", {
             "booking": booking,
             "razorpay_order_id": razorpay_order["id"],
             "razorpay_key_id": settings.RAZORPAY_KEY_ID,
@@ -149,7 +163,7 @@ def book_room(request, pk):
             "room": room,
         })
 
-    return render(request, "book/book_room.html", {"room": room})
+    return await arender(request, "book/book_room.html", {"room": room})
 
 
 # -----------------------------------------------------------
@@ -160,7 +174,7 @@ def checkout(request, booking_id):
     return render(request, "book/checkout.html", {
         "booking": booking,
         "razorpay_key_id": settings.RAZORPAY_KEY_ID,
-        "amount_paise": int(booking.total_amount * 100),
+        "amount_paise": pricing.to_paise(booking.total_amount),
         "order_id": booking.razorpay_order_id,
     })
 
@@ -169,7 +183,7 @@ def checkout(request, booking_id):
 # Payment Success Callback (Razorpay POST)
 # -----------------------------------------------------------
 @csrf_exempt
-def payment_success(request):
+async def payment_success(request):
     if request.method != "POST":
         return HttpResponseBadRequest("Invalid request method.")
 
@@ -180,38 +194,65 @@ def payment_success(request):
 
     # Fetch related Booking
     try:
-        booking = Booking.objects.get(razorpay_order_id=razorpay_order_id)
+        booking = await Booking.objects.aget(razorpay_order_id=razorpay_order_id)
     except Booking.DoesNotExist:
         return HttpResponseBadRequest("Booking not found.")
 
-    client = get_razorpay_client()
-
     params = {
         "razorpay_order_id": razorpay_order_id,
         "razorpay_payment_id": razorpay_payment_id,
         "razorpay_signature": razorpay_signature,
     }
 
-    # Verify Razorpay Signature
+    # Verify Razorpay Signature (local HMAC, no network)
     try:
-        client.utility.verify_payment_signature(params)
-        booking.status = "confirmed"
+        payments.verify_payment_signature(params)
     except SignatureVerificationError:
         booking.status = "failed"
-        booking.save()
-        return render(request, "book/error.html", {
+        await booking.asave()
+        return await arender(request, "book/error.html", {
             "message": "Payment verification failed. Please contact support."
         })
     except Exception as e:
         booking.status = "failed"
-        booking.save()
-        return render(request, "book/error.html", {
+        await booking.asave()
+        return await arender(request, "book/error.html", {
             "message": f"Payment verification error: {e}"
         })
 
-    # Save payment info
-    booking.razorpay_payment_id = razorpay_payment_id
-    booking.razorpay_signature = razorpay_signature
-    booking.save()
+    # Confirm under the room lock; fails if the hold lapsed and the room was taken
+    if booking.status == "cancelled" or not await sync_to_async(reservations.confirm)(
+        booking,
+        razorpay_payment_id=razorpay_payment_id,
+        razorpay_signature=razorpay_signature,
+    ):
+        return await arender(request, "book/error.html", {
+            "message": "Your booking hold expired before payment completed. Please contact support for a refund."
+        })
+
+    return await arender(request, "book/payment_success.html", {"booking": booking})
+
+
+# -----------------------------------------------------------
+# Razorpay Webhook (server-to-server)
+# Only verifies and stores the event, and queues a worker run
+# (book.tasks.apply_payment_events) to apply it.
+# -----------------------------------------------------------
+@csrf_exempt
+def payment_webhook(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid request method.")
+
+    body = request.body
+    if not webhooks.verify_signature(body, request.headers.get("X-Razorpay-Signature", "")):
+        return HttpResponseBadRequest("Invalid signature.")
+
+    event_id = request.headers.get("X-Razorpay-Event-Id") or hashlib.sha256(body).hexdigest()
+    try:
+        with transaction.atomic():
+            webhooks.ingest(event_id, body)
+            tasks.apply_payment_events.delay()
+    except ValueError:
+        return HttpResponseBadRequest("Invalid payload.")
 
-    return render(request, "book/payment_success.html", {"booking": booking})
+    return HttpResponse(status=200)
@@ -0,0 +1,157 @@
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Booking, PaymentEvent
+from .reservations import lock_room, stay_is_taken
+
+CONFIRMING_EVENTS = {"payment.captured", "order.paid"}
+FAILING_EVENTS = {"payment.failed"}
+MAX_ATTEMPTS = 5
+
+
+# -----------------------------------------------------------
+# Ingestion (request path): verify, store, return
+# -----------------------------------------------------------
+def verify_signature(body, signature):
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _entities(data):
+    payload = data.get("payload") or {}
+    payment = (payload.get("payment") or {}).get("entity") or {}
+    order = (payload.get("order") or {}).get("entity") or {}
+    return payment, order
+
+
+def ingest(event_id, body):
+    """Store a verified event; duplicates of the same event id are ignored."""
+    data = json.loads(body)  # ValueError on a malformed body
+    if not isinstance(data, dict):
+        raise ValueError("Webhook body is not an object")
+    payment, order = _entities(data)
+    PaymentEvent.objects.bulk_create([
+        PaymentEvent(
+            event_id=event_id,
+            event_type=data.get("event", ""),
+            order_id=payment.get("order_id") or order.get("id") or "",
+            payload=body.decode(),
+        )
+    ], ignore_conflicts=True)
+
+
+# -----------------------------------------------------------
+# Worker: apply queued events to bookings in batches
+# -----------------------------------------------------------
+def _claim(batch_size, pks=None):
+    queue = PaymentEvent.objects.filter(
+        processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS,
+    ).order_by("id")
+    if pks is not None:
+        queue = queue.filter(pk__in=pks)
+
+    if connection.features.has_select_for_update_skip_locked:
+        events = list(queue.select_for_update(skip_locked=True)[:batch_size])
+    else:
+        # SQLite: write first so this transaction holds the write lock and
+        # concurrent workers wait behind it instead of reading the same rows
+        PaymentEvent.objects.filter(pk__in=queue.values("pk")[:batch_size]).update(attempts=F("attempts"))
+        events = list(queue[:batch_size])
+    PaymentEvent.objects.filter(pk__in=[e.pk for e in events]).update(attempts=F("attempts") + 1)
+    return events
+
+
+def apply_event(booking, event):
+    """Apply one event to its booking; returns (changed, error)."""
+    payment, _ = _entities(json.loads(event.payload))
+
+    if event.event_type in CONFIRMING_EVENTS:
+        if booking.status == "confirmed":
+            return False, ""
+        if booking.status == "cancelled":
+            return False, "Payment captured for a cancelled booking"
+        # The hold may have lapsed and the room been taken in the meantime
+        lock_room(booking.room_id)
+        if stay_is_taken(booking):
+            booking.status = "cancelled"
+            return True, "Payment captured but the room was taken after the hold expired"
+        booking.status = "confirmed"
+        booking.razorpay_payment_id = payment.get("id") or booking.razorpay_payment_id
+        return True, ""
+
+    if event.event_type in FAILING_EVENTS and booking.status == "pending":
+        booking.status = "failed"
+        booking.razorpay_payment_id = payment.get("id") or booking.razorpay_payment_id
+        return True, ""
+    return False, ""
+
+
+def process_batch(batch_size=100, pks=None):
+    """Apply up to batch_size queued events (only those in pks, if given). Returns how many were handled."""
+    claimed = []
+    try:
+        with transaction.atomic():
+            return _apply_batch(batch_size, pks, claimed)
+    except Exception as exc:
+        if not claimed:
+            raise
+        if len(claimed) == 1:
+            _record_failure(claimed[0], exc)
+            return 1
+        # Isolate the bad event: redo this batch's events one at a time
+        return sum(process_batch(1, [pk]) for pk in claimed)
+
+
+def _apply_batch(batch_size, pks, claimed):
+    events = _claim(batch_size, pks)
+    if not events:
+        return 0
+    # Kept by process_batch, after the rollback, to retry or charge these events
+    claimed.extend(event.pk for event in events)
+
+    order_ids = {event.order_id for event in events if event.order_id}
+    bookings = {
+        booking.razorpay_order_id: booking
+        for booking in Booking.objects.select_for_update().select_related("room").filter(
+            razorpay_order_id__in=order_ids
+        )
+    }
+
+    changed = {}
+    errors = {}
+    for event in events:
+        booking = bookings.get(event.order_id)
+        if booking is None:
+            errors[event.pk] = "No booking for this order"
+            continue
+        updated, error = apply_event(booking, event)
+        if updated:
+            changed[booking.pk] = booking
+        if error:
+            errors[event.pk] = error
+
+    # save() rather than bulk_update so availability, rollups and caches follow
+    for booking in changed.values():
+        booking.save(update_fields=["status", "razorpay_payment_id"])
+
+    PaymentEvent.objects.filter(pk__in=[e.pk for e in events]).update(processed_at=timezone.now())
+    for pk, error in errors.items():
+        PaymentEvent.objects.filter(pk=pk).update(error=error)
+    return len(events)
+
+
+def _record_failure(pk, exc):
+    # The failed transaction rolled back its claim; count the attempt here so
+    # a poison event stops being retried after MAX_ATTEMPTS
+    PaymentEvent.objects.filter(pk=pk, processed_at__isnull=True).update(
+        attempts=F("attempts") + 1, error=repr(exc),
+    )
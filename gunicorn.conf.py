@@ -0,0 +1,61 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+Two profiles:
+  WSGI (default)  gthread workers: each request holds a thread while it
+                  waits on the database or Razorpay.
+  ASGI=True       uvicorn workers running Majestic_Manor.asgi: the async
+                  views (home, book_room, payment_success) wait without
+                  holding anything, so a slow gateway call costs no capacity.
+
+Every value can be overridden from the environment (WEB_CONCURRENCY,
+GUNICORN_THREADS, GUNICORN_TIMEOUT, ...) or on the command line.
+"""
+import multiprocessing
+import os
+
+ASGI = os.getenv("ASGI", "False") == "True"
+CPUS = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# ----------------------------------------------------
+# WORKERS
+# ----------------------------------------------------
+if ASGI:
+    wsgi_app = "Majestic_Manor.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # One event loop per worker already overlaps the I/O; match the cores
+    workers = int(os.getenv("WEB_CONCURRENCY", CPUS))
+else:
+    wsgi_app = "Majestic_Manor.wsgi:application"
+    worker_class = "gthread"
+    # Processes for the CPU, threads to cover time spent waiting on I/O
+    workers = int(os.getenv("WEB_CONCURRENCY", CPUS * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import Django once in the master; workers fork with settings, URLconf and
+# the static manifest already loaded
+preload_app = True
+
+# Recycle workers now and then (leaks, fragmentation); the jitter keeps
+# them from all restarting at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# ----------------------------------------------------
+# TIMEOUTS
+# ----------------------------------------------------
+# Longer than the Razorpay read timeout plus its retries
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+# In-flight requests get this long to finish on restart/deploy
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+
+def pre_fork(server, worker):
+    # With preload_app anything the master connected to is inherited by every
+    # worker; a database socket shared between processes corrupts both ends
+    from django.db import connections
+
+    connections.close_all()
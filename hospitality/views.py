@@ -1,4 +1,6 @@
 from django.shortcuts import render
+from Majestic_Manor.cache import cache_anonymous_page
 
+@cache_anonymous_page()
 def index(request):
     return render(request, 'hospitality/index.html')
@@ -0,0 +1,53 @@
+import time
+from datetime import date
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from reporting import occupancy
+
+
+class Command(BaseCommand):
+    help = "Time the occupancy computation (heatmap, rates, forecast) on synthetic in-memory bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=5_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--occupancy", type=float, default=0.7, help="share of nights booked")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        rooms, days = options["rooms"], options["days"]
+        room_types = np.array(["single", "double", "suite"])[np.arange(rooms) % 3]
+
+        # Back-to-back stays per room: 1-4 nights, gaps sized for the target occupancy
+        per_room = int(days * options["occupancy"] / 2.5) + 1
+        nights = rng.integers(1, 5, size=(rooms, per_room))
+        gap_mean = 2.5 * (1 - options["occupancy"]) / options["occupancy"]
+        gaps = rng.poisson(gap_mean, size=(rooms, per_room))
+        ends = np.cumsum(nights + gaps, axis=1) - 5
+        starts = ends - nights
+        intervals = {
+            "room_id": np.repeat(np.arange(1, rooms + 1), per_room),
+            "start": starts.ravel(),
+            "end": ends.ravel(),
+            "confirmed": rng.random(rooms * per_room) < 0.95,
+        }
+        room_list = [{"id": i + 1, "number": f"{i:05d}", "room_type": str(t)} for i, t in enumerate(room_types)]
+        curves = {str(t): np.linspace(0, rooms / 30, days + 1) for t in np.unique(room_types)}
+        today = date.today()
+
+        samples = []
+        for _ in range(options["repeat"]):
+            t0 = time.perf_counter()
+            result = occupancy.compute(room_list, intervals, today, days, today, curves)
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+        self.stdout.write(
+            f"{rooms} rooms x {days} days, {intervals['start'].size} bookings: "
+            f"p50={samples[len(samples) // 2] * 1000:.1f}ms max={samples[-1] * 1000:.1f}ms"
+        )
+        for room_type, stats in result["room_types"].items():
+            self.stdout.write(f"  {room_type}: occupancy {stats['occupancy']:.1%}")
@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from book.models import BookingHistory
+from reporting.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the daily/monthly reporting rollups for a date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="First day (default: earliest check-in)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Day after the last one (default: latest check-out)")
+        parser.add_argument("--chunk-days", type=int, default=31)
+
+    def handle(self, *args, **options):
+        # Archived stays too: the oldest bookings have usually been moved out of book_booking
+        bounds = BookingHistory.objects.aggregate(first=Min("check_in"), last=Max("check_out"))
+        start = options["start"] or bounds["first"]
+        end = options["end"] or (bounds["last"] and bounds["last"] + timedelta(days=1))
+        if start is None or end is None:
+            self.stdout.write("No bookings to roll up.")
+            return
+        if end <= start:
+            raise CommandError("--end must be after --start")
+
+        rebuild(start, end, chunk_days=options["chunk_days"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {start} .. {end}"))
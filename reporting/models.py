@@ -1,3 +1,50 @@
 from django.db import models
 
-# Create your models here.
+from book.models import Room
+
+
+class RollupFields(models.Model):
+    # Bookings are counted on their check-in day; room nights and revenue
+    # are spread over the nights actually stayed (confirmed bookings only).
+    room_type = models.CharField(max_length=10, choices=Room.ROOM_TYPES)
+    bookings_pending = models.PositiveIntegerField(default=0)
+    bookings_confirmed = models.PositiveIntegerField(default=0)
+    bookings_cancelled = models.PositiveIntegerField(default=0)
+    bookings_failed = models.PositiveIntegerField(default=0)
+    room_nights = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total_bookings(self):
+        return self.bookings_pending + self.bookings_confirmed + self.bookings_cancelled + self.bookings_failed
+
+    @property
+    def average_daily_rate(self):
+        return self.revenue / self.room_nights if self.room_nights else 0
+
+
+class DailyRollup(RollupFields):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'room_type'], name='daily_rollup_day_type_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.room_type}"
+
+
+class MonthlyRollup(RollupFields):
+    month = models.DateField()  # first day of the month
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'room_type'], name='monthly_rollup_month_type_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.room_type}"
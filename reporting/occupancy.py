@@ -0,0 +1,198 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Majestic_Manor.cache import cached, invalidate_on_commit
+from book.archive import stays_ending_after
+from book.caching import ROOMS
+from book.models import Room
+from .rollups import month_start, next_month
+
+# Heatmap cell states
+FREE, HELD, BOOKED = 0, 1, 2
+
+
+# -----------------------------------------------------------
+# Cache Groups
+#
+# One group per calendar month: a booking change only invalidates the
+# windows that overlap its stay. Room changes (ROOMS) invalidate them all.
+# -----------------------------------------------------------
+def month_group(day):
+    return f"occupancy:{day:%Y-%m}"
+
+
+def window_groups(start, days):
+    groups, month = [ROOMS], month_start(start)
+    end = start + timedelta(days=days)
+    while month < end:
+        groups.append(month_group(month))
+        month = next_month(month)
+    return groups
+
+
+def stays_changed(*stays):
+    """Invalidate the months covered by (check_in, check_out) pairs."""
+    groups = set()
+    for check_in, check_out in stays:
+        month = month_start(check_in)
+        while month < check_out:
+            groups.add(month_group(month))
+            month = next_month(month)
+    invalidate_on_commit(*groups)
+
+
+# -----------------------------------------------------------
+# Vectorized painting
+#
+# Every interval is expanded into the flat cell indexes of its nights
+# (room row * days + day) and all of them are set in one fancy-index
+# assignment: no Python loop, and the cost follows the nights booked
+# rather than the size of the matrix.
+# -----------------------------------------------------------
+def ragged_arange(counts):
+    """concatenate([arange(n) for n in counts]) without the Python loop."""
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(offsets.size) - offsets
+
+
+def paint(rows, starts, ends, n_rooms, days):
+    """Boolean rooms x days matrix, True where an interval [start, end) covers the day."""
+    starts = np.clip(starts, 0, days)
+    # Intervals outside the window clip to zero nights
+    counts = np.maximum(np.clip(ends, 0, days) - starts, 0)
+    cells = np.repeat(rows * days + starts, counts) + ragged_arange(counts)
+    painted = np.zeros(n_rooms * days, dtype=bool)
+    painted[cells] = True
+    return painted.reshape(n_rooms, days)
+
+
+# -----------------------------------------------------------
+# Loading
+# -----------------------------------------------------------
+def _days(values, origin):
+    return (np.array(values, dtype="datetime64[D]") - np.datetime64(origin, "D")).astype(np.int64)
+
+
+def load_rooms():
+    rows = list(Room.objects.filter(available=True).order_by("number").values_list("id", "number", "room_type"))
+    return [{"id": pk, "number": number, "room_type": room_type} for pk, number, room_type in rows]
+
+
+def load_intervals(start, days, now=None):
+    """Confirmed bookings and live holds overlapping the window, in one query, as arrays."""
+    now = now or timezone.now()
+    rows = list(stays_ending_after(start).filter(
+        Q(status="confirmed") | Q(status="pending", hold_expires_at__gt=now),
+        check_in__lt=start + timedelta(days=days),
+        check_out__gt=start,
+    ).values_list("room_id", "check_in", "check_out", "status"))
+    room_ids, check_ins, check_outs, statuses = zip(*rows) if rows else ((), (), (), ())
+    return {
+        "room_id": np.array(room_ids, dtype=np.int64),
+        "start": _days(check_ins, start),
+        "end": _days(check_outs, start),
+        "confirmed": np.array(statuses) == "confirmed",
+    }
+
+
+def pickup_curve(today, history_days, max_lead):
+    """
+    {room_type: array}: average room nights per night booked less than L days
+    before the night, for L in 0..max_lead, over the last `history_days` nights.
+    """
+    first = today - timedelta(days=history_days)
+    rows = list(stays_ending_after(first).filter(
+        status="confirmed", check_in__lt=today, check_out__gt=first,
+    ).annotate(booked_on=TruncDate("created_at")).values_list(
+        "room__room_type", "check_in", "check_out", "booked_on",
+    ))
+    curves = {}
+    if not rows:
+        return curves
+    room_types, check_ins, check_outs, booked_on = (np.array(column) for column in zip(*rows))
+    # Nights inside the history window, one entry per booked night
+    lo = np.maximum(_days(check_ins, first), 0)
+    hi = np.minimum(_days(check_outs, first), history_days)
+    counts = np.maximum(hi - lo, 0)
+    nights = np.repeat(lo, counts) + ragged_arange(counts)
+    leads = np.clip(nights - np.repeat(_days(booked_on, first), counts), 0, max_lead)
+    night_types = np.repeat(room_types, counts)
+    for room_type in np.unique(room_types):
+        booked = np.bincount(leads[night_types == room_type], minlength=max_lead + 1)
+        # within[L] = nights booked with a lead under L
+        within = np.concatenate([[0], np.cumsum(booked)])[:max_lead + 1]
+        curves[str(room_type)] = within / history_days
+    return curves
+
+
+# -----------------------------------------------------------
+# Occupancy
+# -----------------------------------------------------------
+def compute(rooms, intervals, start, days, today, curves):
+    """Heatmap, daily rates and pickup forecast from load_rooms()/load_intervals() output."""
+    room_ids = np.array([room["id"] for room in rooms], dtype=np.int64)
+    room_types = np.array([room["room_type"] for room in rooms])
+    # room id -> matrix row; bookings of unlisted (unavailable) rooms drop out
+    row_of = np.full(int(max(room_ids.max(initial=0), intervals["room_id"].max(initial=0))) + 1, -1)
+    row_of[room_ids] = np.arange(room_ids.size)
+    rows = row_of[intervals["room_id"]]
+    listed = rows >= 0
+
+    confirmed = listed & intervals["confirmed"]
+    held = listed & ~intervals["confirmed"]
+    booked = paint(rows[confirmed], intervals["start"][confirmed], intervals["end"][confirmed], room_ids.size, days)
+    pending = paint(rows[held], intervals["start"][held], intervals["end"][held], room_ids.size, days)
+    state = booked.astype(np.uint8) * np.uint8(BOOKED)
+    np.maximum(state, pending.astype(np.uint8) * np.uint8(HELD), out=state)
+
+    # Days ahead of today; the forecast adds the pickup still expected at that lead
+    leads = np.arange(days) + (start - today).days
+    by_type = {}
+    for room_type in np.unique(room_types):
+        mask = room_types == room_type
+        capacity = int(mask.sum())
+        sold = booked[mask].sum(axis=0)
+        curve = curves.get(str(room_type))
+        expected = sold.astype(float)
+        if curve is not None:
+            ahead = leads >= 0
+            expected[ahead] += curve[np.minimum(leads[ahead], curve.size - 1)]
+        by_type[str(room_type)] = {
+            "rooms": capacity,
+            "occupancy": round(float(sold.sum()) / (capacity * days), 4) if days else 0,
+            "daily": np.round(sold / capacity, 4).tolist(),
+            "held": np.round(pending[mask].sum(axis=0) / capacity, 4).tolist(),
+            "forecast": np.round(np.minimum(expected, capacity) / capacity, 4).tolist(),
+        }
+
+    # One string per room, one digit per day
+    digits = (state + np.uint8(ord("0"))).tobytes().decode()
+    return {
+        "start": start.isoformat(),
+        "days": days,
+        "rooms": rooms,
+        "heatmap": [digits[i:i + days] for i in range(0, len(digits), days)],
+        "room_types": by_type,
+    }
+
+
+def build(start, days, today=None):
+    today = today or timezone.localdate()
+    last = start + timedelta(days=days - 1)
+    curves = pickup_curve(today, settings.OCCUPANCY_PICKUP_HISTORY_DAYS, max((last - today).days, 0))
+    return compute(load_rooms(), load_intervals(start, days), start, days, today, curves)
+
+
+def get_occupancy(start, days):
+    today = timezone.localdate()
+    # Keyed by today as well: the forecast's lead times move every day
+    return cached(
+        f"occupancy:{start}:{days}:{today}", window_groups(start, days),
+        lambda: build(start, days, today),
+        timeout=settings.OCCUPANCY_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_DOWN
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from book.archive import stays_ending_after
+from book.models import Booking
+from .models import DailyRollup, MonthlyRollup
+
+STATUS_FIELDS = {
+    "pending": "bookings_pending",
+    "confirmed": "bookings_confirmed",
+    "cancelled": "bookings_cancelled",
+    "failed": "bookings_failed",
+}
+COUNTER_FIELDS = list(STATUS_FIELDS.values()) + ["room_nights", "revenue"]
+
+# Columns needed to compute a booking's contribution, in contribution() order
+SNAPSHOT_FIELDS = ("status", "room__room_type", "check_in", "check_out", "total_amount")
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _deltas():
+    return defaultdict(lambda: defaultdict(int))
+
+
+def _merge(target, deltas):
+    for key, fields in deltas.items():
+        for name, value in fields.items():
+            target[key][name] += value
+    return target
+
+
+# -----------------------------------------------------------
+# Contribution of a single booking to the daily rollups
+# -----------------------------------------------------------
+def contribution(status, room_type, check_in, check_out, total_amount, sign=1):
+    """Return {(day, room_type): {field: delta}} for one booking."""
+    deltas = _deltas()
+    check_in, check_out = _as_date(check_in), _as_date(check_out)
+
+    field = STATUS_FIELDS.get(status)
+    if field:
+        deltas[(check_in, room_type)][field] += sign
+
+    nights = (check_out - check_in).days
+    if status == "confirmed" and nights > 0:
+        # Spread revenue over the stay; the first night absorbs the rounding
+        amount = Decimal(str(total_amount))
+        nightly = (amount / nights).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
+        first = amount - nightly * (nights - 1)
+        for i in range(nights):
+            bucket = deltas[(check_in + timedelta(days=i), room_type)]
+            bucket["room_nights"] += sign
+            bucket["revenue"] += sign * (first if i == 0 else nightly)
+    return deltas
+
+
+def snapshot(booking):
+    return (
+        booking.status,
+        booking.room.room_type,
+        _as_date(booking.check_in),
+        _as_date(booking.check_out),
+        Decimal(str(booking.total_amount)),
+    )
+
+
+def load_snapshot(pk):
+    return Booking.objects.filter(pk=pk).values_list(*SNAPSHOT_FIELDS).first()
+
+
+# -----------------------------------------------------------
+# Incremental maintenance (called from signals)
+# -----------------------------------------------------------
+def apply_transition(before, after):
+    """Move a booking's contribution from snapshot `before` to `after` (either may be None)."""
+    apply_transitions([(before, after)])
+
+
+def apply_transitions(transitions):
+    """Apply many (before, after) snapshot pairs with one set of rollup updates."""
+    deltas = _deltas()
+    for before, after in transitions:
+        if before == after:
+            continue
+        if before:
+            _merge(deltas, contribution(*before, sign=-1))
+        if after:
+            _merge(deltas, contribution(*after))
+    apply(deltas)
+
+
+def apply(deltas):
+    monthly = _deltas()
+    for (day, room_type), fields in deltas.items():
+        for name, value in fields.items():
+            monthly[(month_start(day), room_type)][name] += value
+
+    with transaction.atomic():
+        _bump(DailyRollup, "day", deltas)
+        _bump(MonthlyRollup, "month", monthly)
+
+
+def _bump(model, period_field, deltas):
+    changed = {
+        key: {name: value for name, value in fields.items() if value}
+        for key, fields in deltas.items()
+    }
+    changed = {key: fields for key, fields in changed.items() if fields}
+    if not changed:
+        return
+
+    model.objects.bulk_create(
+        [model(**{period_field: period, "room_type": room_type}) for period, room_type in changed],
+        ignore_conflicts=True,
+    )
+    for (period, room_type), fields in changed.items():
+        model.objects.filter(**{period_field: period, "room_type": room_type}).update(
+            **{name: F(name) + value for name, value in fields.items()}
+        )
+
+
+# -----------------------------------------------------------
+# Backfill / rebuild
+# -----------------------------------------------------------
+def rebuild(start, end, chunk_days=31, log=None):
+    """Recompute daily rollups for [start, end) chunk by chunk, then their months."""
+    day = start
+    while day < end:
+        stop = min(day + timedelta(days=chunk_days), end)
+        count = rebuild_days(day, stop)
+        if log:
+            log(f"{day} .. {stop}: {count} bookings")
+        day = stop
+    rebuild_months(month_start(start), next_month(end - timedelta(days=1)))
+
+
+def rebuild_days(start, end):
+    deltas = _deltas()
+    rows = stays_ending_after(start).filter(
+        Q(check_in__gte=start) | Q(check_out__gt=start),
+        check_in__lt=end,
+    ).values_list(*SNAPSHOT_FIELDS)
+
+    count = 0
+    for row in rows.iterator(chunk_size=2000):
+        count += 1
+        for key, fields in contribution(*row).items():
+            if start <= key[0] < end:
+                _merge(deltas, {key: fields})
+
+    with transaction.atomic():
+        DailyRollup.objects.filter(day__gte=start, day__lt=end).delete()
+        DailyRollup.objects.bulk_create([
+            DailyRollup(day=day, room_type=room_type, **fields)
+            for (day, room_type), fields in deltas.items()
+        ], batch_size=500)
+    return count
+
+
+def rebuild_months(start, end):
+    # A month is exactly the sum of its days
+    rows = (
+        DailyRollup.objects.filter(day__gte=start, day__lt=end)
+        .annotate(month=TruncMonth("day"))
+        .values("month", "room_type")
+        .annotate(**{f"sum_{name}": Sum(name) for name in COUNTER_FIELDS})
+    )
+    with transaction.atomic():
+        MonthlyRollup.objects.filter(month__gte=start, month__lt=end).delete()
+        MonthlyRollup.objects.bulk_create([
+            MonthlyRollup(
+                month=row["month"],
+                room_type=row["room_type"],
+                **{name: row[f"sum_{name}"] for name in COUNTER_FIELDS},
+            )
+            for row in rows
+        ], batch_size=500)
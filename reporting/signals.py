@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from book.models import Booking
+from book.signals import bookings_status_bulk_changed
+from . import occupancy, rollups
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_state(sender, instance, **kwargs):
+    instance._rollup_before = rollups.load_snapshot(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    before, after = getattr(instance, "_rollup_before", None), rollups.snapshot(instance)
+    rollups.apply_transition(before, after)
+    # snapshot: (status, room_type, check_in, check_out, amount); the dates may have moved
+    occupancy.stays_changed(*{snapshot[2:4] for snapshot in (before, after) if snapshot})
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    snapshot = rollups.snapshot(instance)
+    rollups.apply_transition(snapshot, None)
+    occupancy.stays_changed(snapshot[2:4])
+
+
+@receiver(bookings_status_bulk_changed, sender=Booking)
+def bookings_bulk_changed(sender, bookings, status, **kwargs):
+    transitions = []
+    for booking in bookings:
+        before = rollups.snapshot(booking)
+        transitions.append((before, (status, *before[1:])))
+    rollups.apply_transitions(transitions)
+    occupancy.stays_changed(*{before[2:4] for before, _ in transitions})
@@ -1,3 +1,178 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from book import archive, reservations
+from book.models import Booking, Customer, Room
+from . import occupancy, rollups
+from .models import DailyRollup, MonthlyRollup
+
+
+# -----------------------------------------------------------
+# Rollups: every booking change moves its contribution exactly once
+# -----------------------------------------------------------
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(number="201", room_type="suite", price_per_night="1000.00")
+        cls.customer = Customer.objects.create(first_name="Nila", email="nila@example.com")
+        # Three nights across a month boundary
+        cls.check_in = date(2026, 3, 30)
+
+    def book(self, status="pending", check_in=None, nights=3):
+        check_in = check_in or self.check_in
+        return Booking.objects.create(
+            room=self.room, customer=self.customer, status=status,
+            check_in=check_in, check_out=check_in + timedelta(days=nights), total_amount="1000.00",
+        )
+
+    def daily(self, *fields):
+        return {
+            row[0]: row[1:]
+            for row in DailyRollup.objects.filter(room_type="suite").exclude(
+                bookings_pending=0, bookings_confirmed=0, bookings_cancelled=0, bookings_failed=0, room_nights=0,
+            ).order_by("day").values_list("day", *fields)
+        }
+
+    def monthly(self, *fields):
+        rows = MonthlyRollup.objects.filter(room_type="suite").order_by("month").values_list("month", *fields)
+        return {row[0]: row[1:] for row in rows}
+
+    def test_contribution_spreads_revenue_over_the_nights(self):
+        deltas = rollups.contribution("confirmed", "suite", self.check_in, self.check_in + timedelta(days=3), "1000.00")
+        revenue = [deltas[(self.check_in + timedelta(days=i), "suite")]["revenue"] for i in range(3)]
+        self.assertEqual(revenue, [Decimal("333.34"), Decimal("333.33"), Decimal("333.33")])
+        self.assertEqual(deltas[(self.check_in, "suite")]["bookings_confirmed"], 1)
+        # Other statuses are counted on check-in, with no nights or revenue
+        self.assertEqual(
+            dict(rollups.contribution("pending", "suite", self.check_in, self.check_in + timedelta(days=3), "1000.00")),
+            {(self.check_in, "suite"): {"bookings_pending": 1}},
+        )
+
+    def test_pending_confirmed_cancelled(self):
+        booking = self.book()
+        self.assertEqual(self.daily("bookings_pending", "room_nights"), {self.check_in: (1, 0)})
+
+        booking.status = "confirmed"
+        booking.save()
+        self.assertEqual(self.daily("bookings_pending", "bookings_confirmed", "room_nights", "revenue"), {
+            date(2026, 3, 30): (0, 1, 1, Decimal("333.34")),
+            date(2026, 3, 31): (0, 0, 1, Decimal("333.33")),
+            date(2026, 4, 1): (0, 0, 1, Decimal("333.33")),
+        })
+        self.assertEqual(self.monthly("room_nights", "revenue"), {
+            date(2026, 3, 1): (2, Decimal("666.67")), date(2026, 4, 1): (1, Decimal("333.33")),
+        })
+
+        booking.status = "cancelled"
+        booking.save()
+        self.assertEqual(self.daily("bookings_confirmed", "bookings_cancelled", "room_nights", "revenue"), {
+            self.check_in: (0, 1, 0, Decimal("0.00")),
+        })
+        self.assertEqual(self.monthly("bookings_cancelled", "room_nights", "revenue"), {
+            date(2026, 3, 1): (1, 0, Decimal("0.00")), date(2026, 4, 1): (0, 0, Decimal("0.00")),
+        })
+
+    def test_moved_dates_move_the_nights(self):
+        booking = self.book("confirmed")
+        booking.check_in, booking.check_out = date(2026, 5, 10), date(2026, 5, 12)
+        booking.save()
+
+        self.assertEqual(self.daily("bookings_confirmed", "room_nights", "revenue"), {
+            date(2026, 5, 10): (1, 1, Decimal("500.00")),
+            date(2026, 5, 11): (0, 1, Decimal("500.00")),
+        })
+        self.assertEqual(self.monthly("room_nights"), {date(2026, 3, 1): (0,), date(2026, 4, 1): (0,), date(2026, 5, 1): (2,)})
+
+    def test_bulk_status_changes_match_saving_one_by_one(self):
+        bookings = [self.book(check_in=self.check_in + timedelta(days=i), nights=1) for i in range(3)]
+        # Same transitions through the bulk path (set_status) and through save()
+        reservations.set_status(Booking.objects.filter(pk__in=[b.pk for b in bookings[:2]]), "confirmed")
+        bookings[2].status = "confirmed"
+        bookings[2].save()
+        reservations.set_status(Booking.objects.filter(pk=bookings[0].pk), "cancelled")
+
+        self.assertEqual(self.daily("bookings_pending", "bookings_confirmed", "bookings_cancelled", "room_nights"), {
+            date(2026, 3, 30): (0, 0, 1, 0),
+            date(2026, 3, 31): (0, 1, 0, 1),
+            date(2026, 4, 1): (0, 1, 0, 1),
+        })
+        # Matches a rebuild from the bookings themselves
+        expected = self.daily("bookings_pending", "bookings_confirmed", "bookings_cancelled", "room_nights", "revenue")
+        rollups.rebuild(date(2026, 3, 1), date(2026, 5, 1))
+        self.assertEqual(self.daily("bookings_pending", "bookings_confirmed", "bookings_cancelled", "room_nights", "revenue"), expected)
+
+    def test_default_rebuild_range_includes_archived_stays(self):
+        old = timezone.localdate() - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS + 30)
+        archived = self.book("confirmed", check_in=old, nights=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive_bookings(), 1)
+        self.book("confirmed")
+        expected = self.daily("bookings_confirmed", "room_nights")
+        self.assertIn(archived.check_in, expected)
+
+        DailyRollup.objects.all().delete()
+        MonthlyRollup.objects.all().delete()
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self.daily("bookings_confirmed", "room_nights"), expected)
+        self.assertEqual(self.monthly("room_nights")[old.replace(day=1)], (1,))
+
+    def test_index_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse("reporting:index")).status_code, 302)
+        self.client.force_login(User.objects.create_user("manager", password="x", is_staff=True))
+        self.assertEqual(self.client.get(reverse("reporting:index")).status_code, 200)
+
+
+# -----------------------------------------------------------
+# Occupancy: archived windows and the staff API
+# -----------------------------------------------------------
+class OccupancyArchiveTests(TestCase):
+    def test_old_windows_read_the_archive_and_current_ones_do_not(self):
+        room = Room.objects.create(number="501", room_type="suite", price_per_night="9000.00")
+        customer = Customer.objects.create(first_name="Meera", email="meera@example.com")
+        old = timezone.localdate() - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS + 30)
+        Booking.objects.create(
+            room=room, customer=customer, status="confirmed", check_in=old, check_out=old + timedelta(days=2),
+            total_amount="18000.00",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_bookings()
+
+        self.assertEqual(list(occupancy.load_intervals(old, 7)["room_id"]), [room.pk])
+        # A window starting today cannot contain an archived stay
+        with CaptureQueriesContext(connection) as queries:
+            occupancy.load_intervals(timezone.localdate(), 30)
+        self.assertNotIn("book_bookinghistory", queries[0]["sql"])
+
+
+class OccupancyApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("manager", password="x", is_staff=True)
+
+    def test_staff_only(self):
+        response = self.client.get(reverse("reporting:occupancy"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/admin/login/", response["Location"])
+
+        self.client.force_login(User.objects.create_user("guest", password="x"))
+        self.assertEqual(self.client.get(reverse("reporting:occupancy")).status_code, 302)
+
+    def test_start_is_clamped(self):
+        self.client.force_login(self.staff)
+        today = timezone.localdate()
+        bound = timedelta(days=settings.OCCUPANCY_MAX_DAYS)
 
-# Create your tests here.
+        data = self.client.get(reverse("reporting:occupancy"), {"start": "1900-01-01", "days": 7}).json()
+        self.assertEqual(data["start"], (today - bound).isoformat())
+        data = self.client.get(reverse("reporting:occupancy"), {"start": "2999-01-01", "days": 7}).json()
+        self.assertEqual(data["start"], (today + bound).isoformat())
@@ -5,4 +5,5 @@ app_name = 'reporting'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('occupancy/', views.occupancy_api, name='occupancy'),
 ]
@@ -1,4 +1,95 @@
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Sum
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
+from django.utils import timezone
+
+from book.models import Room
+from . import occupancy
+from .models import DailyRollup, MonthlyRollup
+from .rollups import COUNTER_FIELDS
+
 
+@staff_member_required
 def index(request):
-    return render(request, 'reporting/index.html')
+    # Reads only the rollup tables, never Booking
+    today = date.today()
+    this_month = today.replace(day=1)
+    sums = {name: Sum(name) for name in COUNTER_FIELDS}
+
+    totals = MonthlyRollup.objects.aggregate(**sums)
+    totals = {name: value or 0 for name, value in totals.items()}
+    totals["bookings"] = sum(totals[name] for name in COUNTER_FIELDS[:4])
+
+    months = list(
+        MonthlyRollup.objects.values("month").annotate(**sums).order_by("-month")[:12]
+    )
+    for row in months:
+        row["bookings"] = sum(row[name] for name in COUNTER_FIELDS[:4])
+        row["adr"] = row["revenue"] / row["room_nights"] if row["room_nights"] else 0
+
+    # Occupancy this month by room type
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    room_counts = dict(
+        Room.objects.filter(available=True).values_list("room_type").annotate(n=Count("id"))
+    )
+    by_type = []
+    for rollup in MonthlyRollup.objects.filter(month=this_month).order_by("-revenue"):
+        capacity = room_counts.get(rollup.room_type, 0) * days_in_month
+        by_type.append({
+            "room_type": rollup.get_room_type_display(),
+            "revenue": rollup.revenue,
+            "room_nights": rollup.room_nights,
+            "adr": rollup.average_daily_rate,
+            "occupancy": 100 * rollup.room_nights / capacity if capacity else 0,
+        })
+
+    # Busiest weekday this month by room nights sold
+    weekdays = [0] * 7
+    for day, nights in DailyRollup.objects.filter(
+        day__gte=this_month, day__lte=today.replace(day=days_in_month)
+    ).values_list("day").annotate(n=Sum("room_nights")):
+        weekdays[day.weekday()] += nights
+    peak_day = calendar.day_name[weekdays.index(max(weekdays))] if any(weekdays) else None
+
+    current = months[0] if months and months[0]["month"] == this_month else None
+    return render(request, 'reporting/index.html', {
+        "totals": totals,
+        "months": months,
+        "current": current,
+        "by_type": by_type,
+        "peak_day": peak_day,
+    })
+
+
+@staff_member_required
+def occupancy_api(request):
+    # /reporting/occupancy/?start=2026-01-01&days=365&room_type=suite
+    today = timezone.localdate()
+    try:
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else today
+        days = int(request.GET.get("days", 365))
+    except ValueError:
+        return HttpResponseBadRequest("start must be YYYY-MM-DD and days a number.")
+    if not 1 <= days <= settings.OCCUPANCY_MAX_DAYS:
+        return HttpResponseBadRequest(f"days must be between 1 and {settings.OCCUPANCY_MAX_DAYS}.")
+    # Every start is its own cached window: keep them within OCCUPANCY_MAX_DAYS of today
+    bound = timedelta(days=settings.OCCUPANCY_MAX_DAYS)
+    start = min(max(start, today - bound), today + bound)
+
+    data = occupancy.get_occupancy(start, days)
+    room_type = request.GET.get("room_type")
+    if room_type:
+        # The cached window holds every room; narrow it per request
+        rows = [i for i, room in enumerate(data["rooms"]) if room["room_type"] == room_type]
+        data = {
+            **data,
+            "rooms": [data["rooms"][i] for i in rows],
+            "heatmap": [data["heatmap"][i] for i in rows],
+            "room_types": {key: value for key, value in data["room_types"].items() if key == room_type},
+        }
+    return JsonResponse(data)
@@ -0,0 +1,21 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "queue", "status", "priority", "attempts", "run_at", "finished_at")
+    list_filter = ("status", "queue")
+    search_fields = ("name",)
+    readonly_fields = ("locked_by", "locked_until", "created_at", "finished_at", "error")
+    show_full_result_count = False
+    actions = ["retry_tasks"]
+
+    @admin.action(description="Retry selected failed tasks", permissions=["change"])
+    def retry_tasks(self, request, queryset):
+        retried = queryset.filter(status="failed").update(
+            status="queued", attempts=0, run_at=timezone.now(), finished_at=None, error="",
+        )
+        self.message_user(request, f"{retried} task{'s' if retried != 1 else ''} queued again.", messages.SUCCESS)
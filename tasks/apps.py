@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tasks'
+
+    def ready(self):
+        from Majestic_Manor import metrics
+        from . import queue
+
+        # <app>/tasks.py modules register their @task functions
+        autodiscover_modules("tasks")
+        metrics.register_collector(queue.metric_lines)
@@ -0,0 +1,59 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks import queue
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the Task table, in one or more worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--queues", help="Comma-separated queue names (default: all)")
+        parser.add_argument("--batch-size", type=int, default=10, help="Tasks claimed at a time")
+        parser.add_argument("--idle-sleep", type=float, default=1.0)
+        parser.add_argument("--once", action="store_true", help="Drain the ready tasks and exit")
+
+    def handle(self, *args, **options):
+        queues = [name.strip() for name in options["queues"].split(",")] if options["queues"] else None
+        work = {
+            "queues": queues,
+            "batch_size": options["batch_size"],
+            "idle_sleep": options["idle_sleep"],
+            "once": options["once"],
+        }
+        if options["processes"] <= 1:
+            run_worker(work)
+            return
+
+        # Children open their own connections; never share one across a fork
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=run_worker, args=(work,), daemon=True)
+            for _ in range(options["processes"])
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(f"started {len(children)} workers (queues: {', '.join(queues or ['all'])})")
+
+        def stop(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()  # SIGTERM: finish the current batch, then exit
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        while any(child.is_alive() for child in children):
+            time.sleep(0.5)
+
+
+def run_worker(work):
+    stopping = []
+    # Let the batch in hand finish; its tasks would otherwise wait out their lease
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+    queue.work(queue.worker_name(), should_stop=lambda: bool(stopping), **work)
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    # One queued call of a registered @task function (tasks.queue). Workers
+    # claim rows by leasing them; finished rows are purged after
+    # TASKS_KEEP_DONE_HOURS and feed the throughput metrics until then.
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    queue = models.CharField(max_length=50, default="default")
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # worker claim: ready tasks of a queue, highest priority first
+            models.Index(fields=['status', 'queue', '-priority', 'run_at'], name='task_claim_idx'),
+            # reaper: running tasks whose lease ran out
+            models.Index(fields=['status', 'locked_until'], name='task_lease_idx'),
+            # throughput metrics and purge
+            models.Index(fields=['status', 'finished_at'], name='task_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,300 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# name -> TaskType, filled by @task as <app>/tasks.py modules are imported
+REGISTRY = {}
+
+
+# -----------------------------------------------------------
+# Registration and Enqueueing
+#
+# Enqueueing is an INSERT in the caller's transaction: a task queued by a
+# request that then rolls back is never seen by a worker.
+# -----------------------------------------------------------
+class TaskType:
+    def __init__(self, fn, name, queue, priority, max_attempts, batch_size):
+        self.fn = fn
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+
+    def __call__(self, *args):
+        # Inline; batched functions take a list of argument lists
+        return self.fn(*args)
+
+    def delay(self, *args, **options):
+        return enqueue(self.name, args, **options)
+
+
+class BatchIncomplete(Exception):
+    """
+    Raised by a batched task that failed partway: `done` holds the indexes
+    of the calls it finished, which are then not run again.
+    """
+    def __init__(self, done, message=""):
+        super().__init__(message or f"{len(done)} calls finished before the batch failed")
+        self.done = done
+
+
+def task(fn=None, *, queue="default", priority=0, max_attempts=None, batch_size=1):
+    """
+    Register fn as a task. Arguments must be JSON-serializable.
+    With batch_size > 1, fn receives a list of up to batch_size argument
+    lists, one per queued call, and handles them together; a failed batch
+    is retried one call at a time, less any calls it reports finished by
+    raising BatchIncomplete. A call can run more than once (retries, lost
+    workers), so tasks should be idempotent.
+    """
+    def register(fn):
+        name = f"{fn.__module__}.{fn.__name__}"
+        REGISTRY[name] = TaskType(
+            fn, name, queue, priority, max_attempts or settings.TASKS_MAX_ATTEMPTS, batch_size,
+        )
+        return REGISTRY[name]
+    return register(fn) if fn else register
+
+
+def enqueue(name, args=(), queue=None, priority=None, delay=None, run_at=None):
+    """Queue one call of a registered task; delay is in seconds."""
+    spec = REGISTRY[name]
+    if settings.TASKS_EAGER:
+        # No worker (local development): run once the caller's transaction commits
+        transaction.on_commit(lambda: _execute(spec, [list(args)]))
+        return None
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Task.objects.create(
+        queue=queue or spec.queue,
+        name=name,
+        args=list(args),
+        priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts,
+        run_at=run_at,
+    )
+
+
+# -----------------------------------------------------------
+# Claiming
+#
+# A claim leases up to batch_size ready tasks: status "running",
+# locked_by a token unique to this claim, locked_until now + lease. If a
+# worker dies, reap() puts its tasks back once the lease runs out.
+#
+# PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers
+# take disjoint rows without waiting on each other.
+# SQLite (no row locks): one UPDATE ... WHERE id IN (SELECT ... LIMIT n);
+# a single statement holds the write lock from select to update, so two
+# workers can never lease the same row.
+# -----------------------------------------------------------
+def ready_tasks(queues=None, now=None):
+    tasks = Task.objects.filter(status="queued", run_at__lte=now or timezone.now())
+    if queues:
+        tasks = tasks.filter(queue__in=queues)
+    return tasks.order_by("-priority", "run_at", "id")
+
+
+def claim(worker, queues=None, batch_size=10, now=None):
+    now = now or timezone.now()
+    token = f"{worker}:{uuid.uuid4().hex[:8]}"
+    lease = {
+        "status": "running",
+        "locked_by": token,
+        "locked_until": now + timedelta(seconds=settings.TASKS_LEASE_SECONDS),
+        "attempts": F("attempts") + 1,
+    }
+    ready = ready_tasks(queues, now)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(ready.select_for_update(skip_locked=True).values_list("pk", flat=True)[:batch_size])
+            if pks:
+                Task.objects.filter(pk__in=pks).update(**lease)
+    else:
+        if not Task.objects.filter(pk__in=ready.values("pk")[:batch_size], status="queued").update(**lease):
+            return token, []
+    return token, list(Task.objects.filter(locked_by=token).order_by("-priority", "run_at", "id"))
+
+
+def reap(now=None):
+    """Return running tasks with an expired lease to the queue; returns how many."""
+    now = now or timezone.now()
+    expired = Task.objects.filter(status="running", locked_until__lt=now)
+    failed = expired.filter(attempts__gte=F("max_attempts")).update(
+        status="failed", finished_at=now, locked_until=None, error="Lease expired (worker lost?)",
+    )
+    requeued = expired.update(status="queued", run_at=now, locked_by="", locked_until=None)
+    return failed + requeued
+
+
+def purge(now=None, chunk_size=5000):
+    """Delete finished tasks older than TASKS_KEEP_DONE_HOURS, in chunks."""
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.TASKS_KEEP_DONE_HOURS)
+    purged = 0
+    while True:
+        pks = list(Task.objects.filter(status="done", finished_at__lt=cutoff).values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return purged
+        purged += Task.objects.filter(pk__in=pks).delete()[0]
+
+
+# -----------------------------------------------------------
+# Running
+#
+# Claimed tasks are grouped by function; batched functions get up to
+# batch_size calls at once. A batch that raises is redone one call at a
+# time, so one bad call cannot fail (or retry) the others.
+# -----------------------------------------------------------
+def backoff(attempts):
+    delay = min(settings.TASKS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.TASKS_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def _execute(spec, calls):
+    if spec.batch_size > 1:
+        spec.fn(calls)
+    else:
+        for args in calls:
+            spec.fn(*args)
+
+
+def run(token, tasks):
+    """Run claimed tasks; returns (done, failed) counts."""
+    done, failures = [], []
+    by_name = {}
+    for claimed in tasks:
+        by_name.setdefault(claimed.name, []).append(claimed)
+
+    for name, group in by_name.items():
+        spec = REGISTRY.get(name)
+        if spec is None:
+            failures += [(claimed, f"Unknown task {name}", True) for claimed in group]
+            continue
+        size = spec.batch_size
+        chunks = [group[i:i + size] for i in range(0, len(group), size)]
+        for chunk in chunks:
+            try:
+                _execute(spec, [claimed.args for claimed in chunk])
+                done += chunk
+                continue
+            except Exception as exc:
+                if len(chunk) == 1:
+                    failures.append((chunk[0], traceback.format_exc(), False))
+                    continue
+                if isinstance(exc, BatchIncomplete):
+                    finished = set(exc.done)
+                    done += [claimed for i, claimed in enumerate(chunk) if i in finished]
+                    chunk = [claimed for i, claimed in enumerate(chunk) if i not in finished]
+            for claimed in chunk:
+                try:
+                    _execute(spec, [claimed.args])
+                    done.append(claimed)
+                except Exception:
+                    failures.append((claimed, traceback.format_exc(), False))
+
+    now = timezone.now()
+    # locked_by: a task whose lease expired and was claimed again is not ours to finish
+    Task.objects.filter(pk__in=[claimed.pk for claimed in done], locked_by=token).update(
+        status="done", finished_at=now, locked_until=None, error="",
+    )
+    failed = 0
+    for claimed, error, permanent in failures:
+        if permanent or claimed.attempts >= claimed.max_attempts:
+            failed += 1
+            logger.error("Task %s #%s failed for good: %s", claimed.name, claimed.pk, error)
+            update = {"status": "failed", "finished_at": now}
+        else:
+            update = {"status": "queued", "run_at": now + timedelta(seconds=backoff(claimed.attempts))}
+        Task.objects.filter(pk=claimed.pk, locked_by=token).update(
+            locked_by="", locked_until=None, error=error, **update,
+        )
+    return len(done), failed
+
+
+def work(worker, queues=None, batch_size=10, idle_sleep=1.0, once=False, should_stop=lambda: False):
+    """Claim and run tasks until should_stop() (or, with once, until nothing is ready)."""
+    next_maintenance = 0.0
+    while not should_stop():
+        # Every worker does the upkeep now and then; both steps are idempotent
+        if time.monotonic() >= next_maintenance:
+            reap()
+            purge()
+            next_maintenance = time.monotonic() + settings.TASKS_LEASE_SECONDS / 2
+
+        token, tasks = claim(worker, queues, batch_size)
+        if not tasks:
+            if once:
+                return
+            time.sleep(idle_sleep)
+            continue
+        start = time.perf_counter()
+        done, failed = run(token, tasks)
+        logger.info("%s: %d done, %d failed, %d retrying in %.0fms",
+                    worker, done, failed, len(tasks) - done - failed, (time.perf_counter() - start) * 1000)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# -----------------------------------------------------------
+# Metrics (collected by /metrics)
+# -----------------------------------------------------------
+def queue_stats(now=None):
+    """{queue: {"queued", "running", "done", "failed", "lag_seconds", "throughput"}}."""
+    now = now or timezone.now()
+    window = settings.TASKS_METRICS_WINDOW
+    stats = {}
+
+    def row(queue):
+        return stats.setdefault(queue, {
+            "queued": 0, "running": 0, "done": 0, "failed": 0, "lag_seconds": 0.0, "throughput": 0.0,
+        })
+
+    for queue, status, count in Task.objects.values_list("queue", "status").annotate(count=Count("id")).order_by():
+        row(queue)[status] = count
+    # Lag: how long the oldest ready task has been waiting
+    for queue, oldest in ready_tasks(now=now).values_list("queue").annotate(oldest=Min("run_at")).order_by():
+        row(queue)["lag_seconds"] = (now - oldest).total_seconds()
+    for queue, count in Task.objects.filter(
+        status="done", finished_at__gte=now - timedelta(seconds=window),
+    ).values_list("queue").annotate(count=Count("id")).order_by():
+        row(queue)["throughput"] = count / window
+    return stats
+
+
+def metric_lines(prefix):
+    stats = queue_stats()
+    lines = [
+        f"# HELP {prefix}_tasks Tasks in the queue table by queue and status.",
+        f"# TYPE {prefix}_tasks gauge",
+    ]
+    for queue, row in sorted(stats.items()):
+        for status in ("queued", "running", "done", "failed"):
+            lines.append(f'{prefix}_tasks{{queue="{queue}",status="{status}"}} {row[status]}')
+    lines += [
+        f"# HELP {prefix}_task_lag_seconds Age of the oldest ready task per queue.",
+        f"# TYPE {prefix}_task_lag_seconds gauge",
+    ]
+    lines += [f'{prefix}_task_lag_seconds{{queue="{queue}"}} {row["lag_seconds"]:.6g}' for queue, row in sorted(stats.items())]
+    lines += [
+        f"# HELP {prefix}_task_throughput Tasks finished per second over the last TASKS_METRICS_WINDOW seconds.",
+        f"# TYPE {prefix}_task_throughput gauge",
+    ]
+    lines += [f'{prefix}_task_throughput{{queue="{queue}"}} {row["throughput"]:.6g}' for queue, row in sorted(stats.items())]
+    return lines
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from Majestic_Manor import metrics
+from . import queue
+from .models import Task
+
+calls = []
+
+
+@queue.task(queue="test", max_attempts=2)
+def record_call(value):
+    if value == "boom":
+        raise ValueError("boom")
+    calls.append(value)
+
+
+@queue.task(queue="test", batch_size=10)
+def record_batch(batch):
+    if ["boom"] in batch:
+        raise ValueError("boom")
+    calls.append([value for value, in batch])
+
+
+@queue.task(queue="test", batch_size=10)
+def record_until_boom(batch):
+    # Side effects as it goes, like a mail batch: what ran before the failure stays done
+    for index, (value,) in enumerate(batch):
+        if value == "boom":
+            raise queue.BatchIncomplete(list(range(index)))
+        calls.append(value)
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_BACKOFF=60)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def drain(self):
+        token, claimed = queue.claim("test-worker", ["test"], batch_size=10)
+        return queue.run(token, claimed)
+
+    def test_claims_by_priority_without_overlap(self):
+        low = record_call.delay("low")
+        high = record_call.delay("high", priority=5)
+        other = record_call.delay("other")
+
+        _, first = queue.claim("a", ["test"], batch_size=2)
+        _, second = queue.claim("b", ["test"], batch_size=2)
+
+        self.assertEqual([task.pk for task in first], [high.pk, low.pk])
+        self.assertEqual([task.pk for task in second], [other.pk])
+        self.assertEqual(queue.claim("c", ["test"])[1], [])
+
+    def test_failed_task_is_retried_with_backoff(self):
+        task = record_call.delay("boom")
+
+        self.assertEqual(self.drain(), (0, 0))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ("queued", 1))
+        self.assertGreater(task.run_at, timezone.now() + timedelta(seconds=20))
+        self.assertIn("ValueError", task.error)
+
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs("tasks.queue", "ERROR"):
+            self.assertEqual(self.drain(), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual(task.status, "failed")
+
+    def test_batch_runs_similar_tasks_together(self):
+        for value in ("a", "b", "c"):
+            record_batch.delay(value)
+        self.assertEqual(self.drain(), (3, 0))
+        self.assertEqual(calls, [["a", "b", "c"]])
+
+    def test_bad_call_does_not_fail_its_batch(self):
+        for value in ("a", "boom", "c"):
+            record_batch.delay(value)
+        self.assertEqual(self.drain(), (2, 0))
+        self.assertEqual(calls, [["a"], ["c"]])
+        self.assertEqual(Task.objects.get(status="queued").args, ["boom"])
+
+    def test_finished_calls_of_an_incomplete_batch_are_not_rerun(self):
+        for value in ("a", "b", "boom", "c"):
+            record_until_boom.delay(value)
+        self.assertEqual(self.drain(), (3, 0))
+        self.assertEqual(calls, ["a", "b", "c"])
+        self.assertEqual(Task.objects.get(status="queued").args, ["boom"])
+
+    def test_expired_lease_is_reaped(self):
+        task = record_call.delay("late")
+        queue.claim("lost", ["test"])
+        self.assertEqual(queue.reap(timezone.now() + timedelta(seconds=1)), 0)
+        self.assertEqual(queue.reap(timezone.now() + timedelta(hours=1)), 1)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.locked_by), ("queued", ""))
+
+    def test_queue_metrics(self):
+        record_call.delay("a")
+        Task.objects.update(run_at=timezone.now() - timedelta(minutes=2))
+        record_call.delay("b", delay=3600)
+
+        stats = queue.queue_stats()["test"]
+        self.assertEqual(stats["queued"], 2)
+        self.assertGreaterEqual(stats["lag_seconds"], 120)
+
+        self.drain()
+        self.assertGreater(queue.queue_stats()["test"]["throughput"], 0)
+        self.assertIn('task_lag_seconds{queue="test"}', metrics.exposition())